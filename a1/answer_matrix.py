@@ -0,0 +1,1014 @@
+"""CSC148 Assignment 1
+
+=== CSC148 Winter 2023 ===
+Department of Computer Science,
+University of Toronto
+
+This code is provided solely for the personal and private use of
+students taking the CSC148 course at the University of Toronto.
+Copying for purposes other than this use is expressly prohibited.
+All forms of distribution of this code, whether as given or with
+any changes, are expressly prohibited.
+
+Authors: Misha Schwartz, Mario Badr, Christine Murad, Diane Horton,
+Sophia Huynh, Jaisie Sin, Tom Ginsberg, Jonathan Calver, and Jacqueline Smith
+
+All of the files in this directory and all subdirectories are:
+Copyright (c) 2023 Misha Schwartz, Mario Badr, Diane Horton, Sophia Huynh,
+Jonathan Calver, and Jacqueline Smith
+
+=== Module Description ===
+
+This file contains a class that stores the answers of every student in a course
+to every question in a survey as columns of numbers, so that groups of students
+can be scored by their row numbers instead of by looking up Answer objects.
+"""
+from __future__ import annotations
+from typing import TYPE_CHECKING, Any, Iterable, Optional
+
+import numpy as np
+
+from course import answer_validity
+from criterion import AdditionScorer, Criterion, CriterionState, \
+    pair_mean_bounds
+
+if TYPE_CHECKING:
+    from course import Student
+    from survey import Survey, Question
+
+# The largest rounding error, relative to the scores, of a score that is
+# computed from running sums, like those of score_many and GreedyScorer,
+# instead of the way Survey.score_students computes it
+_TIE_SLACK = 1e-9
+
+
+class AnswerMatrix:
+    """The answers that the students in a course gave to the questions in a
+    survey, encoded as one array of numbers per question.
+
+    Each student is identified by their row, which is their position in
+    <students>. A group of students is scored by passing a list of rows to
+    score_rows, which gives the same score as <survey>.score_students would
+    give to those students.
+
+    If similarity caching is turned on, the similarity of every pair of
+    students is computed the first time a question is scored with a criterion
+    that only depends on pairwise similarities, and is stored as float32.
+    Scores computed from these cached similarities are only accurate to
+    float32 precision.
+
+    === Public Attributes ===
+    students: the students whose answers are stored, in order of their rows
+    questions: the questions in the survey, in the order returned by
+        Survey.get_questions()
+
+    === Private Attributes ===
+    _survey: the survey whose criteria and weights are used to score groups
+    _rows: a dictionary mapping a student's id to their row
+    _codes: a list with one array per question in <questions>. Entry r of the
+        array is the answer of the student in row r to that question, as
+        encoded by the question's encode_answer method.
+    _valid: a boolean array where _valid[r, q] is True iff the student in row
+        r has a valid answer to the question at position q of <questions>
+    _similarities: None if similarity caching is turned off. Otherwise, a
+        dictionary mapping the position of a question in <questions> to the
+        similarities of every pair of rows (r1, r2) with r1 < r2, stored in
+        row-major order as the upper triangle of an N by N matrix.
+    _revisions: the revision of each student, as given by
+        Student.get_revision, when their answers were last read, in order of
+        their rows
+
+    === Representation Invariants ===
+    No two students in <students> have the same id
+    len(_codes) == len(questions)
+    Each array in _codes has length len(students)
+    _valid has shape (len(students), len(questions))
+    _rows[students[r].id] == r for every row r
+    Each array in _similarities has length N * (N - 1) // 2 and dtype float32,
+        where N == len(students)
+    """
+    students: tuple[Student, ...]
+    questions: list[Question]
+    _survey: Survey
+    _rows: dict[int, int]
+    _codes: list[np.ndarray]
+    _valid: np.ndarray
+    _similarities: Optional[dict[int, np.ndarray]]
+    _revisions: list[int]
+
+    def __init__(self, students: Iterable[Student], survey: Survey,
+                 cache_similarities: Optional[bool] = None) -> None:
+        """Initialize an answer matrix holding the answers of every student in
+        <students> to every question in <survey>. The row of each student is
+        their position in <students>.
+
+        To compile a whole course, pass the students returned by
+        Course.get_students().
+
+        An answer that is missing or invalid is recorded as invalid; any group
+        containing its student will score 0.0.
+
+        If <cache_similarities> is True, pairwise similarities are cached per
+        question the first time they are needed. If it is None, they are
+        cached iff <survey>.caches_similarities() is True.
+        """
+        if cache_similarities is None:
+            cache_similarities = survey.caches_similarities()
+        self.students = tuple(students)
+        self.questions = survey.get_questions()
+        self._survey = survey
+        self._similarities = {} if cache_similarities else None
+        self._rows = {student.id: row
+                      for row, student in enumerate(self.students)}
+        self._revisions = [student.get_revision() for student in self.students]
+        self._valid = answer_validity(self.students, survey)
+        self._codes = []
+
+        for col, question in enumerate(self.questions):
+            codes = []
+            for row, student in enumerate(self.students):
+                if self._valid[row, col]:
+                    codes.append(question.encode_answer(
+                        student.get_answer(question)))
+                else:
+                    codes.append(0)
+            self._codes.append(np.array(codes))
+
+    def refresh(self) -> dict[int, set[int]]:
+        """Read again every answer that has been recorded or replaced since the
+        answers of its student were last read, and return a dictionary mapping
+        the row of each student with such an answer to the positions in
+        <self>.questions of the questions they answered.
+
+        Scorers made from this answer matrix before it is refreshed, such as
+        a GreedyScorer, must not be used afterwards.
+        """
+        columns = {question.id: col
+                   for col, question in enumerate(self.questions)}
+        changed = {}
+        for row, student in enumerate(self.students):
+            revision = student.get_revision()
+            if revision == self._revisions[row]:
+                continue
+            cols = {columns[question_id] for question_id
+                    in student.changed_questions(self._revisions[row])
+                    if question_id in columns}
+            self._revisions[row] = revision
+            for col in cols:
+                self._read_answer(row, col)
+            if cols:
+                changed[row] = cols
+        return changed
+
+    def _read_answer(self, row: int, col: int) -> None:
+        """Read the answer of the student in <row> to the question at position
+        <col> of <self>.questions into this answer matrix.
+        """
+        question = self.questions[col]
+        student = self.students[row]
+        self._valid[row, col] = student.has_answer(question)
+        code = 0
+        if self._valid[row, col]:
+            code = question.encode_answer(student.get_answer(question))
+        codes = self._codes[col]
+        dtype = np.result_type(codes, np.array([code]))
+        if dtype != codes.dtype:
+            self._codes[col] = codes = codes.astype(dtype)
+        codes[row] = code
+        if self._similarities is not None:
+            self._similarities.pop(col, None)
+
+    def __len__(self) -> int:
+        """Return the number of students (rows) in this answer matrix."""
+        return len(self.students)
+
+    def row(self, student: Student) -> int:
+        """Return the row of <student> in this answer matrix.
+
+        Preconditions:
+            - A student with the same id as <student> is in this matrix
+        """
+        return self._rows[student.id]
+
+    def get_students(self, rows: Iterable[int]) -> list[Student]:
+        """Return the students in <rows>, in the same order as <rows>."""
+        return [self.students[row] for row in rows]
+
+    def score_rows(self, rows: list[int]) -> float:
+        """Return the score that <self>._survey.score_students would give to
+        the students in <rows>.
+
+        Preconditions:
+            - len(rows) > 0
+        """
+        if not self.questions:
+            return 0.0
+
+        index = np.asarray(rows)
+        if not self._valid[index].all():
+            return 0.0
+
+        total = 0.0
+        for col, question in enumerate(self.questions):
+            total += (self._score_column(col, rows, index)
+                      * self._survey.get_weight(question))
+
+        return total / len(self.questions)
+
+    def score_columns(self, rows: list[int],
+                      cols: Iterable[int]) -> dict[int, float]:
+        """Return a dictionary that maps each position in <cols> of a question
+        in <self>.questions to the score that its criterion gives to the
+        answers of the students in <rows>, before it is weighted. The score of
+        a question is 0.0 if a student in <rows> has no valid answer to it.
+
+        Preconditions:
+            - len(rows) > 0
+            - 0 <= col < len(self.questions) for every col in <cols>
+        """
+        index = np.asarray(rows)
+        valid = self._valid[index].all(axis=0)
+        return {col: self._score_column(col, rows, index) if valid[col]
+                else 0.0 for col in cols}
+
+    def weigh_columns(self, rows: list[int],
+                      scores: dict[int, float]) -> float:
+        """Return score_rows(<rows>), where <scores> maps the position of
+        every question in <self>.questions to its score, as returned by
+        score_columns, for the students in <rows>.
+
+        Preconditions:
+            - len(rows) > 0
+        """
+        if not self.questions:
+            return 0.0
+        if not self._valid[np.asarray(rows)].all():
+            return 0.0
+
+        total = 0.0
+        for col, question in enumerate(self.questions):
+            total += scores[col] * self._survey.get_weight(question)
+
+        return total / len(self.questions)
+
+    def _score_column(self, col: int, rows: list[int],
+                      index: np.ndarray) -> float:
+        """Return the score that the criterion for the question at position
+        <col> of <self>.questions gives to the answers of the students in
+        <rows>, where <index> is <rows> as an array.
+
+        Preconditions:
+            - len(rows) > 0
+            - Every student in <rows> has a valid answer to the question
+        """
+        question = self.questions[col]
+        criterion = self._survey.get_criterion(question)
+
+        if self._similarities is not None and len(rows) > 1 \
+                and _scores_similarities(criterion):
+            return criterion.score_similarities(
+                self.pair_similarities(col, rows))
+
+        try:
+            return criterion.score_codes(question, self._codes[col][index])
+        except NotImplementedError:
+            answers = [self.students[row].get_answer(question) for row in rows]
+            return criterion.score_valid_answers(question, answers)
+
+    def score_many(self, members: list[int],
+                   candidates: list[int]) -> np.ndarray:
+        """Return an array whose i-th entry is the score of the group of rows
+        <members> + [<candidates>[i]], as given by score_rows, up to rounding.
+
+        All candidate groups are scored together, one question at a time,
+        so the pairs within <members> are only compared once. Cached
+        similarities are not used. The scores keep running sums, so
+        best_addition breaks near ties between them exactly.
+
+        Preconditions:
+            - No row in <candidates> is in <members>
+        """
+        scores = np.zeros(len(candidates))
+        index = np.asarray(members, dtype=int)
+        if not self.questions or not self._valid[index].all():
+            return scores
+
+        candidate_index = np.asarray(candidates, dtype=int)
+        valid = self._valid[candidate_index].all(axis=1)
+        candidate_index = candidate_index[valid]
+
+        for col, question in enumerate(self.questions):
+            column = self.score_many_column(col, members, candidate_index)
+            scores[valid] += column * self._survey.get_weight(question)
+
+        return scores / len(self.questions)
+
+    def best_addition(self, members: list[int], candidates: np.ndarray,
+                      scores: np.ndarray) -> int:
+        """Return the index i of the first row <candidates>[i] among those
+        that give the group of rows <members> the highest score_rows, where
+        <scores>[i] is that score, up to rounding, or -inf for a row that is
+        not a candidate.
+
+        Batched scores such as those of score_many keep running sums, so two
+        candidates that truly tie can differ in their last bits. Every
+        candidate whose score is that close to the highest is scored again
+        with score_rows, so ties are broken exactly as they are by comparing
+        the scores that Survey.score_students gives. Candidates with the same
+        answers to every question give the same score, so only the first of
+        them is scored again.
+
+        Preconditions:
+            - len(candidates) == len(scores) > 0
+            - Some entry of <scores> is not -inf
+            - No row in <candidates> is in <members>
+        """
+        near = near_best(scores).tolist()
+        if len(near) > 1:
+            rows = np.asarray(candidates)[near]
+            answers = zip(*(self._valid[rows].T.tolist()
+                            + [codes[rows].tolist() for codes in self._codes]))
+            firsts = {}
+            for i, key in zip(near, answers):
+                firsts.setdefault(key, i)
+            near = list(firsts.values())
+        if len(near) == 1:
+            return near[0]
+        exact = [self.score_rows(members + [int(candidates[i])])
+                 for i in near]
+        return int(near[int(np.argmax(exact))])
+
+    def score_many_column(self, col: int, members: list[int],
+                          candidates: np.ndarray) -> np.ndarray:
+        """Return an array whose i-th entry is the score that the criterion
+        for the question at position <col> of <self>.questions gives to the
+        answers of <members> + [<candidates>[i]].
+
+        Preconditions:
+            - Every row in <members> and <candidates> has a valid answer to
+              the question
+            - No row in <candidates> is in <members>
+        """
+        question = self.questions[col]
+        criterion = self._survey.get_criterion(question)
+        index = np.asarray(members, dtype=int)
+        try:
+            return criterion.score_additions(question, self._codes[col][index],
+                                             self._codes[col][candidates])
+        except NotImplementedError:
+            return np.array([self._score_column(col, members + [row],
+                                                np.append(index, row))
+                             for row in candidates], dtype=float)
+
+    def score_swaps(self, first: list[int], others: list[list[int]]
+                    ) -> tuple[np.ndarray, np.ndarray]:
+        """Return two arrays whose entries [p, i, j] are the scores, as given
+        by score_rows, of the groups of rows <first> and <others>[p] after
+        <first>[i] and <others>[p][j] are swapped.
+
+        Every group in <others> is scored against <first> at once, one
+        question at a time.
+
+        Preconditions:
+            - len(first) > 0 and len(others) > 0
+            - Every group in <others> has the same, non-zero, length
+            - No row is in <first> and a group in <others>, or in two groups in
+              <others>
+        """
+        index_1 = np.asarray(first, dtype=int)
+        index_2 = np.asarray(others, dtype=int)
+        shape = (len(others), len(first), index_2.shape[1])
+        first_scores, second_scores = np.zeros(shape), np.zeros(shape)
+        if not self.questions:
+            return first_scores, second_scores
+
+        valid_1 = self._valid[index_1].all(axis=1)
+        valid_2 = self._valid[index_2].all(axis=2)
+        # After a swap, a group is valid iff the rest of it and the row that
+        # joins it are valid
+        rest_1 = valid_1.sum() - valid_1 == len(first) - 1
+        rest_2 = valid_2.sum(axis=1, keepdims=True) - valid_2 \
+            == index_2.shape[1] - 1
+        first_valid = rest_1[None, :, None] & valid_2[:, None, :]
+        second_valid = valid_1[None, :, None] & rest_2[:, None, :]
+
+        for col, question in enumerate(self.questions):
+            criterion = self._survey.get_criterion(question)
+            codes_1 = np.broadcast_to(self._valid_codes(col, index_1),
+                                      shape[:2])
+            try:
+                new_1, new_2 = criterion.score_swaps(
+                    question, codes_1, self._valid_codes(col, index_2))
+            except NotImplementedError:
+                new_1, new_2 = self._score_swaps_column(col, first, others)
+            weight = self._survey.get_weight(question)
+            first_scores += new_1 * weight
+            second_scores += new_2 * weight
+
+        count = len(self.questions)
+        return (np.where(first_valid, first_scores / count, 0.0),
+                np.where(second_valid, second_scores / count, 0.0))
+
+    def _score_swaps_column(self, col: int, first: list[int],
+                            others: list[list[int]]
+                            ) -> tuple[np.ndarray, np.ndarray]:
+        """Return what the criterion for the question at position <col> of
+        <self>.questions gives to the groups of rows <first> and <others>[p]
+        after each swap, as in score_swaps, by scoring every swapped group in
+        full. Swapped groups with an invalid answer to the question are given
+        0.0.
+        """
+        shape = (len(others), len(first), len(others[0]))
+        first_scores, second_scores = np.zeros(shape), np.zeros(shape)
+        valid = self._valid[:, col]
+        for p, second in enumerate(others):
+            for i, row_1 in enumerate(first):
+                for j, row_2 in enumerate(second):
+                    for scores, rows in [
+                            (first_scores, first[:i] + [row_2] + first[i + 1:]),
+                            (second_scores,
+                             second[:j] + [row_1] + second[j + 1:])]:
+                        index = np.asarray(rows)
+                        if valid[index].all():
+                            scores[p, i, j] = self._score_column(col, rows,
+                                                                 index)
+        return first_scores, second_scores
+
+    def _valid_codes(self, col: int,
+                     rows: Optional[np.ndarray] = None) -> np.ndarray:
+        """Return the codes of <rows>, or of every row if <rows> is None, for
+        the question at position <col> of <self>.questions, with the code of
+        each row that has no valid answer replaced by the code of some valid
+        answer.
+
+        Scores computed from the replaced codes are meaningless, but can be
+        computed without errors.
+        """
+        if rows is None:
+            rows = np.arange(len(self.students))
+        codes = self._codes[col][rows]
+        valid = self._valid[rows, col]
+        if not valid.all():
+            column = self._valid[:, col]
+            if column.any():
+                codes[~valid] = self._codes[col][np.argmax(column)]
+        return codes
+
+    def score_groups(self, groups: list[list[int]]) -> np.ndarray:
+        """Return an array whose i-th entry is the score of the group of rows
+        <groups>[i], as given by score_rows.
+
+        Preconditions:
+            - Every group in <groups> is non-empty
+        """
+        return np.array([self.score_rows(group) for group in groups],
+                        dtype=float)
+
+    def score_group_array(self, groups: np.ndarray) -> np.ndarray:
+        """Return an array whose i-th entry is the score of the group of rows
+        <groups>[i], as given by score_rows, where every row of <groups> is a
+        group of the same size.
+
+        All of the groups are scored at once, one question at a time.
+
+        Preconditions:
+            - groups.ndim == 2 and groups.shape[1] > 0
+        """
+        scores = np.zeros(len(groups))
+        if not self.questions or len(groups) == 0:
+            return scores
+
+        valid = self._valid[groups].all(axis=(1, 2))
+        for col, question in enumerate(self.questions):
+            criterion = self._survey.get_criterion(question)
+            try:
+                column = criterion.score_code_groups(
+                    question, self._valid_codes(col, groups))
+            except NotImplementedError:
+                column = np.array([self._score_column(col, list(group), group)
+                                   if is_valid else 0.0
+                                   for group, is_valid in zip(groups, valid)])
+            scores += column * self._survey.get_weight(question)
+
+        return np.where(valid, scores / len(self.questions), 0.0)
+
+    def member_bounds(self, rows: np.ndarray, sizes: list[int]) -> np.ndarray:
+        """Return an array of optimistic bounds, one for each row in <rows>,
+        such that for any way of splitting <rows> into groups whose sizes are
+        in <sizes>, score_rows gives each group at most the sum of the bounds
+        of its rows.
+
+        The pair values (Criterion.pair_values) of every question whose
+        criterion has them are added up, weighted, and bounded together with
+        pair_mean_bounds, which is much tighter than bounding each question
+        on its own. The bounds of every other question, from
+        Criterion.member_bounds, are then added, weighted. Questions with a
+        negative weight can only lower the score of a group, so they add
+        nothing to the bounds.
+
+        Preconditions:
+            - len(rows) > 0
+            - <sizes> is non-empty and every size in it is > 0
+        """
+        bounds = np.zeros(len(rows))
+        if not self.questions:
+            return bounds
+
+        values = np.zeros((len(rows), len(rows)))
+        for col, question in enumerate(self.questions):
+            weight = self._survey.get_weight(question)
+            if weight <= 0:
+                continue
+            criterion = self._survey.get_criterion(question)
+            codes = self._valid_codes(col, rows)
+            try:
+                values += weight * criterion.pair_values(question, codes)
+            except NotImplementedError:
+                bounds += weight * criterion.member_bounds(question, codes,
+                                                           sizes)
+        bounds += pair_mean_bounds(values, sizes)
+        return bounds / len(self.questions)
+
+    def score_orders(self, orders: np.ndarray, group_size: int) -> np.ndarray:
+        """Return an array whose i-th entry is the average score of the groups
+        of rows made by slicing <orders>[i] into groups of size <group_size>,
+        as grouper.slice_list does.
+
+        Preconditions:
+            - orders.ndim == 2 and orders.shape[1] > 0
+            - group_size > 0
+        """
+        full = orders.shape[1] // group_size
+        end = full * group_size
+        columns = []
+        if full > 0:
+            columns.append(self.score_group_array(
+                orders[:, :end].reshape(-1, group_size)).reshape(-1, full))
+        if end < orders.shape[1]:
+            columns.append(self.score_group_array(orders[:, end:])[:, None])
+        scores = np.hstack(columns)
+        return scores.sum(axis=1) / scores.shape[1]
+
+    def pair_similarities(self, col: int, rows: list[int]) -> np.ndarray:
+        """Return the cached similarities of every pair of distinct rows in
+        <rows> for the question at position <col> of <self>.questions,
+        building the cache for that question first if needed.
+
+        Preconditions:
+            - Similarity caching is turned on for this answer matrix
+            - <rows> contains no duplicates
+        """
+        if col not in self._similarities:
+            self._similarities[col] = self._build_similarities(col)
+
+        ordered = np.sort(np.asarray(rows))
+        first, second = np.triu_indices(len(ordered), 1)
+        first, second = ordered[first], ordered[second]
+        n = len(self.students)
+        index = first * (2 * n - first - 1) // 2 + second - first - 1
+        return self._similarities[col][index]
+
+    def _build_similarities(self, col: int) -> np.ndarray:
+        """Return the upper triangle of the matrix of similarities between
+        every pair of rows for the question at position <col> of
+        <self>.questions, in row-major order.
+
+        Rows with an invalid answer are given a similarity of 0.0; they are
+        never read, since groups containing them score 0.0.
+        """
+        question = self.questions[col]
+        codes = self._codes[col]
+        valid = self._valid[:, col]
+        n = len(self.students)
+        result = np.zeros(n * (n - 1) // 2, dtype=np.float32)
+
+        start = 0
+        for row in range(n - 1):
+            end = start + n - row - 1
+            if valid[row]:
+                others = np.flatnonzero(valid[row + 1:]) + row + 1
+                similarities = question.similarity_matrix(codes[row:row + 1],
+                                                          codes[others])
+                result[start + others - row - 1] = similarities[0]
+            start = end
+
+        return result
+
+    def group_state(self, rows: list[int]) -> GroupState:
+        """Return a GroupState that scores the group of students in <rows>
+        and can be updated as students join and leave the group.
+
+        Preconditions:
+            - len(rows) > 0
+        """
+        return GroupState(self, rows)
+
+    def total_score(self, groups: list[list[int]]) -> float:
+        """Return the average score of the groups of rows in <groups>.
+
+        This is the row-based equivalent of grouper.total_score.
+
+        Preconditions:
+            - len(groups) > 0
+        """
+        return sum(self.score_rows(group) for group in groups) / len(groups)
+
+
+class GroupState:
+    """The score of a group of rows in an AnswerMatrix, kept up to date as
+    rows join and leave the group.
+
+    Each question is scored by the CriterionState of its criterion, so adding,
+    removing or swapping one member costs O(k) per question for a group of k
+    members instead of rescoring every pair. Questions whose criterion cannot
+    make a CriterionState are rescored in full.
+
+    The criteria and weights of the survey are read when this state is
+    created; changing them afterwards does not affect this state.
+
+    === Public Attributes ===
+    rows: the rows in this group
+
+    === Private Attributes ===
+    _matrix: the answer matrix that the rows belong to
+    _states: the state of each question in _matrix.questions, in order. Each
+        state holds the codes of the rows with a valid answer to its question,
+        or the rows themselves if its criterion is rescored in full.
+    _by_row: _by_row[q] is True iff _states[q] holds rows rather than codes
+    _weights: the weight of each question in _matrix.questions, in order
+    _invalid: the number of rows in this group with at least one invalid
+        answer
+
+    === Representation Invariants ===
+    len(rows) > 0
+    len(_states) == len(_by_row) == len(_weights) == len(_matrix.questions)
+    """
+    rows: list[int]
+    _matrix: AnswerMatrix
+    _states: list[CriterionState]
+    _by_row: list[bool]
+    _weights: list[int]
+    _invalid: int
+
+    def __init__(self, matrix: AnswerMatrix, rows: list[int]) -> None:
+        """Initialize the state of the group of <rows> in <matrix>.
+
+        Preconditions:
+            - len(rows) > 0
+        """
+        self.rows = list(rows)
+        self._matrix = matrix
+        self._states = []
+        self._by_row = []
+        self._weights = []
+        self._invalid = sum(1 for row in rows if not matrix._valid[row].all())
+
+        for col, question in enumerate(matrix.questions):
+            criterion = matrix._survey.get_criterion(question)
+            valid = [row for row in rows if matrix._valid[row, col]]
+            try:
+                codes = matrix._codes[col][np.asarray(valid, dtype=int)]
+                state = criterion.make_state(question, codes)
+                self._by_row.append(False)
+            except NotImplementedError:
+                state = _RescoringState(matrix, col, valid)
+                self._by_row.append(True)
+            self._states.append(state)
+            self._weights.append(matrix._survey.get_weight(question))
+
+    def __len__(self) -> int:
+        """Return the number of rows in this group."""
+        return len(self.rows)
+
+    def score(self) -> float:
+        """Return the score of this group, which is the same score that
+        AnswerMatrix.score_rows gives to <self>.rows.
+        """
+        return self.score_after()
+
+    def score_after(self, added: Optional[int] = None,
+                    removed: Optional[int] = None) -> float:
+        """Return the score this group would have if row <added> joined it
+        and row <removed> left it. Either may be None. This group is not
+        changed.
+
+        Preconditions:
+            - <added> is None or is not in this group
+            - <removed> is None or is in this group
+            - The group would still contain at least one row
+        """
+        invalid = self._invalid
+        if added is not None and not self._matrix._valid[added].all():
+            invalid += 1
+        if removed is not None and not self._matrix._valid[removed].all():
+            invalid -= 1
+        if invalid > 0 or not self._states:
+            return 0.0
+
+        total = 0.0
+        for col, state in enumerate(self._states):
+            score = state.score_after(self._item(col, added),
+                                      self._item(col, removed))
+            total += score * self._weights[col]
+        return total / len(self._states)
+
+    def score_change(self, added: Optional[int] = None,
+                     removed: Optional[int] = None) -> float:
+        """Return how much the score of this group would change if row
+        <added> joined it and row <removed> left it. Either may be None.
+
+        Preconditions:
+            - <added> is None or is not in this group
+            - <removed> is None or is in this group
+            - The group would still contain at least one row
+        """
+        return self.score_after(added, removed) - self.score()
+
+    def add(self, row: int) -> None:
+        """Add <row> to this group.
+
+        Preconditions:
+            - <row> is not in this group
+        """
+        self.rows.append(row)
+        if not self._matrix._valid[row].all():
+            self._invalid += 1
+        for col, state in enumerate(self._states):
+            item = self._item(col, row)
+            if item is not None:
+                state.add(item)
+
+    def remove(self, row: int) -> None:
+        """Remove <row> from this group.
+
+        Preconditions:
+            - <row> is in this group
+            - len(self) > 1
+        """
+        self.rows.remove(row)
+        if not self._matrix._valid[row].all():
+            self._invalid -= 1
+        for col, state in enumerate(self._states):
+            item = self._item(col, row)
+            if item is not None:
+                state.remove(item)
+
+    def _item(self, col: int, row: Optional[int]) -> Optional[Any]:
+        """Return what the state of the question at position <col> holds for
+        <row>: the row itself, its code, or None if <row> is None or has no
+        valid answer to that question.
+        """
+        if row is None or not self._matrix._valid[row, col]:
+            return None
+        if self._by_row[col]:
+            return row
+        return self._matrix._codes[col][row]
+
+
+class GreedyScorer:
+    """Scores of adding each row of an AnswerMatrix to a group that is built up
+    one row at a time, as in the greedy grouping algorithm.
+
+    Each question keeps an AdditionScorer for its criterion, so adding a member
+    to the group costs O(n) per question for n rows, and scoring every
+    candidate costs the same. Questions whose criterion cannot make an
+    AdditionScorer are scored with score_additions instead.
+
+    The scores are the same as those that AnswerMatrix.score_many gives to
+    the group and each candidate, up to rounding, so best_row breaks near
+    ties by scoring the tied rows again with AnswerMatrix.score_rows.
+
+    === Private Attributes ===
+    _matrix: the answer matrix whose rows are scored
+    _scorers: the AdditionScorer of each question in _matrix.questions, or None
+        for questions that are scored with score_additions
+    _weights: the weight of each question in _matrix.questions, in order
+    _members: the rows in the group, in the order they were added
+    _candidates_valid: _candidates_valid[r] is True iff row r has a valid
+        answer to every question
+    """
+    _matrix: AnswerMatrix
+    _scorers: list[Optional[AdditionScorer]]
+    _weights: list[int]
+    _members: list[int]
+    _candidates_valid: np.ndarray
+
+    def __init__(self, matrix: AnswerMatrix) -> None:
+        """Initialize a scorer for an empty group of rows of <matrix>."""
+        self._matrix = matrix
+        self._members = []
+        self._candidates_valid = matrix._valid.all(axis=1)
+        self._scorers = []
+        self._weights = []
+
+        for col, question in enumerate(matrix.questions):
+            criterion = matrix._survey.get_criterion(question)
+            try:
+                scorer = criterion.make_addition_scorer(
+                    question, matrix._valid_codes(col))
+            except NotImplementedError:
+                scorer = None
+            self._scorers.append(scorer)
+            self._weights.append(matrix._survey.get_weight(question))
+
+    def add(self, row: int) -> None:
+        """Add <row> to the group."""
+        self._members.append(row)
+        for scorer in self._scorers:
+            if scorer is not None:
+                scorer.add(row)
+
+    def clear(self) -> None:
+        """Remove every row from the group."""
+        self._members = []
+        for scorer in self._scorers:
+            if scorer is not None:
+                scorer.clear()
+
+    def set_members(self, rows: list[int]) -> None:
+        """Make the group the rows in <rows>, added in order.
+
+        If the rows already in the group are the first rows of <rows>, only
+        the rest are added, so a scorer can follow a group as it grows.
+        """
+        if self._members != rows[:len(self._members)]:
+            self.clear()
+        for row in rows[len(self._members):]:
+            self.add(row)
+
+    def scores(self) -> np.ndarray:
+        """Return an array whose entry r is the score of the group together
+        with row r. Entries for rows that are already in the group are
+        meaningless.
+
+        Preconditions:
+            - The group is not empty
+        """
+        matrix = self._matrix
+        scores = np.zeros(len(matrix))
+        members = np.asarray(self._members, dtype=int)
+        if not matrix.questions or not matrix._valid[members].all():
+            return scores
+
+        valid = self._candidates_valid
+        candidates = np.flatnonzero(valid)
+        for col, question in enumerate(matrix.questions):
+            scorer = self._scorers[col]
+            if scorer is not None:
+                column = scorer.scores()[valid]
+            else:
+                column = matrix.score_many_column(col, self._members,
+                                                  candidates)
+            scores[valid] += column * self._weights[col]
+
+        return scores / len(matrix.questions)
+
+    def score_rows(self, rows: np.ndarray) -> np.ndarray:
+        """Return an array whose i-th entry is the score of the group together
+        with row <rows>[i]. These are exactly the same numbers as
+        self.scores()[<rows>], but only <rows> are scored.
+
+        Preconditions:
+            - The group is not empty
+            - No row in <rows> is in the group, and <rows> has no duplicates
+        """
+        matrix = self._matrix
+        scores = np.zeros(len(rows))
+        members = np.asarray(self._members, dtype=int)
+        if not matrix.questions or not matrix._valid[members].all():
+            return scores
+
+        valid = self._candidates_valid[rows]
+        candidates = rows[valid]
+        for col, scorer in enumerate(self._scorers):
+            if scorer is not None:
+                column = scorer.score_candidates(candidates)
+            else:
+                column = matrix.score_many_column(col, self._members,
+                                                  candidates)
+            scores[valid] += column * self._weights[col]
+
+        return scores / len(matrix.questions)
+
+    def best_row(self, rows: np.ndarray, scores: np.ndarray) -> int:
+        """Return the first row in <rows> among those that give the group the
+        highest score, where <scores>[i] is the score of <rows>[i], as given
+        by scores or score_rows, or -inf for a row that is not a candidate.
+        Near ties are broken exactly, as in AnswerMatrix.best_addition.
+
+        Preconditions:
+            - The group is not empty
+            - len(rows) == len(scores) > 0
+            - Some entry of <scores> is not -inf
+            - No row in <rows> whose score is not -inf is in the group
+        """
+        return int(rows[self._matrix.best_addition(self._members, rows,
+                                                   scores)])
+
+    def bounds(self) -> np.ndarray:
+        """Return an array whose entry r is at least self.scores()[r], computed
+        without bringing any running total up to date.
+
+        Raise NotImplementedError if the criterion of some question cannot
+        bound its scores.
+
+        Preconditions:
+            - The group is not empty
+        """
+        matrix = self._matrix
+        bounds = np.zeros(len(matrix))
+        members = np.asarray(self._members, dtype=int)
+        if any(scorer is None for scorer in self._scorers):
+            raise NotImplementedError
+        if not matrix.questions or not matrix._valid[members].all():
+            return bounds
+
+        valid = self._candidates_valid
+        for col, scorer in enumerate(self._scorers):
+            bounds[valid] += scorer.bounds()[valid] * self._weights[col]
+
+        return bounds / len(matrix.questions)
+
+
+class _RescoringState(CriterionState):
+    """The score of a group of rows for one question of an AnswerMatrix, for
+    criteria that cannot score a group incrementally. Every score is computed
+    by rescoring the whole group.
+
+    === Private Attributes ===
+    _matrix: the answer matrix that the rows belong to
+    _col: the position of the question in _matrix.questions
+    _rows: the rows in this group
+    """
+    _matrix: AnswerMatrix
+    _col: int
+    _rows: list[int]
+
+    def __init__(self, matrix: AnswerMatrix, col: int, rows: list[int]) -> None:
+        """Initialize the state of the group of <rows> for the question at
+        position <col> of <matrix>.questions.
+        """
+        self._matrix = matrix
+        self._col = col
+        self._rows = list(rows)
+
+    def __len__(self) -> int:
+        """Return the number of rows in this group."""
+        return len(self._rows)
+
+    def score_after(self, added: Optional[int] = None,
+                    removed: Optional[int] = None) -> float:
+        """Return the score this group would have if row <added> joined it
+        and row <removed> left it.
+        """
+        rows = self._rows[:]
+        if removed is not None:
+            rows.remove(removed)
+        if added is not None:
+            rows.append(added)
+        return self._matrix._score_column(self._col, rows, np.asarray(rows))
+
+    def add(self, row: int) -> None:
+        """Add <row> to this group."""
+        self._rows.append(row)
+
+    def remove(self, row: int) -> None:
+        """Remove <row> from this group."""
+        self._rows.remove(row)
+
+
+def tie_floor(best: float) -> float:
+    """Return the lowest score that may truly tie with the score <best> when
+    both are computed from running sums.
+    """
+    return best - _TIE_SLACK * max(1.0, abs(best))
+
+
+def near_best(scores: np.ndarray) -> np.ndarray:
+    """Return the positions of the entries of <scores> that may truly tie with
+    the highest one when they are computed from running sums, in increasing
+    order.
+
+    Preconditions:
+        - Some entry of <scores> is not -inf
+    """
+    return np.flatnonzero(scores >= tie_floor(float(scores.max())))
+
+
+def _scores_similarities(criterion: Criterion) -> bool:
+    """Return True iff <criterion> can be scored from pairwise similarities,
+    i.e. its class overrides Criterion.score_similarities.
+    """
+    return type(criterion).score_similarities \
+        is not Criterion.score_similarities
+
+
+if __name__ == '__main__':
+    import python_ta
+
+    python_ta.check_all(config={'extra-imports': ['typing',
+                                                  'numpy',
+                                                  'criterion',
+                                                  'course',
+                                                  'survey'],
+                                'disable': ['E9992']})
@@ -0,0 +1,357 @@
+"""CSC148 Assignment 1
+
+=== CSC148 Winter 2023 ===
+Department of Computer Science,
+University of Toronto
+
+This code is provided solely for the personal and private use of
+students taking the CSC148 course at the University of Toronto.
+Copying for purposes other than this use is expressly prohibited.
+All forms of distribution of this code, whether as given or with
+any changes, are expressly prohibited.
+
+Authors: Misha Schwartz, Mario Badr, Christine Murad, Diane Horton,
+Sophia Huynh, Jaisie Sin, Tom Ginsberg, Jonathan Calver, and Jacqueline Smith
+
+All of the files in this directory and all subdirectories are:
+Copyright (c) 2023 Misha Schwartz, Mario Badr, Diane Horton, Sophia Huynh,
+Jonathan Calver, and Jacqueline Smith
+
+=== Module Description ===
+
+This file contains classes that describe how the temperature of simulated
+annealing changes from one iteration to the next (cooling schedules), and a
+class that decides when simulated annealing should stop early.
+"""
+from __future__ import annotations
+from typing import Optional
+
+# The lowest temperature of an AdaptiveCooling schedule, so that a run that
+# starts at, or cools down to, temperature 0 can still warm up again
+_MIN_TEMPERATURE = 1e-6
+
+
+class CoolingSchedule:
+    """An abstract class representing a cooling schedule, which gives the
+    temperature of each iteration of one run of simulated annealing.
+
+    A schedule is restarted at the beginning of every run, so the same
+    schedule can be used for many runs.
+    """
+
+    def start(self, initial_temperature: float, iterations: int) -> None:
+        """Restart this schedule for a run of <iterations> iterations that
+        begins with temperature <initial_temperature>.
+
+        Preconditions:
+            - initial_temperature >= 0
+            - iterations > 0
+        """
+        raise NotImplementedError
+
+    def temperature(self, iteration: int) -> float:
+        """Return the temperature of iteration number <iteration> of the
+        current run. Iterations are numbered from 0, and are asked for in
+        order.
+        """
+        raise NotImplementedError
+
+    def record(self, accepted: bool) -> None:
+        """Record whether the swap of the last iteration was <accepted>.
+
+        Schedules whose temperatures do not depend on which swaps were
+        accepted do not override this method.
+        """
+
+
+class LinearCooling(CoolingSchedule):
+    """A cooling schedule whose temperature falls in a straight line from the
+    initial temperature at iteration 0 to (almost) 0 at the last iteration.
+
+    This is the schedule described in the Grouping Algorithms document.
+
+    === Private Attributes ===
+    _initial_temperature: the temperature of the first iteration
+    _iterations: the number of iterations in the current run
+    """
+    _initial_temperature: float
+    _iterations: int
+
+    def __init__(self) -> None:
+        """Initialize a linear cooling schedule."""
+        self._initial_temperature = 0.0
+        self._iterations = 1
+
+    def start(self, initial_temperature: float, iterations: int) -> None:
+        """Restart this schedule for a run of <iterations> iterations that
+        begins with temperature <initial_temperature>.
+        """
+        self._initial_temperature = initial_temperature
+        self._iterations = iterations
+
+    def temperature(self, iteration: int) -> float:
+        """Return the initial temperature times the fraction of the run that
+        has not happened yet.
+        """
+        return self._initial_temperature * (1 - iteration / self._iterations)
+
+
+class GeometricCooling(CoolingSchedule):
+    """A cooling schedule whose temperature is multiplied by the same factor
+    at every iteration.
+
+    === Private Attributes ===
+    _factor: the number the temperature is multiplied by at every iteration
+    _initial_temperature: the temperature of the first iteration
+
+    === Representation Invariants ===
+    0 < _factor < 1
+    """
+    _factor: float
+    _initial_temperature: float
+
+    def __init__(self, factor: float = 0.999) -> None:
+        """Initialize a geometric cooling schedule that multiplies the
+        temperature by <factor> at every iteration.
+
+        Preconditions:
+            - 0 < factor < 1
+        """
+        self._factor = factor
+        self._initial_temperature = 0.0
+
+    def start(self, initial_temperature: float, iterations: int) -> None:
+        """Restart this schedule for a run that begins with temperature
+        <initial_temperature>.
+        """
+        self._initial_temperature = initial_temperature
+
+    def temperature(self, iteration: int) -> float:
+        """Return the initial temperature times self._factor to the power of
+        <iteration>.
+        """
+        return self._initial_temperature * self._factor ** iteration
+
+
+class AdaptiveCooling(CoolingSchedule):
+    """A cooling schedule that adjusts the temperature after every window of
+    iterations so that the fraction of swaps that are accepted moves towards
+    a target that falls linearly to 0 over the run.
+
+    If more swaps were accepted in the last window than the target, the
+    temperature is multiplied by <factor>; otherwise it is divided by it.
+    The temperature never falls below _MIN_TEMPERATURE, since a
+    temperature of 0 would stay 0 however it is multiplied or divided.
+
+    === Private Attributes ===
+    _initial_acceptance: the target fraction of accepted swaps at the
+        beginning of the run
+    _window: the number of iterations between adjustments
+    _factor: the number the temperature is multiplied or divided by
+    _iterations: the number of iterations in the current run
+    _current: the current temperature
+    _accepted: the number of swaps accepted in the current window
+    _seen: the number of iterations recorded in the current run
+
+    === Representation Invariants ===
+    0 < _initial_acceptance <= 1
+    _window > 0
+    0 < _factor < 1
+    _current >= _MIN_TEMPERATURE
+    """
+    _initial_acceptance: float
+    _window: int
+    _factor: float
+    _iterations: int
+    _current: float
+    _accepted: int
+    _seen: int
+
+    def __init__(self, initial_acceptance: float = 0.5, window: int = 100,
+                 factor: float = 0.9) -> None:
+        """Initialize an adaptive cooling schedule that aims for a fraction
+        <initial_acceptance> of accepted swaps at the beginning of a run, and
+        adjusts the temperature by <factor> every <window> iterations.
+
+        Preconditions:
+            - 0 < initial_acceptance <= 1
+            - window > 0
+            - 0 < factor < 1
+        """
+        self._initial_acceptance = initial_acceptance
+        self._window = window
+        self._factor = factor
+        self._iterations = 1
+        self._current = _MIN_TEMPERATURE
+        self._accepted = 0
+        self._seen = 0
+
+    def start(self, initial_temperature: float, iterations: int) -> None:
+        """Restart this schedule for a run of <iterations> iterations that
+        begins with temperature <initial_temperature>, or with
+        _MIN_TEMPERATURE if <initial_temperature> is lower.
+        """
+        self._iterations = iterations
+        self._current = max(initial_temperature, _MIN_TEMPERATURE)
+        self._accepted = 0
+        self._seen = 0
+
+    def temperature(self, iteration: int) -> float:
+        """Return the current temperature."""
+        return self._current
+
+    def record(self, accepted: bool) -> None:
+        """Record whether the swap of the last iteration was <accepted>, and
+        adjust the temperature at the end of every window.
+        """
+        self._seen += 1
+        if accepted:
+            self._accepted += 1
+        if self._seen % self._window != 0:
+            return
+
+        target = self._initial_acceptance * (1 - self._seen / self._iterations)
+        if self._accepted / self._window > target:
+            self._current = max(self._current * self._factor,
+                                _MIN_TEMPERATURE)
+        else:
+            self._current /= self._factor
+        self._accepted = 0
+
+
+class ReheatingCooling(CoolingSchedule):
+    """A cooling schedule that splits a run into cycles of equal length and
+    cools linearly within each cycle, starting each cycle at a lower
+    temperature than the last.
+
+    === Private Attributes ===
+    _cycles: the number of cycles in a run
+    _decay: the number the starting temperature of each cycle is multiplied by
+        to get the starting temperature of the next one
+    _initial_temperature: the temperature of the first iteration
+    _cycle_length: the number of iterations in each cycle of the current run
+
+    === Representation Invariants ===
+    _cycles >= 1
+    0 < _decay <= 1
+    _cycle_length >= 1
+    """
+    _cycles: int
+    _decay: float
+    _initial_temperature: float
+    _cycle_length: int
+
+    def __init__(self, cycles: int = 4, decay: float = 0.5) -> None:
+        """Initialize a reheating schedule with <cycles> cycles per run, where
+        each cycle starts at <decay> times the starting temperature of the
+        one before.
+
+        Preconditions:
+            - cycles >= 1
+            - 0 < decay <= 1
+        """
+        self._cycles = cycles
+        self._decay = decay
+        self._initial_temperature = 0.0
+        self._cycle_length = 1
+
+    def start(self, initial_temperature: float, iterations: int) -> None:
+        """Restart this schedule for a run of <iterations> iterations that
+        begins with temperature <initial_temperature>.
+        """
+        self._initial_temperature = initial_temperature
+        self._cycle_length = max(1, -(-iterations // self._cycles))
+
+    def temperature(self, iteration: int) -> float:
+        """Return the temperature of <iteration>, which falls linearly within
+        its cycle from that cycle's starting temperature.
+        """
+        cycle, position = divmod(iteration, self._cycle_length)
+        peak = self._initial_temperature * self._decay ** cycle
+        return peak * (1 - position / self._cycle_length)
+
+
+class EarlyStop:
+    """A rule for stopping a run of simulated annealing before all of its
+    iterations are done.
+
+    A run stops once the best score has not improved for <patience>
+    iterations, or once fewer than a fraction <min_acceptance> of the swaps in
+    a window of <window> iterations were accepted. Either test can be turned
+    off by setting <patience> to None or <min_acceptance> to 0.
+
+    === Public Attributes ===
+    patience: the number of iterations without a new best score after which
+        a run stops, or None to never stop because of this
+    min_acceptance: the fraction of swaps in a window that must be accepted
+        for a run to keep going
+    window: the number of iterations over which the fraction of accepted
+        swaps is measured
+
+    === Private Attributes ===
+    _last_improvement: the iteration at which the best score last improved
+    _accepted: the number of swaps accepted in the current window
+    _seen: the number of iterations recorded in the current run
+
+    === Representation Invariants ===
+    patience is None or patience > 0
+    0 <= min_acceptance <= 1
+    window > 0
+    """
+    patience: Optional[int]
+    min_acceptance: float
+    window: int
+    _last_improvement: int
+    _accepted: int
+    _seen: int
+
+    def __init__(self, patience: Optional[int] = None,
+                 min_acceptance: float = 0.0, window: int = 1000) -> None:
+        """Initialize a rule that stops a run after <patience> iterations
+        without a new best score, or after a window of <window> iterations in
+        which less than a fraction <min_acceptance> of swaps were accepted.
+
+        Preconditions:
+            - patience is None or patience > 0
+            - 0 <= min_acceptance <= 1
+            - window > 0
+        """
+        self.patience = patience
+        self.min_acceptance = min_acceptance
+        self.window = window
+        self._last_improvement = 0
+        self._accepted = 0
+        self._seen = 0
+
+    def start(self) -> None:
+        """Restart this rule for a new run."""
+        self._last_improvement = 0
+        self._accepted = 0
+        self._seen = 0
+
+    def should_stop(self, accepted: bool, improved: bool) -> bool:
+        """Record that the swap of the next iteration was <accepted> and that
+        the best score was <improved> by it, and return True iff the run
+        should stop after this iteration.
+        """
+        self._seen += 1
+        if improved:
+            self._last_improvement = self._seen
+        if accepted:
+            self._accepted += 1
+
+        if self.patience is not None \
+                and self._seen - self._last_improvement >= self.patience:
+            return True
+        if self._seen % self.window == 0:
+            rate = self._accepted / self.window
+            self._accepted = 0
+            return rate < self.min_acceptance
+        return False
+
+
+if __name__ == '__main__':
+    import python_ta
+
+    python_ta.check_all(config={'extra-imports': ['typing'],
+                                'disable': ['E9992']})
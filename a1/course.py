@@ -22,7 +22,10 @@ This file contains classes that describe a university course and the students
 who are enrolled in these courses.
 """
 from __future__ import annotations
-from typing import TYPE_CHECKING, Optional
+from itertools import count
+from typing import TYPE_CHECKING, Optional, Sequence
+
+import numpy as np
 
 if TYPE_CHECKING:
     from survey import Answer, Survey, Question
@@ -53,6 +56,28 @@ def sort_students(lst: list[Student], attribute: str) -> list[Student]:
     return sorted(lst, key=lambda student: getattr(student, attribute))
 
 
+def answer_validity(students: Sequence[Student], survey: Survey) -> np.ndarray:
+    """Return a boolean array whose entry [s, q] is True iff <students>[s] has
+    a valid answer for the q-th question returned by <survey>.get_questions().
+
+    Every answer is validated at most once, no matter how many times this
+    function or Student.has_answer is called, until it is replaced.
+    """
+    questions = survey.get_questions()
+    validity = np.zeros((len(students), len(questions)), dtype=bool)
+
+    for row, student in enumerate(students):
+        for col, question in enumerate(questions):
+            validity[row, col] = student.has_answer(question)
+
+    return validity
+
+
+# Gives out the revisions of Student answers. It is shared by all students so
+# that no two recorded answers ever have the same revision.
+_ANSWER_REVISIONS = count(1)
+
+
 class Student:
     """A Student who can be enrolled in a university course.
 
@@ -63,20 +88,38 @@ class Student:
     === Private Attributes ===
     _q_ans_dict: a dictionary where keys are id's for Questions and the
     value is the students answer to the question with respective id.
+    _valid_answers: a dictionary where keys are id's for Questions whose
+    answer in _q_ans_dict has already been validated, and the value is the
+    Question object it was validated against and True iff that answer is
+    valid for that Question.
+    _revision: the revision of the last answer recorded for this student, or
+    0 if none has been; it changes whenever any of this student's answers
+    change, and is never the revision of any other student's answers.
+    _answer_revisions: a dictionary where keys are id's for Questions in
+    _q_ans_dict, and the value is what _revision was right after the answer
+    to that question was last recorded.
 
     === Representation Invariants ===
     name is not the empty string
+    Every key in _valid_answers is a key in _q_ans_dict
+    _answer_revisions has the same keys as _q_ans_dict
     """
 
     id: int
     name: str
     _q_ans_dict: {int: Answer}
+    _valid_answers: {int: tuple[Question, bool]}
+    _revision: int
+    _answer_revisions: {int: int}
 
     def __init__(self, id_: int, name: str) -> None:
         """Initialize a student with name <name> and id <id>"""
         self.id = id_
         self.name = name
         self._q_ans_dict = {}
+        self._valid_answers = {}
+        self._revision = 0
+        self._answer_revisions = {}
 
     def __str__(self) -> str:
         """Return the name of this student """
@@ -85,10 +128,22 @@ class Student:
     def has_answer(self, question: Question) -> bool:
         """Return True iff this student has an answer for a question with the
         same id as <question> and that answer is a valid answer for <question>.
+
+        Each answer is only validated the first time this method is called
+        for it with <question>; the result is remembered until the answer is
+        replaced or it is checked against a different Question object with
+        the same id.
         """
-        # below is incomplete need to check validity of the answer later
-        return question.id in self._q_ans_dict
-        # and self._q_ans_dict[question.id].is_valid() or something
+        if question.id not in self._q_ans_dict:
+            return False
+
+        validated = self._valid_answers.get(question.id)
+        if validated is None or validated[0] is not question:
+            answer = self._q_ans_dict[question.id]
+            validated = (question, answer.is_valid(question))
+            self._valid_answers[question.id] = validated
+
+        return validated[1]
 
     def set_answer(self, question: Question, answer: Answer) -> None:
         """Record this student's answer <answer> to the question <question>.
@@ -97,6 +152,27 @@ class Student:
         replace it with <answer>.
         """
         self._q_ans_dict[question.id] = answer
+        self._valid_answers.pop(question.id, None)
+        self._revision = next(_ANSWER_REVISIONS)
+        self._answer_revisions[question.id] = self._revision
+
+    def get_revision(self) -> int:
+        """Return a number that increases every time one of this student's
+        answers is recorded or replaced.
+
+        Revisions are shared by all students: two students that have recorded
+        an answer never have the same revision, even if they have the same
+        id. A student that has not recorded any answer has revision 0.
+        """
+        return self._revision
+
+    def changed_questions(self, revision: int) -> set[int]:
+        """Return the ids of the questions whose answers have been recorded or
+        replaced since get_revision returned <revision>.
+        """
+        return {question_id
+                for question_id, answered in self._answer_revisions.items()
+                if answered > revision}
 
     def get_answer(self, question: Question) -> Optional[Answer]:
         """Return this student's answer to the question <question>.
@@ -155,14 +231,14 @@ class Course:
         """Return True iff all the students enrolled in this course have a
         valid answer for every question in <survey>.
         """
-        result = True
+        return bool(self.answer_validity(survey).all())
 
-        for student in self.students:
-            for question in survey:
-                if not student.has_answer(question):
-                    return False
-
-        return result
+    def answer_validity(self, survey: Survey) -> np.ndarray:
+        """Return a boolean array whose entry [s, q] is True iff the s-th
+        student returned by self.get_students() has a valid answer for the
+        q-th question returned by <survey>.get_questions().
+        """
+        return answer_validity(self.get_students(), survey)
 
     def get_students(self) -> tuple[Student]:
         """Return a tuple of all students enrolled in this course.
@@ -178,5 +254,6 @@ class Course:
 if __name__ == '__main__':
     import python_ta
 
-    python_ta.check_all(config={'extra-imports': ['typing', 'survey'],
+    python_ta.check_all(config={'extra-imports': ['typing', 'numpy', 'survey',
+                                                  'itertools'],
                                 'disable': ['E9992']})
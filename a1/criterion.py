@@ -23,12 +23,19 @@ This file contains classes that describe different types of criteria used to
 evaluate a group of answers to a survey question.
 """
 from __future__ import annotations
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Any, Optional
+
+import numpy as np
 
 if TYPE_CHECKING:
     from survey import Question, Answer
 
 
+# The amount added to upper bounds on scores so that rounding errors can never
+# make a bound smaller than the score it bounds.
+_BOUND_SLACK = 1e-9
+
+
 class InvalidAnswerError(Exception):
     """Error that should be raised when an answer is invalid for a given
     question.
@@ -52,6 +59,650 @@ class Criterion:
         """
         raise NotImplementedError
 
+    def score_valid_answers(self, question: Question,
+                            answers: list[Answer]) -> float:
+        """Return the same score as score_answers, for <answers> that are
+        already known to be valid answers to <question>.
+
+        Implementations may skip validating <answers>. By default this method
+        just calls score_answers.
+
+        Preconditions:
+            - len(answers) > 0
+            - Every answer in <answers> is a valid answer to <question>
+        """
+        return self.score_answers(question, answers)
+
+    def score_codes(self, question: Question, codes: np.ndarray) -> float:
+        """Return the same score as score_answers would for the answers that
+        are encoded as <codes> by <question>.encode_answer.
+
+        Criteria that cannot score encoded answers raise NotImplementedError,
+        in which case callers must fall back to score_answers.
+
+        Preconditions:
+            - len(codes) > 0
+            - Every element of <codes> encodes a valid answer to <question>
+        """
+        raise NotImplementedError
+
+    def score_additions(self, question: Question, codes: np.ndarray,
+                        candidates: np.ndarray) -> np.ndarray:
+        """Return an array whose i-th entry is the score that score_codes
+        would give to the answers encoded as <codes> together with the answer
+        encoded as <candidates>[i].
+
+        By default each candidate group is scored separately with
+        score_codes; criteria override this method to score all of the
+        candidate groups at once.
+
+        Preconditions:
+            - Every element of <codes> and <candidates> encodes a valid answer
+              to <question>
+        """
+        return np.array([self.score_codes(question, np.append(codes, candidate))
+                         for candidate in candidates], dtype=float)
+
+    def score_swaps(self, question: Question, first: np.ndarray,
+                    second: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """Return two arrays whose entries [i, j] are the scores that
+        score_codes would give to the answers encoded as <first> and as
+        <second> after <first>[i] and <second>[j] are swapped.
+
+        If <first> and <second> have the same leading dimensions, each pair
+        of groups along the last dimension is scored separately, and the
+        arrays have entries [..., i, j].
+
+        By default each row of the first array and each column of the second
+        is scored with one call to score_additions; criteria override this
+        method to score every swap at once.
+
+        Preconditions:
+            - first.shape[-1] > 0 and second.shape[-1] > 0
+            - Every element of <first> and <second> encodes a valid answer to
+              <question>
+        """
+        if first.ndim > 1:
+            scores = [self.score_swaps(question, group_1, group_2)
+                      for group_1, group_2 in zip(first, second)]
+            return np.array([new_1 for new_1, _ in scores]), \
+                np.array([new_2 for _, new_2 in scores])
+
+        first_scores = np.array([
+            self.score_additions(question, np.delete(first, i), second)
+            for i in range(len(first))])
+        second_scores = np.array([
+            self.score_additions(question, np.delete(second, j), first)
+            for j in range(len(second))]).T
+        return first_scores, second_scores
+
+    def score_code_groups(self, question: Question,
+                          codes: np.ndarray) -> np.ndarray:
+        """Return an array whose i-th entry is the score that score_codes
+        would give to the answers encoded as <codes>[i], where each row of
+        <codes> is one group.
+
+        By default each group is scored separately with score_codes;
+        criteria override this method to score all of the groups at once.
+
+        Preconditions:
+            - codes.ndim == 2 and codes.shape[1] > 0
+            - Every element of <codes> encodes a valid answer to <question>
+        """
+        return np.array([self.score_codes(question, group) for group in codes],
+                        dtype=float)
+
+    def member_bounds(self, question: Question, codes: np.ndarray,
+                      sizes: list[int]) -> np.ndarray:
+        """Return an array of optimistic bounds, one for each answer encoded in
+        <codes>, such that for any way of splitting those answers into groups
+        whose sizes are in <sizes>, score_codes gives each group at most the
+        sum of the bounds of its answers.
+
+        By default the bounds come from pair_values with pair_mean_bounds, or
+        if this criterion has no pair values, every answer is given 1 / s for
+        the smallest size s in <sizes>, which is enough since every score is at
+        most 1.0. Criteria override this method to give tighter bounds.
+
+        Preconditions:
+            - <sizes> is non-empty and every size in it is > 0
+            - Every element of <codes> encodes a valid answer to <question>
+        """
+        try:
+            return pair_mean_bounds(self.pair_values(question, codes), sizes)
+        except NotImplementedError:
+            return np.full(len(codes), 1 / min(sizes))
+
+    def pair_values(self, question: Question, codes: np.ndarray) -> np.ndarray:
+        """Return an array whose entry [i, j] is the value of the pair of
+        answers encoded as <codes>[i] and <codes>[j], where the score that
+        score_codes gives to two or more answers is the average value of
+        their pairs of distinct answers, and the score of one answer is 0.0.
+
+        Criteria whose scores are not averages over pairs raise
+        NotImplementedError.
+
+        Preconditions:
+            - Every element of <codes> encodes a valid answer to <question>
+        """
+        raise NotImplementedError
+
+    def score_similarities(self, similarities: np.ndarray) -> float:
+        """Return the same score as score_answers would for a group of at
+        least two valid answers whose pairwise similarities are <similarities>,
+        with one entry for each pair of distinct answers in the group.
+
+        Criteria whose score does not depend only on the pairwise similarities
+        of the answers do not override this method.
+
+        Preconditions:
+            - len(similarities) > 0
+        """
+        raise NotImplementedError
+
+    def make_addition_scorer(self, question: Question,
+                             codes: np.ndarray) -> AdditionScorer:
+        """Return an AdditionScorer for an initially empty group that answers
+        from <codes> join one at a time.
+
+        Criteria that cannot keep running totals for every candidate raise
+        NotImplementedError, in which case callers must use score_additions
+        after every change to the group.
+
+        Preconditions:
+            - Every element of <codes> encodes a valid answer to <question>
+        """
+        raise NotImplementedError
+
+    def make_state(self, question: Question,
+                   codes: np.ndarray) -> CriterionState:
+        """Return a CriterionState that scores the group of answers encoded as
+        <codes> by <question>.encode_answer, and that can be updated as answers
+        join and leave the group.
+
+        Criteria that cannot score a group incrementally raise
+        NotImplementedError, in which case callers must rescore the whole
+        group after every change.
+
+        Preconditions:
+            - len(codes) > 0
+            - Every element of <codes> encodes a valid answer to <question>
+        """
+        raise NotImplementedError
+
+
+class CriterionState:
+    """An abstract class representing the score of a group of encoded answers
+    according to some criterion, kept up to date as answers join and leave the
+    group.
+
+    Each implementation of this abstract class keeps whatever running totals
+    its criterion needs so that a change to the group can be scored without
+    rescoring the whole group.
+    """
+
+    def __len__(self) -> int:
+        """Return the number of answers in this group."""
+        raise NotImplementedError
+
+    def score(self) -> float:
+        """Return the score of the answers currently in this group."""
+        return self.score_after()
+
+    def score_after(self, added: Optional[Any] = None,
+                    removed: Optional[Any] = None) -> float:
+        """Return the score this group would have if the answer encoded as
+        <added> joined it and the answer encoded as <removed> left it. Either
+        may be None. This group is not changed.
+
+        Preconditions:
+            - <removed> is None or is the code of an answer in this group
+            - The group would still contain at least one answer
+        """
+        raise NotImplementedError
+
+    def add(self, code: Any) -> None:
+        """Add the answer encoded as <code> to this group."""
+        raise NotImplementedError
+
+    def remove(self, code: Any) -> None:
+        """Remove one answer encoded as <code> from this group.
+
+        Preconditions:
+            - <code> is the code of an answer in this group
+        """
+        raise NotImplementedError
+
+
+class PairwiseSimilarityState(CriterionState):
+    """The score of a group of encoded answers according to a homogeneous or
+    heterogeneous criterion, kept up to date by maintaining the sum of the
+    similarities of every pair of answers in the group.
+
+    Adding or removing one answer costs O(k) for a group of k answers.
+
+    === Private Attributes ===
+    _question: the question the answers are for
+    _codes: the encoded answers in this group
+    _total: the sum of the similarities of every pair of distinct answers in
+        this group
+    _heterogeneous: True iff the score is 1.0 minus the average similarity
+        rather than the average similarity
+
+    === Representation Invariants ===
+    len(_codes) > 0
+    """
+    _question: Question
+    _codes: list[Any]
+    _total: float
+    _heterogeneous: bool
+
+    def __init__(self, question: Question, codes: np.ndarray,
+                 heterogeneous: bool) -> None:
+        """Initialize the state of the group of answers to <question> encoded
+        as <codes>. If <heterogeneous> is True, score the group like a
+        HeterogeneousCriterion; otherwise like a HomogeneousCriterion.
+
+        Preconditions:
+            - len(codes) > 0
+        """
+        self._question = question
+        self._codes = list(codes)
+        self._heterogeneous = heterogeneous
+        similarities = question.similarity_matrix(np.asarray(codes))
+        self._total = float(similarities.sum() - similarities.trace()) / 2
+
+    def __len__(self) -> int:
+        """Return the number of answers in this group."""
+        return len(self._codes)
+
+    def score_after(self, added: Optional[Any] = None,
+                    removed: Optional[Any] = None) -> float:
+        """Return the score this group would have if the answer encoded as
+        <added> joined it and the answer encoded as <removed> left it.
+
+        Preconditions:
+            - <removed> is None or is the code of an answer in this group
+            - The group would still contain at least one answer
+        """
+        total = self._total
+        others = self._codes
+        if removed is not None:
+            others = _without(others, removed)
+            total -= self._similarity_sum(removed, others)
+        if added is not None:
+            total += self._similarity_sum(added, others)
+            others = others + [added]
+
+        n = len(others)
+        if n < 2:
+            return 0.0
+        mean = total / (n * (n - 1) / 2)
+        return 1.0 - mean if self._heterogeneous else mean
+
+    def add(self, code: Any) -> None:
+        """Add the answer encoded as <code> to this group."""
+        self._total += self._similarity_sum(code, self._codes)
+        self._codes.append(code)
+
+    def remove(self, code: Any) -> None:
+        """Remove one answer encoded as <code> from this group.
+
+        Preconditions:
+            - <code> is the code of an answer in this group
+        """
+        self._codes = _without(self._codes, code)
+        self._total -= self._similarity_sum(code, self._codes)
+
+    def _similarity_sum(self, code: Any, others: list[Any]) -> float:
+        """Return the sum of the similarities between the answer encoded as
+        <code> and each answer encoded in <others>.
+        """
+        if not others:
+            return 0.0
+        return float(self._question.similarity_matrix(np.array([code]),
+                                                      np.array(others)).sum())
+
+
+class AnswerCountState(CriterionState):
+    """The score of a group of encoded answers according to a
+    LonelyMemberCriterion, kept up to date by counting how many times each
+    answer occurs in the group.
+
+    Adding or removing one answer costs O(1).
+
+    === Private Attributes ===
+    _counts: a dictionary mapping each code in this group to the number of
+        answers in this group with that code
+    _size: the number of answers in this group
+    _unique: the number of codes that occur exactly once in this group
+
+    === Representation Invariants ===
+    _size == sum(_counts.values())
+    _unique == the number of values in _counts equal to 1
+    Every value in _counts is greater than 0
+    """
+    _counts: dict[Any, int]
+    _size: int
+    _unique: int
+
+    def __init__(self, codes: np.ndarray) -> None:
+        """Initialize the state of the group of answers encoded as <codes>.
+        """
+        self._counts = {}
+        self._size = 0
+        self._unique = 0
+        for code in codes:
+            self.add(code)
+
+    def __len__(self) -> int:
+        """Return the number of answers in this group."""
+        return self._size
+
+    def score_after(self, added: Optional[Any] = None,
+                    removed: Optional[Any] = None) -> float:
+        """Return the score this group would have if the answer encoded as
+        <added> joined it and the answer encoded as <removed> left it.
+
+        Preconditions:
+            - <removed> is None or is the code of an answer in this group
+            - The group would still contain at least one answer
+        """
+        if removed is not None:
+            self.remove(removed)
+        if added is not None:
+            self.add(added)
+
+        score = 0.0 if self._size < 2 or self._unique > 0 else 1.0
+
+        if added is not None:
+            self.remove(added)
+        if removed is not None:
+            self.add(removed)
+        return score
+
+    def add(self, code: Any) -> None:
+        """Add the answer encoded as <code> to this group."""
+        count = self._counts.get(code, 0) + 1
+        self._counts[code] = count
+        self._size += 1
+        if count == 1:
+            self._unique += 1
+        elif count == 2:
+            self._unique -= 1
+
+    def remove(self, code: Any) -> None:
+        """Remove one answer encoded as <code> from this group.
+
+        Preconditions:
+            - <code> is the code of an answer in this group
+        """
+        count = self._counts[code] - 1
+        self._size -= 1
+        if count == 0:
+            del self._counts[code]
+            self._unique -= 1
+        else:
+            self._counts[code] = count
+            if count == 1:
+                self._unique += 1
+
+
+class AdditionScorer:
+    """An abstract class that scores adding each of a fixed list of candidate
+    answers to a group, while the group is built up from those candidates one
+    answer at a time.
+
+    Each implementation of this abstract class keeps a running total for every
+    candidate, so that scoring every candidate never requires looking at every
+    member again.
+    """
+
+    def add(self, index: int) -> None:
+        """Add the candidate answer at position <index> to the group."""
+        raise NotImplementedError
+
+    def clear(self) -> None:
+        """Remove every answer from the group."""
+        raise NotImplementedError
+
+    def scores(self) -> np.ndarray:
+        """Return an array whose i-th entry is the score of the group together
+        with the candidate answer at position i, or 0.0 for every candidate if
+        the group is empty.
+
+        Entries for candidates that are already in the group are meaningless.
+        """
+        raise NotImplementedError
+
+    def score_candidates(self, indices: np.ndarray) -> np.ndarray:
+        """Return an array whose i-th entry is the score of the group together
+        with the candidate answer at position <indices>[i]. These are exactly
+        the same numbers as self.scores()[<indices>].
+
+        Subclasses may override this method with a way of scoring some
+        candidates that does not score every other candidate.
+        """
+        return self.scores()[indices]
+
+    def bounds(self) -> np.ndarray:
+        """Return an array whose i-th entry is at least the i-th entry of
+        self.scores(), computed without bringing any running total up to date.
+
+        Scorers that cannot bound their scores raise NotImplementedError, in
+        which case callers must use scores().
+        """
+        raise NotImplementedError
+
+
+class PairwiseAdditionScorer(AdditionScorer):
+    """An AdditionScorer for homogeneous and heterogeneous criteria, which keeps
+    the sum of the similarities between each candidate and the members of the
+    group.
+
+    The sums are brought up to date lazily: the sum of a candidate only
+    includes the members that joined before it was last scored. Scoring every
+    candidate costs O(n) per member that joined since the last time, for n
+    candidates, and scoring a single candidate costs O(1) per such member.
+
+    === Private Attributes ===
+    _question: the question the answers are for
+    _codes: the encoded candidate answers
+    _members: the positions of the members of the group, in the order they
+        joined
+    _sums: _sums[i] is the sum of the similarities between the i-th candidate
+        and the first _seen[i] members in _members, added in that order
+    _seen: _seen[i] is the number of members included in _sums[i]
+    _total: the sum of the similarities of every pair of members of the group
+    _heterogeneous: True iff the score is 1.0 minus the average similarity
+        rather than the average similarity
+
+    === Representation Invariants ===
+    0 <= _seen[i] <= len(_members) for every candidate i
+    """
+    _question: Question
+    _codes: np.ndarray
+    _members: list[int]
+    _sums: np.ndarray
+    _seen: np.ndarray
+    _total: float
+    _heterogeneous: bool
+
+    def __init__(self, question: Question, codes: np.ndarray,
+                 heterogeneous: bool) -> None:
+        """Initialize a scorer for an empty group drawing answers to <question>
+        from <codes>. If <heterogeneous> is True, score groups like a
+        HeterogeneousCriterion; otherwise like a HomogeneousCriterion.
+        """
+        self._question = question
+        self._codes = codes
+        self._heterogeneous = heterogeneous
+        self.clear()
+
+    def add(self, index: int) -> None:
+        """Add the candidate answer at position <index> to the group."""
+        self._catch_up(np.array([index]))
+        self._total += float(self._sums[index])
+        self._members.append(index)
+
+    def clear(self) -> None:
+        """Remove every answer from the group."""
+        self._members = []
+        self._sums = np.zeros(len(self._codes))
+        self._seen = np.zeros(len(self._codes), dtype=int)
+        self._total = 0.0
+
+    def scores(self) -> np.ndarray:
+        """Return an array whose i-th entry is the score of the group together
+        with the candidate answer at position i.
+        """
+        size = len(self._members)
+        if size == 0:
+            return np.zeros(len(self._codes))
+
+        for position in range(int(self._seen.min()), size):
+            member = self._members[position]
+            similarities = self._question.similarity_matrix(
+                self._codes, self._codes[member:member + 1])[:, 0]
+            behind = self._seen <= position
+            if behind.all():
+                self._sums += similarities
+            else:
+                self._sums[behind] += similarities[behind]
+        self._seen[:] = size
+
+        return self._mean_to_score((self._total + self._sums)
+                                   / (size * (size + 1) / 2))
+
+    def score_candidates(self, indices: np.ndarray) -> np.ndarray:
+        """Return an array whose i-th entry is the score of the group together
+        with the candidate answer at position <indices>[i], bringing only the
+        sums of those candidates up to date.
+        """
+        size = len(self._members)
+        if size == 0:
+            return np.zeros(len(indices))
+
+        self._catch_up(indices)
+        return self._mean_to_score((self._total + self._sums[indices])
+                                   / (size * (size + 1) / 2))
+
+    def bounds(self) -> np.ndarray:
+        """Return an array whose i-th entry is at least the score of the group
+        together with the candidate answer at position i.
+
+        Every similarity is between 0.0 and 1.0, so each member that a sum does
+        not include yet can add at most 1.0 to it.
+        """
+        size = len(self._members)
+        if size == 0:
+            return np.zeros(len(self._codes))
+
+        sums = self._sums
+        if not self._heterogeneous:
+            sums = sums + (size - self._seen) + _BOUND_SLACK
+        return self._mean_to_score((self._total + sums)
+                                   / (size * (size + 1) / 2))
+
+    def _catch_up(self, indices: np.ndarray) -> None:
+        """Add the similarities between the candidate answers at positions
+        <indices> and the members not yet included in their sums, one member
+        at a time in the order the members joined.
+
+        Preconditions:
+            - <indices> contains no duplicates
+        """
+        size = len(self._members)
+        seen = self._seen[indices]
+        if len(indices) == 0 or seen.min() == size:
+            return
+
+        for position in range(int(seen.min()), size):
+            member = self._members[position]
+            behind = indices[seen <= position]
+            self._sums[behind] += self._question.similarity_matrix(
+                self._codes[behind], self._codes[member:member + 1])[:, 0]
+        self._seen[indices] = size
+
+    def _mean_to_score(self, mean: Any) -> Any:
+        """Return the score of a group whose average pairwise similarity is
+        <mean>, which is a number or an array of numbers.
+        """
+        return 1.0 - mean if self._heterogeneous else mean
+
+
+class CountAdditionScorer(AdditionScorer):
+    """An AdditionScorer for LonelyMemberCriterion, which keeps the number of
+    members of the group that gave the same answer as each candidate.
+
+    Adding a member costs O(n) for n candidates.
+
+    === Private Attributes ===
+    _codes: the encoded candidate answers
+    _matches: _matches[i] is the number of members of the group whose answer
+        is the same as the i-th candidate's
+    _counts: a dictionary mapping each code in the group to the number of
+        members with that code
+    _unique: the number of codes that occur exactly once in the group
+    _size: the number of members in the group
+    """
+    _codes: np.ndarray
+    _matches: np.ndarray
+    _counts: dict[Any, int]
+    _unique: int
+    _size: int
+
+    def __init__(self, codes: np.ndarray) -> None:
+        """Initialize a scorer for an empty group drawing answers from
+        <codes>.
+        """
+        self._codes = codes
+        self.clear()
+
+    def add(self, index: int) -> None:
+        """Add the candidate answer at position <index> to the group."""
+        code = self._codes[index]
+        self._matches += self._codes == code
+        count = self._counts.get(code, 0) + 1
+        self._counts[code] = count
+        if count == 1:
+            self._unique += 1
+        elif count == 2:
+            self._unique -= 1
+        self._size += 1
+
+    def clear(self) -> None:
+        """Remove every answer from the group."""
+        self._matches = np.zeros(len(self._codes), dtype=int)
+        self._counts = {}
+        self._unique = 0
+        self._size = 0
+
+    def scores(self) -> np.ndarray:
+        """Return an array whose i-th entry is the score of the group together
+        with the candidate answer at position i.
+        """
+        if self._size == 0:
+            return np.zeros(len(self._codes))
+        unique = self._unique - (self._matches == 1) + (self._matches == 0)
+        return (unique == 0).astype(float)
+
+    def score_candidates(self, indices: np.ndarray) -> np.ndarray:
+        """Return an array whose i-th entry is the score of the group together
+        with the candidate answer at position <indices>[i].
+        """
+        if self._size == 0:
+            return np.zeros(len(indices))
+        matches = self._matches[indices]
+        unique = self._unique - (matches == 1) + (matches == 0)
+        return (unique == 0).astype(float)
+
+    def bounds(self) -> np.ndarray:
+        """Return the score of the group together with each candidate answer,
+        which this scorer always has up to date.
+        """
+        return self.scores()
+
 
 class HomogeneousCriterion(Criterion):
     """A criterion used to evaluate the quality of a group based on the group
@@ -84,15 +735,115 @@ class HomogeneousCriterion(Criterion):
         """
         check_valid_answers(question, answers)
 
+        return self.score_valid_answers(question, answers)
+
+    def score_valid_answers(self, question: Question,
+                            answers: list[Answer]) -> float:
+        """Return the same score as score_answers, without checking that
+        <answers> are valid answers to <question>.
+
+        Preconditions:
+            - len(answers) > 0
+            - Every answer in <answers> is a valid answer to <question>
+        """
         if len(answers) == 1:
             return 0.0
 
-        count = 0
-        listy = [(x, y) for i, x in enumerate(answers) for y in answers[i + 1:]]
-        for item in listy:
-            count += question.get_similarity(item[0], item[1])
+        return _mean_answer_similarity(question, answers)
 
-        return count / len(listy)
+    def score_codes(self, question: Question, codes: np.ndarray) -> float:
+        """Return the same score as score_answers would for the answers that
+        are encoded as <codes> by <question>.encode_answer.
+
+        Preconditions:
+            - len(codes) > 0
+            - Every element of <codes> encodes a valid answer to <question>
+        """
+        if len(codes) == 1:
+            return 0.0
+
+        return question.mean_similarity(codes)
+
+    def score_additions(self, question: Question, codes: np.ndarray,
+                        candidates: np.ndarray) -> np.ndarray:
+        """Return an array whose i-th entry is the score that score_codes
+        would give to the answers encoded as <codes> together with the answer
+        encoded as <candidates>[i].
+
+        Preconditions:
+            - Every element of <codes> and <candidates> encodes a valid answer
+              to <question>
+        """
+        return _mean_similarity_additions(question, codes, candidates)
+
+    def score_swaps(self, question: Question, first: np.ndarray,
+                    second: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """Return two arrays whose entries [i, j] are the scores that
+        score_codes would give to the answers encoded as <first> and as
+        <second> after <first>[i] and <second>[j] are swapped.
+
+        If <first> and <second> have the same leading dimensions, each pair
+        of groups along the last dimension is scored separately, as in
+        Criterion.score_swaps.
+
+        Preconditions:
+            - first.shape[-1] > 0 and second.shape[-1] > 0
+            - Every element of <first> and <second> encodes a valid answer to
+              <question>
+        """
+        return _mean_similarity_swaps(question, first, second)
+
+    def score_code_groups(self, question: Question,
+                          codes: np.ndarray) -> np.ndarray:
+        """Return an array whose i-th entry is the score that score_codes
+        would give to the answers encoded as <codes>[i], where each row of
+        <codes> is one group.
+
+        Preconditions:
+            - codes.ndim == 2 and codes.shape[1] > 0
+            - Every element of <codes> encodes a valid answer to <question>
+        """
+        return _mean_similarity_groups(question, codes)
+
+    def pair_values(self, question: Question, codes: np.ndarray) -> np.ndarray:
+        """Return an array whose entry [i, j] is the similarity between the
+        answers encoded as <codes>[i] and <codes>[j], since the score of a
+        group is the average similarity of its pairs of answers.
+
+        Preconditions:
+            - Every element of <codes> encodes a valid answer to <question>
+        """
+        return question.similarity_matrix(codes)
+
+    def score_similarities(self, similarities: np.ndarray) -> float:
+        """Return the same score as score_answers would for a group of at
+        least two valid answers whose pairwise similarities are <similarities>.
+
+        Preconditions:
+            - len(similarities) > 0
+        """
+        return float(similarities.mean(dtype=float))
+
+    def make_state(self, question: Question,
+                   codes: np.ndarray) -> CriterionState:
+        """Return a PairwiseSimilarityState that scores the group of answers
+        encoded as <codes> like this criterion does.
+
+        Preconditions:
+            - len(codes) > 0
+            - Every element of <codes> encodes a valid answer to <question>
+        """
+        return PairwiseSimilarityState(question, codes, False)
+
+    def make_addition_scorer(self, question: Question,
+                             codes: np.ndarray) -> AdditionScorer:
+        """Return a PairwiseAdditionScorer that scores groups like this
+        criterion does.
+
+        Preconditions:
+            - Every element of <codes> encodes a valid answer to <question>
+        """
+        return PairwiseAdditionScorer(question, codes, False)
 
 
 class HeterogeneousCriterion(Criterion):
@@ -126,15 +877,125 @@ class HeterogeneousCriterion(Criterion):
         """
         check_valid_answers(question, answers)
 
+        return self.score_valid_answers(question, answers)
+
+    def score_valid_answers(self, question: Question,
+                            answers: list[Answer]) -> float:
+        """Return the same score as score_answers, without checking that
+        <answers> are valid answers to <question>.
+
+        Preconditions:
+            - len(answers) > 0
+            - Every answer in <answers> is a valid answer to <question>
+        """
         if len(answers) == 1:
             return 0.0
 
-        count = 0
-        listy = [(x, y) for i, x in enumerate(answers) for y in answers[i + 1:]]
-        for item in listy:
-            count += question.get_similarity(item[0], item[1])
+        return 1.0 - _mean_answer_similarity(question, answers)
+
+    def score_codes(self, question: Question, codes: np.ndarray) -> float:
+        """Return the same score as score_answers would for the answers that
+        are encoded as <codes> by <question>.encode_answer.
+
+        Preconditions:
+            - len(codes) > 0
+            - Every element of <codes> encodes a valid answer to <question>
+        """
+        if len(codes) == 1:
+            return 0.0
+
+        return 1.0 - question.mean_similarity(codes)
+
+    def score_additions(self, question: Question, codes: np.ndarray,
+                        candidates: np.ndarray) -> np.ndarray:
+        """Return an array whose i-th entry is the score that score_codes
+        would give to the answers encoded as <codes> together with the answer
+        encoded as <candidates>[i].
+
+        Preconditions:
+            - Every element of <codes> and <candidates> encodes a valid answer
+              to <question>
+        """
+        if len(codes) == 0:
+            return np.zeros(len(candidates))
+
+        return 1.0 - _mean_similarity_additions(question, codes, candidates)
+
+    def score_swaps(self, question: Question, first: np.ndarray,
+                    second: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """Return two arrays whose entries [i, j] are the scores that
+        score_codes would give to the answers encoded as <first> and as
+        <second> after <first>[i] and <second>[j] are swapped.
+
+        If <first> and <second> have the same leading dimensions, each pair
+        of groups along the last dimension is scored separately, as in
+        Criterion.score_swaps.
+
+        Preconditions:
+            - first.shape[-1] > 0 and second.shape[-1] > 0
+            - Every element of <first> and <second> encodes a valid answer to
+              <question>
+        """
+        first_means, second_means = _mean_similarity_swaps(question, first,
+                                                           second)
+        return (np.zeros_like(first_means) if first.shape[-1] == 1
+                else 1.0 - first_means,
+                np.zeros_like(second_means) if second.shape[-1] == 1
+                else 1.0 - second_means)
+
+    def score_code_groups(self, question: Question,
+                          codes: np.ndarray) -> np.ndarray:
+        """Return an array whose i-th entry is the score that score_codes
+        would give to the answers encoded as <codes>[i], where each row of
+        <codes> is one group.
+
+        Preconditions:
+            - codes.ndim == 2 and codes.shape[1] > 0
+            - Every element of <codes> encodes a valid answer to <question>
+        """
+        if codes.shape[1] == 1:
+            return np.zeros(len(codes))
+        return 1.0 - _mean_similarity_groups(question, codes)
+
+    def pair_values(self, question: Question, codes: np.ndarray) -> np.ndarray:
+        """Return an array whose entry [i, j] is 1.0 minus the similarity
+        between the answers encoded as <codes>[i] and <codes>[j], since the
+        score of a group is the average of this over its pairs of answers.
+
+        Preconditions:
+            - Every element of <codes> encodes a valid answer to <question>
+        """
+        return 1.0 - question.similarity_matrix(codes)
+
+    def score_similarities(self, similarities: np.ndarray) -> float:
+        """Return the same score as score_answers would for a group of at
+        least two valid answers whose pairwise similarities are <similarities>.
+
+        Preconditions:
+            - len(similarities) > 0
+        """
+        return 1.0 - float(similarities.mean(dtype=float))
+
+    def make_state(self, question: Question,
+                   codes: np.ndarray) -> CriterionState:
+        """Return a PairwiseSimilarityState that scores the group of answers
+        encoded as <codes> like this criterion does.
+
+        Preconditions:
+            - len(codes) > 0
+            - Every element of <codes> encodes a valid answer to <question>
+        """
+        return PairwiseSimilarityState(question, codes, True)
+
+    def make_addition_scorer(self, question: Question,
+                             codes: np.ndarray) -> AdditionScorer:
+        """Return a PairwiseAdditionScorer that scores groups like this
+        criterion does.
 
-        return 1.0 - count / len(listy)
+        Preconditions:
+            - Every element of <codes> encodes a valid answer to <question>
+        """
+        return PairwiseAdditionScorer(question, codes, True)
 
 
 class LonelyMemberCriterion(Criterion):
@@ -155,10 +1016,11 @@ class LonelyMemberCriterion(Criterion):
 
         The score returned will be 0.0 iff there are any unique answers in
         <answers> and will be 1.0 otherwise. An answer is unique if there is
-        no other answer in <answers> with identical content. If there is only
-        one answer in <answers> and it is valid, return 0.0 since the student
-        with that answer is by definition the only one with that answer in the
-        group.
+        no other answer in <answers> with identical content. Two checkbox
+        answers have identical content if they chose the same options, in any
+        order. If there is only one answer in <answers> and it is valid, return
+        0.0 since the student with that answer is by definition the only one
+        with that answer in the group.
 
         Raise InvalidAnswerError if any answer in <answers> is not a valid
         answer to <question>.
@@ -168,21 +1030,312 @@ class LonelyMemberCriterion(Criterion):
         """
         check_valid_answers(question, answers)
 
+        return self.score_valid_answers(question, answers)
+
+    def score_valid_answers(self, question: Question,
+                            answers: list[Answer]) -> float:
+        """Return the same score as score_answers, without checking that
+        <answers> are valid answers to <question>.
+
+        Preconditions:
+            - len(answers) > 0
+            - Every answer in <answers> is a valid answer to <question>
+        """
         if len(answers) == 1:
             return 0.0
 
+        counts = {}
         for ans in answers:
-            count = 0
-            ans_cpy = answers[:]
-            ans_cpy.remove(ans)
-            for ans1 in ans_cpy:
-                if ans.content == ans1.content:
-                    count += 1
-            if count == 0:
-                return 0.0
+            key = _canonical_content(ans)
+            counts[key] = counts.get(key, 0) + 1
+
+        if 1 in counts.values():
+            return 0.0
 
         return 1.0
 
+    def score_codes(self, question: Question, codes: np.ndarray) -> float:
+        """Return the same score as score_answers would for the answers that
+        are encoded as <codes> by <question>.encode_answer.
+
+        Preconditions:
+            - len(codes) > 0
+            - Every element of <codes> encodes a valid answer to <question>
+        """
+        if len(codes) == 1:
+            return 0.0
+
+        if (question.answer_counts(codes) == 1).any():
+            return 0.0
+
+        return 1.0
+
+    def score_additions(self, question: Question, codes: np.ndarray,
+                        candidates: np.ndarray) -> np.ndarray:
+        """Return an array whose i-th entry is the score that score_codes
+        would give to the answers encoded as <codes> together with the answer
+        encoded as <candidates>[i].
+
+        Adding a candidate makes a unique answer in <codes> shared if it is
+        the same answer, and adds a unique answer otherwise.
+
+        Preconditions:
+            - Every element of <codes> and <candidates> encodes a valid answer
+              to <question>
+        """
+        if len(codes) == 0:
+            return np.zeros(len(candidates))
+
+        values, counts = np.unique(codes, return_counts=True)
+        positions = np.searchsorted(values, candidates)
+        positions = np.minimum(positions, len(values) - 1)
+        found = values[positions] == candidates
+        candidate_counts = np.where(found, counts[positions], 0)
+
+        unique = (counts == 1).sum() - (candidate_counts == 1) \
+            + (candidate_counts == 0)
+        return (unique == 0).astype(float)
+
+    def score_swaps(self, question: Question, first: np.ndarray,
+                    second: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """Return two arrays whose entries [i, j] are the scores that
+        score_codes would give to the answers encoded as <first> and as
+        <second> after <first>[i] and <second>[j] are swapped.
+
+        If <first> and <second> have the same leading dimensions, each pair
+        of groups along the last dimension is scored separately, as in
+        Criterion.score_swaps.
+
+        Preconditions:
+            - first.shape[-1] > 0 and second.shape[-1] > 0
+            - Every element of <first> and <second> encodes a valid answer to
+              <question>
+        """
+        return _shared_after_swaps(first, second), \
+            np.swapaxes(_shared_after_swaps(second, first), -1, -2)
+
+    def score_code_groups(self, question: Question,
+                          codes: np.ndarray) -> np.ndarray:
+        """Return an array whose i-th entry is the score that score_codes
+        would give to the answers encoded as <codes>[i], where each row of
+        <codes> is one group.
+
+        Preconditions:
+            - codes.ndim == 2 and codes.shape[1] > 0
+            - Every element of <codes> encodes a valid answer to <question>
+        """
+        if codes.shape[1] == 1:
+            return np.zeros(len(codes))
+        counts = (codes[:, :, None] == codes[:, None, :]).sum(axis=-1)
+        return (counts >= 2).all(axis=1).astype(float)
+
+    def member_bounds(self, question: Question, codes: np.ndarray,
+                      sizes: list[int]) -> np.ndarray:
+        """Return an array of optimistic bounds, one for each answer encoded in
+        <codes>, such that for any way of splitting those answers into groups
+        whose sizes are in <sizes>, score_codes gives each group at most the
+        sum of the bounds of its answers.
+
+        A group scores 1.0 only if it has at least two answers and none of
+        them is unique, so an answer that no other answer in <codes> is the
+        same as is given 0.0, and every other answer is given 1 / s for the
+        smallest size s > 1 in <sizes>.
+
+        Preconditions:
+            - <sizes> is non-empty and every size in it is > 0
+            - Every element of <codes> encodes a valid answer to <question>
+        """
+        shared = [size for size in sizes if size > 1]
+        if not shared:
+            return np.zeros(len(codes))
+        counts = (codes[:, None] == codes[None, :]).sum(axis=1)
+        return np.where(counts >= 2, 1 / min(shared), 0.0)
+
+    def make_state(self, question: Question,
+                   codes: np.ndarray) -> CriterionState:
+        """Return an AnswerCountState that scores the group of answers encoded
+        as <codes> like this criterion does.
+
+        Preconditions:
+            - len(codes) > 0
+            - Every element of <codes> encodes a valid answer to <question>
+        """
+        return AnswerCountState(codes)
+
+    def make_addition_scorer(self, question: Question,
+                             codes: np.ndarray) -> AdditionScorer:
+        """Return a CountAdditionScorer that scores groups like this criterion
+        does.
+
+        Preconditions:
+            - Every element of <codes> encodes a valid answer to <question>
+        """
+        return CountAdditionScorer(codes)
+
+
+def _canonical_content(answer: Answer) -> object:
+    """Return a hashable value that is equal for two answers iff they have
+    identical content.
+
+    The content of a list answer (to a CheckboxQuestion) is identified by the
+    set of options chosen, regardless of their order.
+    """
+    if isinstance(answer.content, list):
+        return frozenset(answer.content)
+    return answer.content
+
+
+def _without(codes: list[Any], code: Any) -> list[Any]:
+    """Return a copy of <codes> with the first occurrence of <code> removed.
+
+    Preconditions:
+        - <code> is in <codes>
+    """
+    result = codes[:]
+    result.remove(code)
+    return result
+
+
+def _mean_answer_similarity(question: Question, answers: list[Answer]) -> float:
+    """Return the average similarity of every pair of distinct answers in
+    <answers>.
+
+    The answers are encoded so that <question>.mean_similarity can use the
+    fastest method for its type of question. Answers to questions that cannot
+    be encoded are compared pair by pair instead.
+
+    Preconditions:
+        - len(answers) > 1
+        - Every answer in <answers> is a valid answer to <question>
+    """
+    try:
+        codes = np.array([question.encode_answer(answer) for answer in answers])
+    except NotImplementedError:
+        count = 0
+        listy = [(x, y) for i, x in enumerate(answers) for y in answers[i + 1:]]
+        for item in listy:
+            count += question.get_trusted_similarity(item[0], item[1])
+        return count / len(listy)
+
+    return question.mean_similarity(codes)
+
+
+def _mean_similarity_additions(question: Question, codes: np.ndarray,
+                               candidates: np.ndarray) -> np.ndarray:
+    """Return an array whose i-th entry is the average similarity of every
+    pair of distinct answers encoded as <codes> together with <candidates>[i],
+    or 0.0 if <codes> is empty.
+
+    The pairs within <codes> are only summed once; each candidate then adds
+    its similarity to every answer in <codes>.
+    """
+    k = len(codes)
+    if k == 0:
+        return np.zeros(len(candidates))
+
+    base_total = 0.0
+    if k > 1:
+        base_total = question.mean_similarity(codes) * k * (k - 1) / 2
+    added = question.similarity_matrix(candidates, codes).sum(axis=1)
+    return (base_total + added) / (k * (k + 1) / 2)
+
+
+def _mean_similarity_swaps(question: Question, first: np.ndarray,
+                           second: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Return two arrays whose entries [..., i, j] are the average similarities
+    of every pair of distinct answers encoded as <first> and as <second> after
+    <first>[..., i] and <second>[..., j] are swapped, or 0.0 for a group of
+    one answer.
+
+    Every similarity is computed once. Swapping <first>[i] for <second>[j]
+    removes the similarities between <first>[i] and the rest of <first>, and
+    adds those between <second>[j] and the rest of <first>.
+    """
+    k_1 = first.shape[-1]
+    similarities = question.similarity_matrix(
+        np.concatenate([first, second], axis=-1))
+    within_1 = similarities[..., :k_1, :k_1]
+    within_2 = similarities[..., k_1:, k_1:]
+    across = similarities[..., :k_1, k_1:]
+
+    own_1 = within_1.sum(axis=-1) - np.diagonal(within_1, axis1=-2, axis2=-1)
+    own_2 = within_2.sum(axis=-1) - np.diagonal(within_2, axis1=-2, axis2=-1)
+    totals_1 = own_1.sum(axis=-1)[..., None, None] / 2 - own_1[..., :, None] \
+        + (across.sum(axis=-2)[..., None, :] - across)
+    totals_2 = own_2.sum(axis=-1)[..., None, None] / 2 - own_2[..., None, :] \
+        + (across.sum(axis=-1)[..., :, None] - across)
+    return (_pair_means(totals_1, k_1),
+            _pair_means(totals_2, second.shape[-1]))
+
+
+def _mean_similarity_groups(question: Question,
+                            codes: np.ndarray) -> np.ndarray:
+    """Return an array whose i-th entry is the average similarity of every
+    pair of distinct answers encoded in the row <codes>[i], or 0.0 if the rows
+    have one answer each.
+    """
+    similarities = question.similarity_matrix(codes)
+    k = codes.shape[1]
+    first, second = np.triu_indices(k, 1)
+    return _pair_means(similarities[:, first, second].sum(axis=-1), k)
+
+
+def pair_mean_bounds(values: np.ndarray, sizes: list[int]) -> np.ndarray:
+    """Return an array whose i-th entry bounds the share of answer i in the
+    average value of the pairs of any group it could be in, where <values> is
+    the matrix of values of every pair of answers and every group has a size
+    in <sizes>. The bounds are as described in Criterion.member_bounds for a
+    criterion whose pair values are <values>.
+
+    The average value of the pairs of a group of size s is the sum, over its
+    answers, of the values of the pairs of that answer and each of the other
+    s - 1, divided by s * (s - 1). So answer i's share is at most the sum of
+    its s - 1 largest values with other answers, divided by s * (s - 1).
+
+    Preconditions:
+        - Every entry of <values> is >= 0
+    """
+    n = len(values)
+    others = np.where(np.eye(n, dtype=bool), -np.inf, values)
+    largest = np.cumsum(-np.sort(-others, axis=1), axis=1)
+    bounds = np.zeros(n)
+    for size in sizes:
+        if 1 < size <= n:
+            bounds = np.maximum(bounds,
+                                largest[:, size - 2] / (size * (size - 1)))
+    return bounds
+
+
+def _pair_means(totals: np.ndarray, k: int) -> np.ndarray:
+    """Return <totals> divided by the number of pairs of distinct answers in a
+    group of <k> answers, or zeros if <k> is 1.
+    """
+    if k == 1:
+        return np.zeros_like(totals)
+    return totals / (k * (k - 1) / 2)
+
+
+def _shared_after_swaps(group: np.ndarray, other: np.ndarray) -> np.ndarray:
+    """Return an array whose entry [..., i, j] is 1.0 iff every answer encoded
+    in <group> is the same as some other answer in it after <group>[..., i] is
+    replaced by <other>[..., j], and 0.0 otherwise. A group of one answer
+    always gives 0.0.
+    """
+    k = group.shape[-1]
+    if k == 1:
+        return np.zeros(group.shape + other.shape[-1:])
+
+    same = group[..., :, None] == group[..., None, :]
+    same_other = group[..., :, None] == other[..., None, :]
+    counts = same.sum(axis=-1)
+    # after[..., m, i, j] is how many answers in the group are the same as
+    # <group>[..., m] once <group>[..., i] is replaced by <other>[..., j]
+    after = counts[..., :, None, None] - same[..., :, :, None] \
+        + same_other[..., :, None, :]
+    shared = (after >= 2) | np.eye(k, dtype=bool)[:, :, None]
+    joined = same_other.sum(axis=-2)[..., None, :] - same_other + 1
+    return (shared.all(axis=-3) & (joined >= 2)).astype(float)
+
 
 def check_valid_answers(q: Question, answers: list[Answer]) -> None:
     """
@@ -202,6 +1355,7 @@ if __name__ == '__main__':
     import python_ta
 
     python_ta.check_all(config={'extra-imports': ['typing',
+                                                  'numpy',
                                                   'survey',
                                                   'E9992'],
                                 'disable': ['E9992']})
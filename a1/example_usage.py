@@ -162,8 +162,8 @@ def create_group_comparison_plot(groupers_: list[grouper.Grouper],
         print(f'\n{name} took {time() - t:.5f} seconds')
         groupings.append(grouping)
 
-    scores = [[survey_.score_students(g.get_members())
-               for g in grouping.get_groups()]
+    scores = [survey_.score_groups([g.get_members()
+                                    for g in grouping.get_groups()]).tolist()
               for grouping in groupings]
     total_scores = [sum(s) for s in scores]
     ordering = sorted(range(len(total_scores)), key=lambda k: total_scores[k])
@@ -28,15 +28,30 @@ from __future__ import annotations
 
 import math
 import random
-from copy import deepcopy
-from typing import TYPE_CHECKING, Any
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import combinations
+from typing import TYPE_CHECKING, Any, Callable, Iterable, Optional
 
+import numpy as np
+
+from answer_matrix import AnswerMatrix, GreedyScorer, GroupState, tie_floor
+from cooling import CoolingSchedule, EarlyStop, LinearCooling
+from moves import Move, MoveProposer, Swap
 from course import sort_students
 
 if TYPE_CHECKING:
     from survey import Survey
     from course import Course, Student
 
+# The number of candidates that a lazy GreedyGrouper scores first at each step
+_FIRST_BATCH = 128
+
+# The smallest increase in score that counts as an improvement when searching
+# for swaps, so that rounding errors cannot make a search go on forever
+_MIN_GAIN = 1e-9
+
 
 # Provided helper
 def slice_list(lst: list[Any], n: int) -> list[list[Any]]:
@@ -68,19 +83,17 @@ def find_best_addition_to_group(survey: Survey, members: list[Student],
                                 non_members: list[Student]) -> Student:
     """Find the best student in <non_members> to add to the group <members>,
     i.e., the student that increases the group's score the most (or decreases
-    it the least).
+    it the least). If several students tie, return the first of them.
+
+    Every candidate group is scored at once with <survey>.best_addition,
+    which breaks ties exactly as comparing the scores of
+    <survey>.score_students one student at a time would.
 
     Preconditions:
         - len(non_members) > 0
+        - No student in <non_members> is in <members>
     """
-    best_score = float('-inf')
-    best_student = None
-    for student in non_members:
-        score = survey.score_students(members + [student])
-        if score > best_score:
-            best_score = score
-            best_student = student
-    return best_student
+    return survey.best_addition(members, non_members)
 
 
 # Provided helper
@@ -108,6 +121,25 @@ def random_swap(lst: list[list[Any]], seed: int = 0) -> None:
     >>> l # After many swaps the order will be random
     [[7, 2, 8], [1, 5, 4], [3, 9, 6]]
     """
+    l_1, i_1, l_2, i_2 = random_swap_positions(lst, seed)
+    # swap the elements
+    _swap(lst, l_1, i_1, l_2, i_2)
+
+
+def random_swap_positions(lst: list[list[Any]], seed: int = 0
+                          ) -> tuple[int, int, int, int]:
+    """Return the positions (l_1, i_1, l_2, i_2) of the elements that
+    random_swap(<lst>, <seed>) swaps: lst[l_1][i_1] and lst[l_2][i_2].
+
+    <lst> is not changed.
+
+    Preconditions:
+        - len(lst) >= 2
+        - each sub list has length >= 1
+
+    >>> random_swap_positions([[1, 2, 3], [4, 5, 6], [7, 8, 9]], seed=0)
+    (1, 0, 2, 1)
+    """
     rnd = random.Random(seed)
     rng = range(len(lst))
     # find two distinct sub lists
@@ -115,8 +147,7 @@ def random_swap(lst: list[list[Any]], seed: int = 0) -> None:
     # find an element in each sub list
     i_1 = rnd.randint(0, len(lst[l_1]) - 1)
     i_2 = rnd.randint(0, len(lst[l_2]) - 1)
-    # swap the elements
-    lst[l_1][i_1], lst[l_2][i_2] = lst[l_2][i_2], lst[l_1][i_1]
+    return l_1, i_1, l_2, i_2
 
 
 # Provided helper
@@ -226,16 +257,19 @@ class Grouping:
 
     === Private Attributes ===
     _groups: a list of Groups
+    _member_ids: the ids of every student in a group in _groups
 
     === Representation Invariants ===
     No group in _groups contains zero members
     No student appears in more than one group in _groups
     """
     _groups: list[Group]
+    _member_ids: set[int]
 
     def __init__(self) -> None:
         """Initialize a Grouping that contains zero groups. """
         self._groups = []
+        self._member_ids = set()
 
     def __len__(self) -> int:
         """Return the number of groups in this grouping """
@@ -248,36 +282,23 @@ class Grouping:
 
         You can choose the precise format of this string.
         """
-        s = ""
-
-        for group in self._groups:
-            temp = ""
-            listy = group[:]
-            last_member = listy.pop()
-
-            for member in listy:
-                temp = temp + member.name + ", "
-
-            temp = temp + last_member.name + "\n"
-            s += temp
-
-        return s.rstrip()
+        return "\n".join(str(group) for group in self._groups)
 
     def add_group(self, group: Group) -> bool:
         """Add <group> to this grouping and return True iff the addition does
         not violate a representation invariant; otherwise leave this grouping
         unchanged and return False.
         """
-        if not group:
+        if len(group) == 0:
             return False
 
-        for member in group:
-            listy = group.remove(member)
-            for item in listy:
-                if item.id == member.id:
-                    return False
+        for member in group.get_members():
+            if member.id in self._member_ids:
+                return False
 
         self._groups.append(group)
+        self._member_ids.update(member.id for member in group.get_members())
+        return True
 
     def get_groups(self) -> list[Group]:
         """Return a list of all groups in this grouping.
@@ -288,6 +309,98 @@ class Grouping:
         return self._groups[:]
 
 
+class SearchStats:
+    """Statistics about one search for a grouping, which can be stopped at a
+    deadline and reported on after every iteration.
+
+    GreedyGrouper, the simulated annealing groupers, TabuGrouper,
+    GeneticGrouper, LocalSearchGrouper and BranchAndBoundGrouper take an
+    optional <deadline> and <progress> function in make_grouping. The search
+    checks the deadline before every iteration; once it has passed, the
+    search stops and the best complete grouping found so far is returned.
+    <progress> is called with these statistics after every iteration, and
+    the statistics of the last call to make_grouping are kept in the
+    grouper's <stats> attribute.
+
+    The deadline is a time, not a number of seconds, so that a search that
+    runs other searches first, like BranchAndBoundGrouper, can give them the
+    same deadline and still stop on time. To give a search a budget of b
+    seconds, pass time.monotonic() + b as its deadline.
+
+    What an iteration is depends on the grouper, and is described in its
+    make_grouping method.
+
+    === Public Attributes ===
+    deadline: the value of time.monotonic() at which the search stops, or
+        None to never stop early
+    iterations: the number of iterations done so far
+    best_score: the score of the best complete grouping found so far, or
+        None if none has been found yet
+    elapsed: the number of seconds from the start of the search to the last
+        iteration recorded, or to the end of the search once it has ended
+    timed_out: True iff the search stopped because the deadline passed
+
+    === Private Attributes ===
+    _start: the value of time.monotonic() when the search started
+    _progress: the function to call after every iteration, or None
+
+    === Representation Invariants ===
+    iterations >= 0
+    elapsed >= 0
+    """
+    deadline: Optional[float]
+    iterations: int
+    best_score: Optional[float]
+    elapsed: float
+    timed_out: bool
+    _start: float
+    _progress: Optional[Callable[[SearchStats], None]]
+
+    def __init__(self, deadline: Optional[float] = None,
+                 progress: Optional[Callable[[SearchStats], None]] = None
+                 ) -> None:
+        """Initialize the statistics of a search that starts now, stops at
+        <deadline> if it is not None, and calls <progress> after every
+        iteration if it is not None.
+        """
+        self.deadline = deadline
+        self.iterations = 0
+        self.best_score = None
+        self.elapsed = 0.0
+        self.timed_out = False
+        self._start = time.monotonic()
+        self._progress = progress
+
+    def out_of_time(self) -> bool:
+        """Return True iff the deadline has passed, in which case the search
+        stops.
+        """
+        if not self.timed_out and self.deadline is not None:
+            self.timed_out = time.monotonic() >= self.deadline
+        return self.timed_out
+
+    def record(self, best_score: Optional[float], iterations: int = 1) -> None:
+        """Record that <iterations> more iterations were done, after which
+        the best complete grouping found had score <best_score> (or none had
+        been found if <best_score> is None), and call the progress function.
+        """
+        self.iterations += iterations
+        if best_score is not None and (self.best_score is None
+                                       or best_score > self.best_score):
+            self.best_score = best_score
+        self.elapsed = time.monotonic() - self._start
+        if self._progress is not None:
+            self._progress(self)
+
+    def finish(self, score: float) -> None:
+        """Record that the search ended with a grouping whose score is
+        <score>. The progress function is not called again.
+        """
+        self.best_score = score
+        self.elapsed = time.monotonic() - self._start
+        self._progress = None
+
+
 class Grouper:
     """An abstract class representing a grouper used to create a grouping of
     students according to their answers to a survey.
@@ -351,7 +464,11 @@ class AlphaGrouper(Grouper):
         Preconditions:
             - <course> has more students than this Grouper's group_size
         """
-        # TODO: implement this method!
+        students = sort_students(list(course.get_students()), 'name')
+        grouping = Grouping()
+        for members in slice_list(students, self.group_size):
+            grouping.add_group(Group(members))
+        return grouping
 
 
 class GreedyGrouper(Grouper):
@@ -364,13 +481,56 @@ class GreedyGrouper(Grouper):
         This group size will never be exceeded by a grouper, but if the class
         doesn't divide evenly into groups, there may be one group that is
         smaller than group_size.
+    stats: the statistics of the last call to make_grouping
+
+    === Private Attributes ===
+    _lazy: True iff candidates are scored lazily, in order of an upper bound
+        on their scores, instead of all being scored at every step
+    _workers: the number of worker processes that candidates are scored in,
+        or 1 to score them in this process
 
     === Representation Invariants ===
     group_size > 1
+    _workers >= 1
     """
     group_size: int
+    stats: SearchStats
+    _lazy: bool
+    _workers: int
+
+    def __init__(self, group_size: int, lazy: bool = False,
+                 workers: int = 1) -> None:
+        """Initialize this greedy grouper to create groups of size
+        <group_size>.
+
+        If <lazy> is True, each step bounds the score of every candidate from
+        running totals that may be out of date, then scores candidates exactly
+        in order of decreasing bound until no remaining bound can beat the
+        best score found. The grouping is the same either way; lazy scoring is
+        faster when scoring a candidate exactly is expensive compared to
+        bounding it. Surveys with a criterion that cannot bound its scores are
+        always scored exhaustively.
+
+        If <workers> is more than 1, every candidate is scored at each step
+        (so <lazy> has no effect), split by row into <workers> ranges that are
+        scored in a pool of <workers> processes. Each worker process keeps its
+        own copy of the answers, so only the members of the group and the
+        placed rows of a range are sent to it. The scores, and so the
+        grouping, are exactly the same as in this process.
 
-    def make_grouping(self, course: Course, survey: Survey) -> Grouping:
+        Preconditions:
+            - group_size > 1
+            - workers >= 1
+        """
+        Grouper.__init__(self, group_size)
+        self.stats = SearchStats()
+        self._lazy = lazy
+        self._workers = workers
+
+    def make_grouping(self, course: Course, survey: Survey,
+                      deadline: Optional[float] = None,
+                      progress: Optional[Callable[[SearchStats], None]] = None
+                      ) -> Grouping:
         """Return a grouping for all students in <course>.
 
         Starting with a list of all students in <course> obtained by calling
@@ -393,10 +553,156 @@ class GreedyGrouper(Grouper):
         The final group created may have fewer than N members if that is
         required to make sure all students in <course> are members of a group.
 
+        Each group created is one iteration of the search, as described in
+        SearchStats, and no complete grouping is found until the last one. If
+        <deadline> passes first, the students that have not been placed are
+        put into groups in the order they are in the list.
+
         Preconditions:
             - <course> has more students than this Grouper's group_size
         """
-        # TODO: implement this method!
+        self.stats = SearchStats(deadline, progress)
+        matrix = AnswerMatrix(course.get_students(), survey)
+        if self._workers == 1:
+            scorer = GreedyScorer(matrix)
+            groups = self._group(matrix, lambda members, placed:
+                                 self._best_addition(scorer, members, placed))
+        else:
+            ranges = [part for part in np.array_split(
+                np.arange(len(matrix)), self._workers) if len(part)]
+            with ProcessPoolExecutor(self._workers,
+                                     initializer=_set_worker_matrix,
+                                     initargs=(matrix,)) as pool:
+                groups = self._group(
+                    matrix, lambda members, placed: _best_of_ranges(pool.map(
+                        _best_worker_addition, [members] * len(ranges),
+                        [np.packbits(placed[part]) for part in ranges],
+                        [int(part[0]) for part in ranges],
+                        [len(part) for part in ranges])))
+
+        self.stats.finish(matrix.total_score(groups))
+        return _rows_to_grouping(matrix, groups)
+
+    def _group(self, matrix: AnswerMatrix,
+               best_addition: Callable[[list[int], np.ndarray], int]
+               ) -> list[list[int]]:
+        """Return the groups of rows of <matrix> made by the greedy
+        algorithm, where best_addition(members, placed) returns the first row
+        that is not <placed> among those that score highest with the group of
+        rows <members>. Stop making groups when self.stats is out of time.
+        """
+        placed = np.zeros(len(matrix), dtype=bool)
+        remaining = len(matrix)
+        groups = []
+
+        # Rows are in the same order as <course>.get_students(), so the first
+        # unplaced row with the highest score is the student that
+        # find_best_addition_to_group would choose.
+        for first in range(len(matrix)):
+            if placed[first]:
+                continue
+            if self.stats.out_of_time():
+                unplaced = np.flatnonzero(~placed).tolist()
+                return groups + slice_list(unplaced, self.group_size)
+            members = [first]
+            placed[first] = True
+            remaining -= 1
+            while remaining and len(members) < self.group_size:
+                row = best_addition(members, placed)
+                members.append(row)
+                placed[row] = True
+                remaining -= 1
+            groups.append(members)
+            self.stats.record(None)
+
+        return groups
+
+    def _best_addition(self, scorer: GreedyScorer, members: list[int],
+                       placed: np.ndarray) -> int:
+        """Return the first row that is not <placed> among those with the
+        highest score with the group of rows <members>, scored by <scorer>
+        once its group is made <members>.
+
+        Preconditions:
+            - Not every row is <placed>
+        """
+        scorer.set_members(members)
+        if self._lazy:
+            try:
+                bounds = scorer.bounds()
+            except NotImplementedError:
+                pass
+            else:
+                return _best_bounded_row(scorer, bounds, placed)
+
+        return scorer.best_row(np.arange(len(placed)),
+                               np.where(placed, -np.inf, scorer.scores()))
+
+
+def _best_worker_addition(members: list[int], placed: np.ndarray,
+                          start: int, length: int) -> tuple[float, int]:
+    """Return (score, row) for the first row that is not placed among those
+    with the highest score with the group of rows <members>, out of the
+    <length> rows from row <start> on, using the answer matrix of this worker
+    process. Return (-inf, -1) if every one of those rows is placed.
+
+    The score returned is computed with AnswerMatrix.score_rows, so scores
+    from different ranges that truly tie are equal.
+
+    <placed> is packed with np.packbits, and its i-th bit is 1 iff row
+    <start> + i is placed.
+    """
+    if 'scorer' not in _WORKER_STATE:
+        _WORKER_STATE['scorer'] = GreedyScorer(_WORKER_STATE['matrix'])
+    scorer = _WORKER_STATE['scorer']
+    scorer.set_members(members)
+
+    rows = np.flatnonzero(np.unpackbits(placed, count=length) == 0) + start
+    if len(rows) == 0:
+        return -math.inf, -1
+    row = scorer.best_row(rows, scorer.score_rows(rows))
+    return _WORKER_STATE['matrix'].score_rows(members + [row]), row
+
+
+def _best_of_ranges(results: Iterable[tuple[float, int]]) -> int:
+    """Return the row of the first of <results> with the highest score, where
+    <results> are (score, row) pairs for ranges of rows in increasing order.
+    """
+    best_score, best_row = -math.inf, -1
+    for score, row in results:
+        if score > best_score:
+            best_score, best_row = score, row
+    return best_row
+
+
+def _best_bounded_row(scorer: GreedyScorer, bounds: np.ndarray,
+                      placed: np.ndarray) -> int:
+    """Return the first row that is not <placed> among those with the highest
+    score in <scorer>, where <bounds>[r] is at least the score of row r.
+
+    Rows are scored in batches in order of decreasing bound, doubling the
+    batch size each time, until the bound of the next row is too far below
+    the best score found so far to tie with it. Near ties are broken exactly
+    by GreedyScorer.best_row.
+
+    Preconditions:
+        - Not every row is <placed>
+    """
+    unplaced = np.flatnonzero(~placed)
+    order = unplaced[np.argsort(-bounds[unplaced], kind='stable')]
+    best_score = -np.inf
+    scores = []
+    start, batch = 0, _FIRST_BATCH
+    while start < len(order) \
+            and bounds[order[start]] >= tie_floor(best_score):
+        scores.append(scorer.score_rows(order[start:start + batch]))
+        best_score = max(best_score, float(scores[-1].max()))
+        start += batch
+        batch *= 2
+
+    by_row = np.argsort(order[:start])
+    return scorer.best_row(order[:start][by_row],
+                           np.concatenate(scores)[by_row])
 
 
 class SimulatedAnnealingGrouper(Grouper):
@@ -409,27 +715,70 @@ class SimulatedAnnealingGrouper(Grouper):
         This group size will never be exceeded by a grouper, but if the class
         doesn't divide evenly into groups, there may be one group that is
         smaller than group_size.
+    stats: the statistics of the last call to make_grouping
 
     === Private Attributes ===
-    TODO: Describe any private attributes you create here
+    _iterations: the number of iterations of simulated annealing to run
+    _initial_temperature: the temperature at the first iteration
+    _schedule: the cooling schedule that gives the temperature of each
+        iteration
+    _early_stop: the rule for stopping before all the iterations are done,
+        or None to always run every iteration
+    _proposer: the source of the move and acceptance test of each iteration
+    _incremental: True iff moves are scored with a GroupState per group, as
+        in an incremental AnnealingChain
 
     === Representation Invariants ===
-    TODO: Add any additional representation invariants here
     group_size > 1
+    _iterations > 0
+    _initial_temperature >= 0
     """
     group_size: int
+    stats: SearchStats
+    _iterations: int
+    _initial_temperature: float
+    _schedule: CoolingSchedule
+    _early_stop: Optional[EarlyStop]
+    _proposer: MoveProposer
+    _incremental: bool
 
     def __init__(self,
                  group_size: int,
                  iterations: int = 10 ** 4,
-                 initial_temperature: float = 1) -> None:
+                 initial_temperature: float = 1,
+                 schedule: Optional[CoolingSchedule] = None,
+                 early_stop: Optional[EarlyStop] = None,
+                 proposer: Optional[MoveProposer] = None,
+                 incremental: bool = False) -> None:
         """Initialize this simulated annealing grouper (that runs for
         <iterations> iterations and begins with temperature
         <intitial_temperature>) to create groups of size <group_size>.
-        """
-        # TODO: implement this method!
 
-    def make_grouping(self, course: Course, survey: Survey) -> Grouping:
+        The temperature of each iteration is given by <schedule>, which is a
+        LinearCooling schedule if <schedule> is None. If <early_stop> is not
+        None, annealing stops as soon as it says so. The move and acceptance
+        test of each iteration come from <proposer>, which is a
+        ReferenceProposer (random_swap and accept, as described in
+        make_grouping) if <proposer> is None. If <incremental> is True, the
+        chain is an incremental AnnealingChain.
+        """
+        Grouper.__init__(self, group_size)
+        self.stats = SearchStats()
+        self._iterations = iterations
+        self._initial_temperature = initial_temperature
+        if schedule is None:
+            schedule = LinearCooling()
+        self._schedule = schedule
+        self._early_stop = early_stop
+        if proposer is None:
+            proposer = ReferenceProposer()
+        self._proposer = proposer
+        self._incremental = incremental
+
+    def make_grouping(self, course: Course, survey: Survey,
+                      deadline: Optional[float] = None,
+                      progress: Optional[Callable[[SearchStats], None]] = None
+                      ) -> Grouping:
         """Group students in <course> using the Simulated Annealing algorithm.
 
         Here is the Simulated Annealing algorithm for creating a grouping.
@@ -481,18 +830,1580 @@ class SimulatedAnnealingGrouper(Grouper):
             - Iteration numbers go from 0 to (# iterations) - 1
             - Throughout the process, keep track of the best list of groups so
                 far
-            - To make a copy of the current list of groups (so that you can
-                do a random swap and compare the old and new versions)
-                use the <deepcopy> function we have imported for you.
-                <deepcopy> may also help for when a swap is not accepted.
+            - The list of groups is never copied. Each swap is made in
+                place and only the two groups it changes are rescored; a
+                swap that is not accepted is undone by swapping back. The
+                swaps accepted since the best list of groups was found are
+                undone at the end to recover it.
 
         Optional: To learn more about random seeding for repeatable results:
         https://en.wikipedia.org/wiki/Random_seed
 
+        Each iteration above is an iteration of the search described in
+        SearchStats. If <deadline> passes, the iterations stop there and the
+        best list of groups found so far is returned.
+
         Preconditions:
             - <course> has more students than this Grouper's group_size
         """
-        # TODO: implement this method!
+        self.stats = SearchStats(deadline, progress)
+        matrix = AnswerMatrix(course.get_students(), survey)
+        groups = slice_list(list(range(len(matrix))), self.group_size)
+        self.stats.finish(self._anneal(matrix, groups, 0, self.stats))
+        return _rows_to_grouping(matrix, groups)
+
+    def _anneal(self, matrix: AnswerMatrix, groups: list[list[int]],
+                seed_offset: int, stats: SearchStats) -> float:
+        """Run simulated annealing on the groups of rows of <matrix> in
+        <groups>, using <seed_offset> + i as the seed of iteration i, and
+        record each iteration in <stats> until it is out of time. Change
+        <groups> into the best list of groups found and return its score.
+
+        Preconditions:
+            - len(groups) >= 2
+        """
+        self._proposer.start(seed_offset)
+        chain = AnnealingChain(matrix, groups, self._proposer,
+                               self._incremental)
+        schedule, early_stop = self._schedule, self._early_stop
+        schedule.start(self._initial_temperature, self._iterations)
+        if early_stop is not None:
+            early_stop.start()
+
+        for i in range(self._iterations):
+            if stats.out_of_time():
+                break
+            best_score = chain.best_score
+            accepted = chain.step(matrix, seed_offset + i,
+                                  schedule.temperature(i))
+            schedule.record(accepted)
+            stats.record(chain.best_score)
+            if early_stop is not None and early_stop.should_stop(
+                    accepted, chain.best_score > best_score):
+                break
+        chain.restore_best(matrix)
+        return chain.best_score
+
+
+class MultiStartAnnealingGrouper(SimulatedAnnealingGrouper):
+    """A grouper that runs several independent chains of simulated annealing,
+    possibly in parallel worker processes, and keeps the best grouping found
+    by any of them.
+
+    Chain 0 starts from the same groups and uses the same seeds as
+    SimulatedAnnealingGrouper. Chain c > 0 starts from the students shuffled
+    with seed c, and uses seed c * <iterations> + i at iteration i.
+
+    The grouping depends only on the number of chains, not on the number of
+    worker processes or the order in which chains finish. If several chains
+    find equally good groupings, the one from the lowest-numbered chain is
+    returned.
+
+    === Public Attributes ===
+    group_size: the ideal number of students that should be in each group
+        This group size will never be exceeded by a grouper, but if the class
+        doesn't divide evenly into groups, there may be one group that is
+        smaller than group_size.
+    chain_scores: the score of the best grouping found by each chain in the
+        last call to make_grouping, in order of chain number
+    stats: the statistics of the last call to make_grouping
+
+    === Private Attributes ===
+    _iterations: the number of iterations of simulated annealing to run in
+        each chain
+    _initial_temperature: the temperature at the first iteration
+    _schedule: the cooling schedule that gives the temperature of each
+        iteration of each chain
+    _early_stop: the rule for stopping each chain before all the iterations
+        are done, or None to always run every iteration
+    _proposer: the source of the move and acceptance test of each iteration
+        of each chain
+    _incremental: True iff moves are scored with a GroupState per group, as
+        in an incremental AnnealingChain
+    _chains: the number of chains to run
+    _workers: the number of worker processes to run chains in, or 1 to run
+        every chain in this process
+
+    === Representation Invariants ===
+    group_size > 1
+    _iterations > 0
+    _initial_temperature >= 0
+    _chains >= 1
+    _workers >= 1
+    """
+    group_size: int
+    chain_scores: list[float]
+    stats: SearchStats
+    _iterations: int
+    _initial_temperature: float
+    _schedule: CoolingSchedule
+    _early_stop: Optional[EarlyStop]
+    _proposer: MoveProposer
+    _incremental: bool
+    _chains: int
+    _workers: int
+
+    def __init__(self,
+                 group_size: int,
+                 iterations: int = 10 ** 4,
+                 initial_temperature: float = 1,
+                 chains: int = 4,
+                 workers: int = 1,
+                 schedule: Optional[CoolingSchedule] = None,
+                 early_stop: Optional[EarlyStop] = None,
+                 proposer: Optional[MoveProposer] = None,
+                 incremental: bool = False) -> None:
+        """Initialize this grouper to run <chains> chains of simulated
+        annealing in <workers> worker processes, each for <iterations>
+        iterations beginning with temperature <initial_temperature>, to create
+        groups of size <group_size>.
+
+        Every chain uses <schedule>, <early_stop>, <proposer> and
+        <incremental> as described in SimulatedAnnealingGrouper. A proposer
+        that is not a ReferenceProposer is restarted with seed
+        c * <iterations> for chain c.
+        """
+        SimulatedAnnealingGrouper.__init__(self, group_size, iterations,
+                                           initial_temperature, schedule,
+                                           early_stop, proposer, incremental)
+        self.chain_scores = []
+        self._chains = chains
+        self._workers = workers
+
+    def make_grouping(self, course: Course, survey: Survey,
+                      deadline: Optional[float] = None,
+                      progress: Optional[Callable[[SearchStats], None]] = None
+                      ) -> Grouping:
+        """Return the best grouping of the students in <course> found by any
+        of the chains, and record the score of each chain in
+        self.chain_scores.
+
+        The iterations of every chain count towards self.stats, and every
+        chain stops at <deadline>, as in SimulatedAnnealingGrouper. When the
+        chains run in worker processes, <progress> is called once each chain
+        has finished, with all of its iterations.
+
+        Preconditions:
+            - <course> has more students than this Grouper's group_size
+        """
+        # <self> is sent to the worker processes, so the statistics (and so
+        # <progress>) are not put in self.stats until the search ends
+        stats = SearchStats(deadline, progress)
+        matrix = AnswerMatrix(course.get_students(), survey)
+        chains = range(self._chains)
+        if self._workers == 1:
+            results = [self._run_chain(matrix, chain, stats)
+                       for chain in chains]
+        else:
+            with ProcessPoolExecutor(self._workers) as pool:
+                results = list(pool.map(self._run_chain,
+                                        [matrix] * self._chains, chains,
+                                        [SearchStats(deadline)] * self._chains))
+            for score, _, chain_stats in results:
+                stats.timed_out |= chain_stats.timed_out
+                stats.record(score, chain_stats.iterations)
+
+        self.chain_scores = [score for score, _, _ in results]
+        best = int(np.argmax(self.chain_scores))
+        stats.finish(self.chain_scores[best])
+        self.stats = stats
+        return _rows_to_grouping(matrix, results[best][1])
+
+    def _run_chain(self, matrix: AnswerMatrix, chain: int, stats: SearchStats
+                   ) -> tuple[float, list[list[int]], SearchStats]:
+        """Run chain number <chain> on the rows of <matrix>, recording its
+        iterations in <stats>, and return the score of the best list of
+        groups it found, those groups and <stats>.
+        """
+        groups = _initial_groups(len(matrix), self.group_size, chain)
+        score = self._anneal(matrix, groups, chain * self._iterations, stats)
+        return score, groups, stats
+
+
+class ParallelTemperingGrouper(Grouper):
+    """A grouper that runs several chains of simulated annealing (replicas),
+    each at a fixed temperature from a ladder of temperatures, and regularly
+    exchanges the groups of replicas at neighbouring temperatures.
+
+    Hot replicas move freely between groupings while cold replicas improve
+    the groupings they are given, so a cold replica that is stuck can be
+    replaced by a better grouping found at a higher temperature. The replicas
+    can run in worker processes between exchanges.
+
+    Replica c starts from the same groups as chain c of a
+    MultiStartAnnealingGrouper, and uses seed c * <iterations> + i for its
+    i-th iteration. After every <exchange_interval> iterations, the replicas
+    at each pair of neighbouring temperatures T_1 > T_2, with scores s_1 and
+    s_2, exchange groups iff accept(0, s_1 - s_2, T_1 * T_2 / (T_1 - T_2))
+    is True, which is the usual replica exchange rule. With R replicas, the
+    pair at positions p and p + 1 uses seed R * <iterations> + R * i + p for
+    accept after the round that starts at iteration i, so exchanges never
+    use the seed of any replica's iteration. The grouping depends only on
+    the parameters of this grouper, not on the number of workers.
+
+    === Public Attributes ===
+    group_size: the ideal number of students that should be in each group
+        This group size will never be exceeded by a grouper, but if the class
+        doesn't divide evenly into groups, there may be one group that is
+        smaller than group_size.
+    stats: the statistics of the last call to make_grouping
+
+    === Private Attributes ===
+    _iterations: the number of iterations that each replica runs
+    _temperatures: the temperature of each replica, from hottest to coldest
+    _exchange_interval: the number of iterations between exchanges
+    _workers: the number of worker processes to run replicas in, or 1 to run
+        every replica in this process
+
+    === Representation Invariants ===
+    group_size > 1
+    _iterations > 0
+    len(_temperatures) >= 1
+    _temperatures is strictly decreasing and every temperature is > 0
+    _exchange_interval > 0
+    _workers >= 1
+    """
+    group_size: int
+    stats: SearchStats
+    _iterations: int
+    _temperatures: list[float]
+    _exchange_interval: int
+    _workers: int
+
+    def __init__(self,
+                 group_size: int,
+                 iterations: int = 2500,
+                 temperatures: tuple[float, ...] = (0.1, 0.03, 0.01, 0.003),
+                 exchange_interval: int = 50,
+                 workers: int = 1) -> None:
+        """Initialize this grouper to create groups of size <group_size> by
+        running one replica at each temperature in <temperatures> for
+        <iterations> iterations, exchanging neighbouring replicas every
+        <exchange_interval> iterations, in <workers> worker processes.
+
+        Preconditions:
+            - group_size > 1
+            - iterations > 0
+            - <temperatures> is non-empty, strictly decreasing and positive
+            - exchange_interval > 0
+            - workers >= 1
+        """
+        Grouper.__init__(self, group_size)
+        self.stats = SearchStats()
+        self._iterations = iterations
+        self._temperatures = list(temperatures)
+        self._exchange_interval = exchange_interval
+        self._workers = workers
+
+    def make_grouping(self, course: Course, survey: Survey,
+                      deadline: Optional[float] = None,
+                      progress: Optional[Callable[[SearchStats], None]] = None
+                      ) -> Grouping:
+        """Return the best grouping of the students in <course> found by any
+        replica.
+
+        Each round of iterations between exchanges is <exchange_interval>
+        iterations of the search described in SearchStats for every replica.
+        If <deadline> passes, no more rounds are run.
+
+        Preconditions:
+            - <course> has more students than this Grouper's group_size
+        """
+        self.stats = SearchStats(deadline, progress)
+        matrix = AnswerMatrix(course.get_students(), survey)
+        chains = [AnnealingChain(matrix, _initial_groups(len(matrix),
+                                                         self.group_size, c))
+                  for c in range(len(self._temperatures))]
+        # replicas[p] is the number of the chain at the p-th temperature
+        replicas = list(range(len(chains)))
+
+        if self._workers == 1:
+            self._run_rounds(chains, replicas,
+                             lambda *args: _advance_chain(matrix, *args))
+        else:
+            with ProcessPoolExecutor(self._workers,
+                                     initializer=_set_worker_matrix,
+                                     initargs=(matrix,)) as pool:
+                self._run_rounds(chains, replicas,
+                                 lambda *args: list(pool.map(
+                                     _advance_worker_chain, *args)))
+
+        best = max(range(len(chains)), key=lambda c: chains[c].best_score)
+        self.stats.finish(chains[best].best_score)
+        return _rows_to_grouping(matrix, chains[best].best_groups())
+
+    def _run_rounds(self, chains: list[AnnealingChain], replicas: list[int],
+                    advance: Callable[..., list[AnnealingChain]]) -> None:
+        """Run every chain in <chains> for self._iterations iterations, with
+        chain <replicas>[p] at the p-th temperature, exchanging replicas after
+        every round of self._exchange_interval iterations.
+
+        <advance> is called with a list of chains, a list of temperatures and
+        a list of ranges of seeds, and returns the list of chains after each
+        one has run one iteration per seed in its range at its temperature.
+        Stop when self.stats is out of time.
+        """
+        for start in range(0, self._iterations, self._exchange_interval):
+            if self.stats.out_of_time():
+                return
+            end = min(start + self._exchange_interval, self._iterations)
+            temperatures = [0.0] * len(chains)
+            seeds = []
+            for position, chain in enumerate(replicas):
+                temperatures[chain] = self._temperatures[position]
+            for chain in range(len(chains)):
+                offset = chain * self._iterations
+                seeds.append(range(offset + start, offset + end))
+            chains[:] = advance(chains, temperatures, seeds)
+            self._exchange(chains, replicas,
+                           len(chains) * (self._iterations + start))
+            self.stats.record(max(chain.best_score for chain in chains),
+                              (end - start) * len(chains))
+
+    def _exchange(self, chains: list[AnnealingChain], replicas: list[int],
+                  seed: int) -> None:
+        """Exchange the chains in <replicas> at each pair of neighbouring
+        temperatures, from the hottest pair to the coldest, if the replica
+        exchange rule accepts it. Use <seed> + p for accept at the pair of
+        positions p and p + 1.
+        """
+        for position in range(len(replicas) - 1):
+            hot, cold = self._temperatures[position:position + 2]
+            hot_chain = chains[replicas[position]]
+            cold_chain = chains[replicas[position + 1]]
+            if accept(0.0, hot_chain.score - cold_chain.score,
+                      hot * cold / (hot - cold), seed=seed + position):
+                replicas[position], replicas[position + 1] = \
+                    replicas[position + 1], replicas[position]
+
+
+class LocalSearchGrouper(Grouper):
+    """A grouper that makes a grouping with another grouper, then improves it
+    with refine_grouping.
+
+    === Public Attributes ===
+    group_size: the ideal number of students that should be in each group,
+        which is the group size of <base>
+    base: the grouper that makes the grouping to improve
+    stats: the statistics of the last call to make_grouping
+
+    === Private Attributes ===
+    _max_swaps: the largest number of swaps to make, or None for no limit
+
+    === Representation Invariants ===
+    group_size > 1
+    group_size == base.group_size
+    """
+    group_size: int
+    base: Grouper
+    stats: SearchStats
+    _max_swaps: Optional[int]
+
+    def __init__(self, base: Grouper, max_swaps: Optional[int] = None) -> None:
+        """Initialize this grouper to improve the groupings made by <base>
+        with at most <max_swaps> swaps, or as many as it takes if
+        <max_swaps> is None.
+        """
+        Grouper.__init__(self, base.group_size)
+        self.base = base
+        self.stats = SearchStats()
+        self._max_swaps = max_swaps
+
+    def make_grouping(self, course: Course, survey: Survey,
+                      deadline: Optional[float] = None,
+                      progress: Optional[Callable[[SearchStats], None]] = None
+                      ) -> Grouping:
+        """Return the grouping of the students in <course> made by self.base,
+        improved by refine_grouping.
+
+        Each pass of SwapRefiner.refine is one iteration of the search, as
+        described in SearchStats. self.base is not given <deadline>, since
+        not every grouper takes one, so the deadline only stops the passes.
+
+        Preconditions:
+            - <course> has more students than this Grouper's group_size
+        """
+        self.stats = SearchStats(deadline, progress)
+        return refine_grouping(self.base.make_grouping(course, survey), survey,
+                               self._max_swaps, self.stats)
+
+
+def refine_grouping(grouping: Grouping, survey: Survey,
+                    max_swaps: Optional[int] = None,
+                    stats: Optional[SearchStats] = None) -> Grouping:
+    """Return a new grouping made from <grouping> by repeatedly swapping two
+    students in different groups, as long as a swap increases the score of
+    the grouping according to <survey>. <grouping> is not changed.
+
+    Each group in turn is searched for the swap with a later group that
+    increases the sum of the scores of the two groups the most, which is made
+    if it increases it at all. Searching continues until no pair of groups
+    has such a swap, or <max_swaps> swaps have been made. Groups keep their
+    sizes.
+
+    If <stats> is not None, the search also stops once it is out of time,
+    each pass of SwapRefiner.refine is recorded in it, and it is finished
+    with the score of the grouping returned.
+
+    Preconditions:
+        - max_swaps is None or max_swaps >= 0
+    """
+    members = [group.get_members() for group in grouping.get_groups()]
+    matrix = AnswerMatrix([student for group in members for student in group],
+                          survey)
+    groups = []
+    for group in members:
+        groups.append([matrix.row(student) for student in group])
+
+    if len(groups) >= 2:
+        SwapRefiner(matrix, groups).refine(max_swaps, stats=stats)
+    if stats is not None:
+        stats.finish(matrix.total_score(groups))
+    return _rows_to_grouping(matrix, groups)
+
+
+def place_students(grouping: Grouping, students: list[Student],
+                   survey: Survey, group_size: int,
+                   max_swaps: int = 10) -> Grouping:
+    """Return a new grouping made from <grouping> by adding each student in
+    <students> in turn, without regrouping the students already in it.
+    <grouping> is not changed.
+
+    Each student joins the group with fewer than <group_size> members whose
+    score increases the most when they join. If every group is full, the
+    student starts a new group, and at most <max_swaps> swaps are made by a
+    SwapRefiner among the groups it changes, starting from that new group, so
+    the student can end up in a full group and someone else on their own.
+
+    Placing a student scores each group with space once, and each swap scores
+    every pair of members of two groups, so a student costs about
+    O(groups * group_size * questions) rather than a new grouping.
+
+    Preconditions:
+        - No student in <students> is in <grouping>, and <students> has no
+          duplicates
+        - Every group in <grouping> has at most <group_size> members
+        - group_size > 1
+        - max_swaps >= 0
+    """
+    members = [group.get_members() for group in grouping.get_groups()]
+    matrix = AnswerMatrix([student for group in members for student in group]
+                          + students, survey)
+    refiner = SwapRefiner(matrix, [[matrix.row(student) for student in group]
+                                   for group in members])
+
+    for student in students:
+        row = matrix.row(student)
+        first = refiner.best_insertion(row, group_size)
+        if first is not None:
+            refiner.insert(first, row)
+        else:
+            refiner.refine(max_swaps, {refiner.add_group([row])})
+    return _rows_to_grouping(matrix, refiner.groups)
+
+
+class IncrementalRegrouper:
+    """A list of groups of students that is kept up to date, and improved by
+    swapping students between groups, as students change their answers and as
+    the weights and criteria of a survey change.
+
+    reoptimize only reads the answers that have changed since it was last
+    called (see AnswerMatrix.refresh), and only scores again the questions
+    whose answers changed, in the groups of the students who changed them,
+    and the questions whose weight or criterion changed (see
+    Survey.changed_questions), in every group. It then searches for swaps
+    starting from the groups whose scores changed with a SwapRefiner.
+
+    === Public Attributes ===
+    score: the score of the groups, as given by AnswerMatrix.total_score,
+        when reoptimize was last called, or when this regrouper was made
+
+    === Private Attributes ===
+    _survey: the survey that the groups are scored with
+    _matrix: the answers of every student in the groups
+    _refiner: the SwapRefiner whose groups are the groups of rows of _matrix
+    _columns: the score of each question in each group of _refiner.groups,
+        in the same order, as given by AnswerMatrix.score_columns
+    _survey_revision: what _survey.get_revision() returned when the weights
+        and criteria were last read
+
+    === Representation Invariants ===
+    _refiner.groups is non-empty
+    len(_columns) == len(_refiner.groups)
+    """
+    score: float
+    _survey: Survey
+    _matrix: AnswerMatrix
+    _refiner: SwapRefiner
+    _columns: list[dict[int, float]]
+    _survey_revision: int
+
+    def __init__(self, grouping: Grouping, survey: Survey) -> None:
+        """Initialize a regrouper for the groups in <grouping>, scored with
+        <survey>. <grouping> is not changed.
+
+        Preconditions:
+            - len(grouping) > 0
+        """
+        members = [group.get_members() for group in grouping.get_groups()]
+        self._survey = survey
+        self._survey_revision = survey.get_revision()
+        self._matrix = AnswerMatrix([student for group in members
+                                     for student in group], survey)
+        self._refiner = SwapRefiner(self._matrix,
+                                    [[self._matrix.row(student)
+                                      for student in group]
+                                     for group in members])
+        every = range(len(self._matrix.questions))
+        self._columns = [self._matrix.score_columns(group, every)
+                         for group in self._refiner.groups]
+        self.score = self._refiner.score()
+
+    def get_grouping(self) -> Grouping:
+        """Return a grouping of the students in the current groups."""
+        return _rows_to_grouping(self._matrix, self._refiner.groups)
+
+    def reoptimize(self, max_swaps: int = 50) -> float:
+        """Bring the groups up to date with every answer, weight and criterion
+        that has changed since this method was last called, then make at most
+        <max_swaps> swaps that improve them, starting from the groups whose
+        scores changed. Return how much the score of the groups has changed
+        since this method was last called.
+
+        Preconditions:
+            - max_swaps >= 0
+        """
+        groups = self._refiner.groups
+        position = {row: first for first, group in enumerate(groups)
+                    for row in group}
+        stale = {}
+        for row, cols in self._matrix.refresh().items():
+            stale.setdefault(position[row], set()).update(cols)
+
+        question_ids = self._survey.changed_questions(self._survey_revision)
+        self._survey_revision = self._survey.get_revision()
+        reweighed = {col for col, question in enumerate(self._matrix.questions)
+                     if question.id in question_ids}
+        if reweighed:
+            for first in range(len(groups)):
+                stale.setdefault(first, set()).update(reweighed)
+
+        scores = {}
+        for first, cols in stale.items():
+            self._columns[first].update(
+                self._matrix.score_columns(groups[first], cols))
+            scores[first] = self._matrix.weigh_columns(groups[first],
+                                                       self._columns[first])
+        self._refiner.rescore(scores)
+
+        before = [set(group) for group in groups]
+        self._refiner.refine(max_swaps, set(scores))
+        every = range(len(self._matrix.questions))
+        for first, group in enumerate(groups):
+            if set(group) != before[first]:
+                self._columns[first] = self._matrix.score_columns(group, every)
+
+        old_score, self.score = self.score, self._refiner.score()
+        return self.score - old_score
+
+
+class TabuGrouper(Grouper):
+    """A grouper used to create a grouping of students according to their
+    answers to a survey. This grouper uses tabu search to create groups.
+
+    The search starts from the students in order, sliced into groups. At each
+    iteration, <sample> groups are chosen at random, with one random.Random
+    seeded with <seed> for the whole search, and every swap between a
+    chosen group and any other group is scored at once. The best of those
+    swaps is made, even if it lowers the score, unless it moves a student
+    who is tabu: one of the <tenure> students most recently moved. A tabu
+    swap is still made if it gives a better list of groups than any found so
+    far.
+
+    === Public Attributes ===
+    group_size: the ideal number of students that should be in each group
+        This group size will never be exceeded by a grouper, but if the class
+        doesn't divide evenly into groups, there may be one group that is
+        smaller than group_size.
+
+    stats: the statistics of the last call to make_grouping
+
+    === Private Attributes ===
+    _iterations: the number of iterations of tabu search to run
+    _sample: the number of groups whose swaps are scored at each iteration
+    _tenure: the number of most recently moved students that are tabu
+    _seed: the seed of the random numbers that choose the groups whose swaps
+        are scored
+
+    === Representation Invariants ===
+    group_size > 1
+    _iterations > 0
+    _sample > 0
+    _tenure >= 0
+    """
+    group_size: int
+    stats: SearchStats
+    _iterations: int
+    _sample: int
+    _tenure: int
+    _seed: int
+
+    def __init__(self, group_size: int, iterations: int = 500,
+                 sample: int = 1, tenure: int = 10, seed: int = 0) -> None:
+        """Initialize this tabu search grouper (that runs for <iterations>
+        iterations, scores the swaps of <sample> groups at each iteration,
+        chosen with random numbers seeded with <seed>, and makes the last
+        <tenure> students moved tabu) to create groups of size <group_size>.
+
+        Preconditions:
+            - group_size > 1
+            - iterations > 0
+            - sample > 0
+            - tenure >= 0
+        """
+        Grouper.__init__(self, group_size)
+        self.stats = SearchStats()
+        self._iterations = iterations
+        self._sample = sample
+        self._tenure = tenure
+        self._seed = seed
+
+    def make_grouping(self, course: Course, survey: Survey,
+                      deadline: Optional[float] = None,
+                      progress: Optional[Callable[[SearchStats], None]] = None
+                      ) -> Grouping:
+        """Return a grouping of the students in <course> made with tabu
+        search.
+
+        The search stops early if <deadline> passes, and calls <progress>
+        after every iteration, as described in SearchStats.
+
+        Preconditions:
+            - <course> has more students than this Grouper's group_size
+        """
+        self.stats = SearchStats(deadline, progress)
+        matrix = AnswerMatrix(course.get_students(), survey)
+        groups = slice_list(list(range(len(matrix))), self.group_size)
+        if len(groups) >= 2:
+            groups = self._search(matrix, groups)
+        self.stats.finish(matrix.total_score(groups))
+        return _rows_to_grouping(matrix, groups)
+
+    def _search(self, matrix: AnswerMatrix,
+                groups: list[list[int]]) -> list[list[int]]:
+        """Run tabu search on the groups of rows of <matrix> in <groups> until
+        self.stats is out of time, and return the best list of groups found.
+        <groups> may be changed.
+
+        Preconditions:
+            - len(groups) >= 2
+        """
+        refiner = SwapRefiner(matrix, groups)
+        score = refiner.score()
+        best_score, best_groups = score, [group[:] for group in groups]
+        tabu = np.zeros(len(matrix), dtype=bool)
+        recent = deque()
+        sample = min(self._sample, len(groups))
+        rnd = random.Random(self._seed)
+
+        for _ in range(self._iterations):
+            if self.stats.out_of_time():
+                break
+            firsts = rnd.sample(range(len(groups)), sample)
+            move = self._best_move(refiner, firsts, tabu,
+                                   (best_score - score) * len(groups))
+            if move is None:
+                self.stats.record(best_score)
+                continue
+            _, first, row_1, second, row_2 = move
+            refiner.swap(first, row_1, second, row_2)
+            score = refiner.score()
+            for row in (row_1, row_2):
+                tabu[row] = True
+                recent.append(row)
+            while len(recent) > self._tenure:
+                tabu[recent.popleft()] = False
+            if score > best_score:
+                best_score, best_groups = score, [group[:] for group in groups]
+            self.stats.record(best_score)
+        return best_groups
+
+    def _best_move(self, refiner: SwapRefiner, firsts: list[int],
+                   tabu: np.ndarray, aspiration: float
+                   ) -> Optional[tuple[float, int, int, int, int]]:
+        """Return (gain, first, row_1, second, row_2) for the swap of row_1
+        of a group first in <firsts> with row_2 of any other group second
+        that increases the sum of the scores of <refiner>.groups the most,
+        or None if every such swap is not allowed.
+
+        A swap is allowed if neither of its rows is <tabu>, or if it increases
+        the sum of the scores by more than <aspiration>.
+        """
+        best = None
+        groups = refiner.groups
+        for first in firsts:
+            by_size = {}
+            for second in range(len(groups)):
+                if second != first:
+                    by_size.setdefault(len(groups[second]), []).append(second)
+            tabu_1 = tabu[groups[first]]
+            for seconds in by_size.values():
+                gains = refiner.swap_gains(first, seconds)
+                tabu_2 = tabu[[groups[second] for second in seconds]]
+                allowed = ~(tabu_1[None, :, None] | tabu_2[:, None, :]) \
+                    | (gains > aspiration + _MIN_GAIN)
+                gains = np.where(allowed, gains, -np.inf)
+                p, j_1, j_2 = np.unravel_index(int(np.argmax(gains)),
+                                               gains.shape)
+                if allowed[p, j_1, j_2] and (best is None
+                                             or gains[p, j_1, j_2] > best[0]):
+                    second = seconds[p]
+                    best = (float(gains[p, j_1, j_2]), first,
+                            groups[first][j_1], second, groups[second][j_2])
+        return best
+
+
+class GeneticGrouper(Grouper):
+    """A grouper used to create a grouping of students according to their
+    answers to a survey. This grouper uses a genetic algorithm to create
+    groups.
+
+    Each individual of the population is an ordering of the students, which
+    is sliced into groups with slice_list, so the groups of an individual are
+    the slots at positions 0 to group_size - 1, group_size to
+    2 * group_size - 1, and so on. The first individual is the students in
+    order, as SimulatedAnnealingGrouper starts from, and the rest are random.
+
+    In each generation, parents are picked by tournaments of <tournament>
+    random individuals. A child keeps the groups of its first parent in a
+    random half of the slots, and fills the other slots with the remaining
+    students in the order they come in its second parent (group-preserving
+    crossover). Each child then has two students in different groups swapped
+    with probability <mutation>. The best individual of each generation is
+    kept unchanged in the next one.
+
+    The fitness of the whole population is computed at once with
+    AnswerMatrix.score_orders, split between <workers> worker processes. The
+    random choices of generation g use seed g, and the grouping depends only
+    on the parameters of this grouper, not on the number of workers.
+
+    === Public Attributes ===
+    group_size: the ideal number of students that should be in each group
+        This group size will never be exceeded by a grouper, but if the class
+        doesn't divide evenly into groups, there may be one group that is
+        smaller than group_size.
+    stats: the statistics of the last call to make_grouping
+
+    === Private Attributes ===
+    _population: the number of individuals in each generation
+    _generations: the number of generations to run
+    _mutation: the probability that a child has a swap mutation
+    _tournament: the number of individuals in each tournament
+    _workers: the number of worker processes to compute fitness in, or 1 to
+        compute it in this process
+
+    === Representation Invariants ===
+    group_size > 1
+    _population >= 2
+    _generations >= 0
+    0 <= _mutation <= 1
+    _tournament >= 1
+    _workers >= 1
+    """
+    group_size: int
+    stats: SearchStats
+    _population: int
+    _generations: int
+    _mutation: float
+    _tournament: int
+    _workers: int
+
+    def __init__(self,
+                 group_size: int,
+                 population: int = 50,
+                 generations: int = 200,
+                 mutation: float = 0.5,
+                 tournament: int = 3,
+                 workers: int = 1) -> None:
+        """Initialize this genetic grouper to create groups of size
+        <group_size> by evolving <population> individuals for <generations>
+        generations, with mutation probability <mutation> and tournaments of
+        <tournament> individuals, computing fitness in <workers> worker
+        processes.
+
+        Preconditions:
+            - group_size > 1
+            - population >= 2
+            - generations >= 0
+            - 0 <= mutation <= 1
+            - tournament >= 1
+            - workers >= 1
+        """
+        Grouper.__init__(self, group_size)
+        self.stats = SearchStats()
+        self._population = population
+        self._generations = generations
+        self._mutation = mutation
+        self._tournament = tournament
+        self._workers = workers
+
+    def make_grouping(self, course: Course, survey: Survey,
+                      deadline: Optional[float] = None,
+                      progress: Optional[Callable[[SearchStats], None]] = None
+                      ) -> Grouping:
+        """Return a grouping of the students in <course> from the fittest
+        individual found in any generation.
+
+        Each generation is an iteration of the search described in
+        SearchStats, so if <deadline> passes, the fittest individual of the
+        generations so far is returned.
+
+        Preconditions:
+            - <course> has more students than this Grouper's group_size
+        """
+        self.stats = SearchStats(deadline, progress)
+        matrix = AnswerMatrix(course.get_students(), survey)
+        if self._workers == 1:
+            best = self._evolve(
+                len(matrix),
+                lambda orders: matrix.score_orders(orders, self.group_size))
+        else:
+            with ProcessPoolExecutor(self._workers,
+                                     initializer=_set_worker_matrix,
+                                     initargs=(matrix,)) as pool:
+                best = self._evolve(len(matrix), lambda orders: np.concatenate(
+                    list(pool.map(_score_worker_orders,
+                                  np.array_split(orders, self._workers),
+                                  [self.group_size] * self._workers))))
+        groups = slice_list(best.tolist(), self.group_size)
+        self.stats.finish(matrix.total_score(groups))
+        return _rows_to_grouping(matrix, groups)
+
+    def _evolve(self, rows: int,
+                fitness: Callable[[np.ndarray], np.ndarray]) -> np.ndarray:
+        """Evolve a population of orderings of the rows 0 to <rows> - 1 until
+        self.stats is out of time, and return the fittest ordering found.
+        <fitness> returns the fitness of each ordering in an array of
+        orderings.
+        """
+        rng = np.random.default_rng(0)
+        population = np.array([np.arange(rows)]
+                              + [rng.permutation(rows)
+                                 for _ in range(self._population - 1)])
+        scores = fitness(population)
+        slots = _slot_starts(rows, self.group_size)
+
+        for generation in range(self._generations):
+            if self.stats.out_of_time():
+                break
+            rng = np.random.default_rng(generation)
+            elite = int(np.argmax(scores))
+            children = [population[elite]]
+            while len(children) < self._population:
+                first, second = self._select(scores, rng), \
+                    self._select(scores, rng)
+                child = _crossover(population[first], population[second],
+                                   slots, rng)
+                if rng.random() < self._mutation:
+                    _mutate(child, slots, rng)
+                children.append(child)
+            population = np.array(children)
+            scores = fitness(population)
+            self.stats.record(float(scores.max()))
+
+        return population[int(np.argmax(scores))]
+
+    def _select(self, scores: np.ndarray, rng: np.random.Generator) -> int:
+        """Return the index of the fittest of self._tournament individuals
+        picked at random with <rng>, whose fitnesses are <scores>.
+        """
+        entrants = rng.integers(len(scores), size=self._tournament)
+        return int(entrants[np.argmax(scores[entrants])])
+
+
+def _slot_starts(rows: int, group_size: int) -> np.ndarray:
+    """Return the position at which each group of an ordering of <rows> rows
+    sliced into groups of size <group_size> starts, followed by <rows>.
+    """
+    return np.append(np.arange(0, rows, group_size), rows)
+
+
+def _crossover(first: np.ndarray, second: np.ndarray, slots: np.ndarray,
+               rng: np.random.Generator) -> np.ndarray:
+    """Return a child of the orderings <first> and <second> that keeps the
+    groups of <first> in a random half of the slots whose starts are
+    <slots>, and has the rest of the rows in the other slots in the order
+    they come in <second>.
+    """
+    kept = np.repeat(rng.random(len(slots) - 1) < 0.5, np.diff(slots))
+    child = first.copy()
+    used = np.zeros(len(first), dtype=bool)
+    used[first[kept]] = True
+    child[~kept] = second[~used[second]]
+    return child
+
+
+def _mutate(order: np.ndarray, slots: np.ndarray,
+            rng: np.random.Generator) -> None:
+    """Swap two random rows of <order> that are in different slots, whose
+    starts are <slots>.
+
+    Preconditions:
+        - len(slots) >= 3
+    """
+    slot_1, slot_2 = rng.choice(len(slots) - 1, size=2, replace=False)
+    i_1 = rng.integers(slots[slot_1], slots[slot_1 + 1])
+    i_2 = rng.integers(slots[slot_2], slots[slot_2 + 1])
+    order[i_1], order[i_2] = order[i_2], order[i_1]
+
+
+def _score_worker_orders(orders: np.ndarray,
+                         group_size: int) -> np.ndarray:
+    """Return AnswerMatrix.score_orders of <orders> and <group_size> for the
+    answer matrix of this worker process.
+    """
+    return _WORKER_STATE['matrix'].score_orders(orders, group_size)
+
+
+class BranchAndBoundGrouper(Grouper):
+    """A grouper that finds a grouping with the highest possible score by
+    branch and bound, for courses of up to about 30 students.
+
+    The search starts from the grouping made by a TabuGrouper and improved
+    by refine_grouping, and is described in PartitionSearch. If it runs out
+    of time, the best grouping found so far is returned, and <gap> says how
+    far from optimal it might be.
+
+    === Public Attributes ===
+    group_size: the ideal number of students that should be in each group
+        This group size will never be exceeded by a grouper, but if the class
+        doesn't divide evenly into groups, there may be one group that is
+        smaller than group_size.
+    gap: after make_grouping, an upper bound on how much higher the score of
+        the best grouping is than the score of the grouping returned, which
+        is 0.0 iff that grouping was proven to be the best
+    stats: the statistics of the last call to make_grouping
+
+    === Private Attributes ===
+    _time_limit: the number of seconds after which the search stops, or None
+        to search until the best grouping is found
+
+    === Representation Invariants ===
+    group_size > 1
+    gap >= 0
+    _time_limit is None or _time_limit >= 0
+    """
+    group_size: int
+    gap: float
+    stats: SearchStats
+    _time_limit: Optional[float]
+
+    def __init__(self, group_size: int,
+                 time_limit: Optional[float] = None) -> None:
+        """Initialize this grouper to create groups of size <group_size>,
+        searching for at most <time_limit> seconds, or until the best grouping
+        is found if <time_limit> is None.
+
+        Preconditions:
+            - group_size > 1
+            - time_limit is None or time_limit >= 0
+        """
+        Grouper.__init__(self, group_size)
+        self.gap = 0.0
+        self.stats = SearchStats()
+        self._time_limit = time_limit
+
+    def make_grouping(self, course: Course, survey: Survey,
+                      deadline: Optional[float] = None,
+                      progress: Optional[Callable[[SearchStats], None]] = None
+                      ) -> Grouping:
+        """Return the grouping of the students in <course> with the highest
+        score according to <survey>, or the best one found in the time limit.
+
+        Each node of the search is an iteration of the search described in
+        SearchStats. The search stops at <deadline> or at the end of the time
+        limit, whichever comes first, and the tabu search and refinement of
+        the starting grouping stop at the same time.
+
+        Preconditions:
+            - <course> has more students than this Grouper's group_size
+        """
+        if self._time_limit is not None:
+            limit = time.monotonic() + self._time_limit
+            deadline = limit if deadline is None else min(deadline, limit)
+        self.stats = SearchStats(deadline, progress)
+        start = refine_grouping(
+            TabuGrouper(self.group_size).make_grouping(course, survey,
+                                                       deadline),
+            survey, stats=SearchStats(deadline))
+        matrix = AnswerMatrix(course.get_students(), survey)
+        groups = [[matrix.row(student) for student in group.get_members()]
+                  for group in start.get_groups()]
+
+        search = PartitionSearch(matrix, self.group_size, groups, self.stats)
+        upper = search.run()
+        self.gap = max(0.0, (upper - search.best_total) / len(groups))
+        self.stats.finish(search.best_total / len(groups))
+        return _rows_to_grouping(matrix, search.best_groups)
+
+
+class PartitionSearch:
+    """A depth-first branch and bound search for the list of groups of rows
+    of an AnswerMatrix with the highest total score.
+
+    Every node of the search is a list of groups that have been decided and
+    the pool of rows that have not. A node is expanded by choosing the group
+    of the lowest row in the pool, so every grouping is reached exactly once
+    no matter the order of its groups of the same size. At most one group is
+    smaller than the others, as with slice_list.
+
+    The children of a node are visited from the highest bound to the lowest.
+    The bound of a child is the score of its decided groups plus the sum of
+    the AnswerMatrix.member_bounds of its pool, and a child is skipped if its
+    bound is no higher than the best total found so far.
+
+    === Public Attributes ===
+    best_groups: the list of groups with the highest total score found
+    best_total: the sum of the scores of the groups in <best_groups>
+
+    === Private Attributes ===
+    _matrix: the answer matrix that the rows belong to
+    _group_size: the size of every group but the smaller one
+    _groups: the number of groups in every list of groups
+    _stats: the statistics of the search, whose deadline it stops at
+
+    === Representation Invariants ===
+    _group_size > 1
+    """
+    best_groups: list[list[int]]
+    best_total: float
+    _matrix: AnswerMatrix
+    _group_size: int
+    _groups: int
+    _stats: SearchStats
+
+    def __init__(self, matrix: AnswerMatrix, group_size: int,
+                 groups: list[list[int]], stats: SearchStats) -> None:
+        """Initialize a search for the best way of splitting the rows of
+        <matrix> into groups of <group_size> (and at most one smaller group),
+        which starts from the list of groups <groups> as the best found, and
+        records every node it expands in <stats> until it is out of time.
+
+        Preconditions:
+            - <groups> splits the rows of <matrix> into groups of the sizes
+              given by slice_list with <group_size>
+        """
+        self.best_groups = [group[:] for group in groups]
+        self.best_total = float(sum(matrix.score_rows(group)
+                                    for group in groups))
+        self._matrix = matrix
+        self._group_size = group_size
+        self._groups = len(groups)
+        self._stats = stats
+
+    def run(self) -> float:
+        """Run the search and return an upper bound on the total score of any
+        list of groups, which is <self>.best_total unless the search stopped
+        at the deadline.
+        """
+        rows = len(self._matrix)
+        full, short = divmod(rows, self._group_size)
+        pool = np.arange(rows)
+        open_bound = self._expand(pool, [], 0.0, full, short)
+        return max(self.best_total, open_bound)
+
+    def _expand(self, pool: np.ndarray, groups: list[list[int]],
+                total: float, full: int, short: int) -> float:
+        """Search every way of splitting the rows in <pool> into <full> groups
+        of self._group_size and, if <short> > 0, one group of <short>, added
+        to <groups> whose total score is <total>.
+
+        Return an upper bound on the total of the parts of the search that
+        were not finished because of the deadline, or -inf if every part was
+        finished.
+
+        Preconditions:
+            - <pool> is sorted
+        """
+        if len(pool) == 0:
+            if total > self.best_total:
+                self.best_total = total
+                self.best_groups = [group[:] for group in groups]
+            return -math.inf
+
+        sizes = [self._group_size] * (full > 0) + [short] * (short > 0)
+        member_bounds = self._matrix.member_bounds(pool, sizes)
+        pool_bound = member_bounds.sum()
+        if self._stats.out_of_time():
+            return total + pool_bound
+        self._stats.record(self.best_total / self._groups)
+
+        children = []
+        for size in set(sizes):
+            # Every group chosen here has pool[0] and size - 1 later rows
+            positions = np.array(
+                [(0,) + rest for rest in combinations(range(1, len(pool)),
+                                                      size - 1)], dtype=int)
+            scores = self._matrix.score_group_array(pool[positions])
+            bounds = total + scores + pool_bound \
+                - member_bounds[positions].sum(axis=1)
+            children.extend(zip(bounds, scores, positions))
+        children.sort(key=lambda child: -child[0])
+
+        for index, (bound, score, positions) in enumerate(children):
+            if bound <= self.best_total + _MIN_GAIN:
+                return -math.inf
+            if self._stats.timed_out:
+                return bound
+            size = len(positions)
+            open_bound = self._expand(
+                np.delete(pool, positions), groups + [pool[positions].tolist()],
+                total + score, full - (size == self._group_size),
+                short if size == self._group_size else 0)
+            if self._stats.timed_out:
+                if index + 1 < len(children):
+                    open_bound = max(open_bound, children[index + 1][0])
+                return open_bound
+        return -math.inf
+
+
+def _advance_chain(matrix: AnswerMatrix, chains: list[AnnealingChain],
+                   temperatures: list[float],
+                   seeds: list[range]) -> list[AnnealingChain]:
+    """Run each chain in <chains>, whose groups are of rows of <matrix>, for
+    one iteration per seed in the range at the same position in <seeds>, at
+    the temperature at the same position in <temperatures>. Return <chains>.
+    """
+    for chain, temperature, chain_seeds in zip(chains, temperatures, seeds):
+        for seed in chain_seeds:
+            chain.step(matrix, seed, temperature)
+    return chains
+
+
+def _advance_worker_chain(chain: AnnealingChain, temperature: float,
+                          seeds: range) -> AnnealingChain:
+    """Run <chain> for one iteration per seed in <seeds> at <temperature>,
+    using the answer matrix of this worker process, and return it.
+    """
+    _advance_chain(_WORKER_STATE['matrix'], [chain], [temperature], [seeds])
+    return chain
+
+
+# The state of a worker process, set by _set_worker_matrix when the process
+# starts so that the answer matrix is sent to each worker only once
+_WORKER_STATE = {}
+
+
+def _set_worker_matrix(matrix: AnswerMatrix) -> None:
+    """Set the answer matrix of this worker process to <matrix>."""
+    _WORKER_STATE.clear()
+    _WORKER_STATE['matrix'] = matrix
+
+
+def _initial_groups(rows: int, group_size: int,
+                    chain: int) -> list[list[int]]:
+    """Return the groups of size <group_size> that chain number <chain> of a
+    multi-chain grouper starts from, out of the rows 0 to <rows> - 1.
+
+    Chain 0 starts from the rows in order, like SimulatedAnnealingGrouper;
+    every other chain starts from the rows shuffled with seed <chain>.
+    """
+    order = list(range(rows))
+    if chain > 0:
+        random.Random(chain).shuffle(order)
+    return slice_list(order, group_size)
+
+
+def _rows_to_grouping(matrix: AnswerMatrix,
+                      groups: list[list[int]]) -> Grouping:
+    """Return a grouping of the students in the groups of rows of <matrix> in
+    <groups>.
+    """
+    grouping = Grouping()
+    for members in groups:
+        grouping.add_group(Group(matrix.get_students(members)))
+    return grouping
+
+
+class ReferenceProposer(MoveProposer):
+    """A proposer whose moves and acceptance tests are exactly those of
+    random_swap and accept: the iteration with seed s swaps the positions
+    given by random_swap_positions(groups, s), and uses the first number of
+    random.Random(s) to decide whether to accept a swap that lowers the score.
+
+    This is the proposer that SimulatedAnnealingGrouper uses unless it is
+    given another one. It creates two random.Random objects per iteration,
+    so a BatchProposer is faster when the moves do not have to match.
+    """
+
+    def start(self, seed: int) -> None:
+        """Restart this proposer, which has no state to restart."""
+
+    def propose(self, groups: list[list[int]], scores: list[float],
+                seed: int) -> Move:
+        """Return the swap that random_swap(<groups>, <seed>) would make."""
+        return Swap(*random_swap_positions(groups, seed=seed))
+
+    def uniform(self, seed: int) -> float:
+        """Return the random number that accept uses with seed <seed>."""
+        return random.Random(seed).random()
+
+
+class AnnealingChain:
+    """The state of one chain of simulated annealing over groups of rows of an
+    AnswerMatrix.
+
+    Each step makes a move from a MoveProposer in place, rescores only the
+    groups it changes, and keeps the move iff accept would with the
+    proposer's random number, or undoes it otherwise. The list of groups is
+    never copied: the moves accepted since the best list of groups was found
+    are recorded, and undone by restore_best.
+
+    An incremental chain keeps a GroupState for every group, and scores each
+    move from the members that join and leave the groups it changes instead
+    of rescoring those groups. This is faster for criteria whose states are
+    cheap to update, such as LonelyMemberCriterion, and slower for the
+    pairwise criteria, whose groups AnswerMatrix.score_rows scores in one
+    batch.
+    The scores of states can differ from those of score_rows in the last
+    bits, so an incremental chain may break ties between moves differently.
+
+    === Public Attributes ===
+    groups: the current list of groups of rows
+    score: the score of <groups>, as given by AnswerMatrix.total_score
+    best_score: the highest score that <groups> has had
+    proposer: the source of the moves and acceptance tests of each step
+
+    === Private Attributes ===
+    _scores: the score of each group in <groups>, in the same order, so that
+        summing them gives exactly the same total as total_score
+    _moves_since_best: the moves accepted since <groups> last had score
+        <best_score>, in order
+    _states: the state of each group in <groups>, in the same order, or None
+        if this chain is not incremental
+
+    === Representation Invariants ===
+    len(groups) >= 2
+    len(_scores) == len(groups)
+    _states is None or len(_states) == len(groups)
+    """
+    groups: list[list[int]]
+    score: float
+    best_score: float
+    proposer: MoveProposer
+    _scores: list[float]
+    _moves_since_best: list[Move]
+    _states: Optional[list[GroupState]]
+
+    def __init__(self, matrix: AnswerMatrix, groups: list[list[int]],
+                 proposer: Optional[MoveProposer] = None,
+                 incremental: bool = False) -> None:
+        """Initialize a chain that starts from the groups of rows of <matrix>
+        in <groups> and makes the moves of <proposer>, which is a
+        ReferenceProposer if <proposer> is None. The chain is incremental iff
+        <incremental> is True. <groups> is changed as the chain runs.
+
+        Preconditions:
+            - len(groups) >= 2
+        """
+        self.groups = groups
+        self._scores = [matrix.score_rows(group) for group in groups]
+        self.score = sum(self._scores) / len(groups)
+        self.best_score = self.score
+        if proposer is None:
+            proposer = ReferenceProposer()
+        self.proposer = proposer
+        self._moves_since_best = []
+        self._states = None
+        if incremental:
+            self._states = [matrix.group_state(group) for group in groups]
+
+    def step(self, matrix: AnswerMatrix, seed: int,
+             temperature: float) -> bool:
+        """Make the move of the iteration with seed <seed>, and keep it iff
+        accept does at <temperature>. Return True iff the move was kept.
+
+        With a ReferenceProposer, this swaps two random rows in different
+        groups using <seed> as the seed for both random_swap_positions and
+        accept.
+        """
+        groups, scores, states = self.groups, self._scores, self._states
+        move = self.proposer.propose(groups, scores, seed)
+        exchanges = None if states is None else move.exchanges(groups)
+        move.apply(groups)
+        old_scores = [scores[l] for l in move.changed]
+        if exchanges is None:
+            for l in move.changed:
+                scores[l] = matrix.score_rows(groups[l])
+        else:
+            for l, added, removed in exchanges:
+                scores[l] = states[l].score_after(added, removed)
+        new_score = sum(scores) / len(groups)
+        # The same test as accept, with the proposer's random number
+        diff = new_score - self.score
+        if diff < 0 and (temperature == 0 or self.proposer.uniform(seed)
+                         >= math.exp(diff / temperature)):
+            move.undo(groups)
+            for l, old in zip(move.changed, old_scores):
+                scores[l] = old
+            return False
+
+        if exchanges is not None:
+            for l, added, removed in exchanges:
+                if added is not None:
+                    states[l].add(added)
+                if removed is not None:
+                    states[l].remove(removed)
+        self.score = new_score
+        self._moves_since_best.append(move)
+        if new_score > self.best_score:
+            self.best_score = new_score
+            self._moves_since_best = []
+        return True
+
+    def best_groups(self) -> list[list[int]]:
+        """Return a copy of the best list of groups this chain has had."""
+        groups = [group[:] for group in self.groups]
+        for move in reversed(self._moves_since_best):
+            move.undo(groups)
+        return groups
+
+    def restore_best(self, matrix: AnswerMatrix) -> None:
+        """Change <self>.groups back into the best list of groups this chain
+        has had, whose rows are rows of <matrix>.
+        """
+        for move in reversed(self._moves_since_best):
+            move.undo(self.groups)
+        self._scores = [matrix.score_rows(group) for group in self.groups]
+        if self._states is not None:
+            self._states = [matrix.group_state(group) for group in self.groups]
+        self.score = self.best_score
+        self._moves_since_best = []
+
+
+class SwapRefiner:
+    """A hill climber that improves a list of groups of rows of an AnswerMatrix
+    by swapping rows between groups, in the style of Kernighan and Lin.
+
+    Every swap between two groups is scored at once with
+    AnswerMatrix.score_swaps, which only looks at the two groups, so the cost
+    of searching a pair of groups does not depend on the number of groups.
+
+    === Public Attributes ===
+    groups: the list of groups of rows being improved, which is changed in
+        place as swaps are made
+
+    === Private Attributes ===
+    _matrix: the answer matrix that the rows belong to
+    _scores: the score of each group in <groups>, in the same order
+
+    === Representation Invariants ===
+    len(_scores) == len(groups)
+    """
+    groups: list[list[int]]
+    _matrix: AnswerMatrix
+    _scores: list[float]
+
+    def __init__(self, matrix: AnswerMatrix, groups: list[list[int]]) -> None:
+        """Initialize a refiner for the groups of rows of <matrix> in
+        <groups>, which is changed as swaps are made.
+
+        Preconditions:
+            - Every group in <groups> is non-empty
+        """
+        self.groups = groups
+        self._matrix = matrix
+        self._scores = [matrix.score_rows(group) for group in groups]
+
+    def best_swap(self, first: int, others: list[int]
+                  ) -> tuple[float, Optional[int], Optional[int],
+                             Optional[int]]:
+        """Return (gain, second, row_1, row_2) where swapping row_1 of group
+        <first> with row_2 of group <second>, one of the groups at the
+        positions in <others>, increases the sum of the scores of the two
+        groups by gain, which is as large as possible. Return
+        (0.0, None, None, None) if no swap increases it by more than rounding
+        error.
+
+        The groups in <others> that have the same size are searched together
+        with one call to AnswerMatrix.score_swaps.
+
+        Preconditions:
+            - first not in others
+        """
+        by_size = {}
+        for second in others:
+            by_size.setdefault(len(self.groups[second]), []).append(second)
+
+        best = (_MIN_GAIN, None, None, None)
+        for seconds in by_size.values():
+            gains = self.swap_gains(first, seconds)
+            p, i, j = np.unravel_index(int(np.argmax(gains)), gains.shape)
+            if gains[p, i, j] > best[0]:
+                second = seconds[p]
+                best = (float(gains[p, i, j]), second, self.groups[first][i],
+                        self.groups[second][j])
+        if best[1] is None:
+            return 0.0, None, None, None
+        return best
+
+    def swap_gains(self, first: int, seconds: list[int]) -> np.ndarray:
+        """Return an array whose entry [p, i, j] is the amount by which
+        swapping the i-th row of group <first> with the j-th row of group
+        <seconds>[p] increases the sum of the scores of the two groups.
+
+        Preconditions:
+            - first not in seconds
+            - seconds != [] and every group in <seconds> has the same size
+        """
+        new_1, new_2 = self._matrix.score_swaps(
+            self.groups[first], [self.groups[second] for second in seconds])
+        old = np.array([self._scores[second] for second in seconds])
+        return new_1 + new_2 - (self._scores[first] + old[:, None, None])
+
+    def score(self) -> float:
+        """Return the score of <self>.groups, as given by
+        AnswerMatrix.total_score.
+        """
+        return sum(self._scores) / len(self.groups)
+
+    def best_insertion(self, row: int, capacity: int) -> Optional[int]:
+        """Return the position of the group with fewer than <capacity> rows
+        whose score increases the most when <row> joins it, or the first such
+        group if there is a tie. Return None if every group is full.
+
+        Every group with space of the same size is scored at once with
+        AnswerMatrix.score_group_array.
+
+        Preconditions:
+            - <row> is not in any group
+        """
+        by_size = {}
+        for first, group in enumerate(self.groups):
+            if len(group) < capacity:
+                by_size.setdefault(len(group), []).append(first)
+        if not by_size:
+            return None
+
+        firsts, gains = [], []
+        for same_size in by_size.values():
+            joined = self._matrix.score_group_array(
+                np.array([self.groups[first] + [row] for first in same_size]))
+            firsts.extend(same_size)
+            gains.extend(joined - [self._scores[first]
+                                   for first in same_size])
+        order = np.argsort(firsts, kind='stable')
+        return firsts[order[int(np.argmax(np.array(gains)[order]))]]
+
+    def rescore(self, scores: dict[int, float]) -> None:
+        """Replace the score of the group at each position in <scores> with
+        the score it maps to, after the answers of some of its rows, or the
+        weights or criteria of the survey, have changed.
+
+        Preconditions:
+            - scores[first] is the score that AnswerMatrix.score_rows gives
+              to the group at position <first>, for every first in <scores>
+        """
+        for first, score in scores.items():
+            self._scores[first] = score
+
+    def insert(self, first: int, row: int) -> None:
+        """Add <row> to group <first>.
+
+        Preconditions:
+            - <row> is not in any group
+        """
+        self.groups[first].append(row)
+        self._scores[first] = self._matrix.score_rows(self.groups[first])
+
+    def add_group(self, rows: list[int]) -> int:
+        """Add a new group of the rows in <rows> after the others, and return
+        its position.
+
+        Preconditions:
+            - <rows> is non-empty, and no row in it is in any group
+        """
+        self.groups.append(rows)
+        self._scores.append(self._matrix.score_rows(rows))
+        return len(self.groups) - 1
+
+    def swap(self, first: int, row_1: int, second: int, row_2: int) -> None:
+        """Swap <row_1> of group <first> with <row_2> of group <second>.
+
+        Preconditions:
+            - <row_1> is in group <first> and <row_2> is in group <second>
+        """
+        group_1, group_2 = self.groups[first], self.groups[second]
+        group_1[group_1.index(row_1)] = row_2
+        group_2[group_2.index(row_2)] = row_1
+        self._scores[first] = self._matrix.score_rows(group_1)
+        self._scores[second] = self._matrix.score_rows(group_2)
+
+    def refine(self, max_swaps: Optional[int] = None,
+               touched: Optional[set[int]] = None,
+               stats: Optional[SearchStats] = None) -> int:
+        """Make the best swap between each pair of groups that improves them,
+        until no pair of groups can be improved or <max_swaps> swaps have been
+        made, and return the number of swaps made.
+
+        The search is done in passes. In each pass, every dirty group is
+        taken in turn, and the best improving swap between it and another
+        group is made; a pair of two dirty groups is only searched from the
+        first of them. In the first pass every group is dirty, and after that
+        a group is dirty iff it was changed by a swap in the previous pass.
+
+        If <touched> is not None, only the groups at the positions in
+        <touched> are dirty in the first pass, and every group changed by a
+        swap is added to <touched>.
+
+        If <stats> is not None, the deadline of <stats> is checked before
+        every pass, and the search stops once it is out of time. Each pass is
+        recorded in <stats> as one iteration, with the score of the groups
+        after it.
+
+        Preconditions:
+            - max_swaps is None or max_swaps >= 0
+        """
+        swaps = 0
+        if touched is None:
+            dirty = set(range(len(self.groups)))
+        else:
+            dirty = set(touched)
+
+        while dirty:
+            if stats is not None and stats.out_of_time():
+                return swaps
+            changed = set()
+            for first in sorted(dirty):
+                if max_swaps is not None and swaps >= max_swaps:
+                    break
+                others = [second for second in range(len(self.groups))
+                          if second != first
+                          and (second > first or second not in dirty)]
+                if not others:
+                    continue
+                _, second, row_1, row_2 = self.best_swap(first, others)
+                if second is None:
+                    continue
+                self.swap(first, row_1, second, row_2)
+                swaps += 1
+                changed.update((first, second))
+                if touched is not None:
+                    touched.update((first, second))
+            if stats is not None:
+                stats.record(self.score())
+            if max_swaps is not None and swaps >= max_swaps:
+                return swaps
+            dirty = changed
+        return swaps
+
+
+def _swap(lst: list[list[Any]], l_1: int, i_1: int, l_2: int, i_2: int
+          ) -> None:
+    """Swap <lst>[l_1][i_1] and <lst>[l_2][i_2]. Swapping the same positions
+    again undoes the swap.
+    """
+    lst[l_1][i_1], lst[l_2][i_2] = lst[l_2][i_2], lst[l_1][i_1]
 
 
 if __name__ == '__main__':
@@ -500,8 +2411,15 @@ if __name__ == '__main__':
 
     python_ta.check_all(config={'extra-imports': ['typing',
                                                   'random',
+                                                  'numpy',
                                                   'survey',
                                                   'course',
+                                                  'answer_matrix',
+                                                  'cooling',
+                                                  'moves',
                                                   'math',
-                                                  'copy'],
+                                                  'collections',
+                                                  'itertools',
+                                                  'time',
+                                                  'concurrent.futures'],
                                 'disable': ['E9992']})
@@ -0,0 +1,476 @@
+"""CSC148 Assignment 1
+
+=== CSC148 Winter 2023 ===
+Department of Computer Science,
+University of Toronto
+
+This code is provided solely for the personal and private use of
+students taking the CSC148 course at the University of Toronto.
+Copying for purposes other than this use is expressly prohibited.
+All forms of distribution of this code, whether as given or with
+any changes, are expressly prohibited.
+
+Authors: Misha Schwartz, Mario Badr, Christine Murad, Diane Horton,
+Sophia Huynh, Jaisie Sin, Tom Ginsberg, Jonathan Calver, and Jacqueline Smith
+
+All of the files in this directory and all subdirectories are:
+Copyright (c) 2023 Misha Schwartz, Mario Badr, Diane Horton, Sophia Huynh,
+Jonathan Calver, and Jacqueline Smith
+
+=== Module Description ===
+
+This file contains classes that describe the moves simulated annealing makes
+to a list of groups, the kernels that choose a random move, and the proposers
+that supply the random numbers for each iteration of a run.
+"""
+from __future__ import annotations
+from typing import Any, Callable, Optional
+
+import numpy as np
+
+
+class Move:
+    """An abstract class representing a change to a list of groups that can
+    be made in place and undone.
+
+    === Public Attributes ===
+    changed: the indices of the groups that the move changes
+    """
+    changed: tuple[int, ...]
+
+    def apply(self, groups: list[list[Any]]) -> None:
+        """Make this move to <groups>."""
+        raise NotImplementedError
+
+    def exchanges(self, groups: list[list[Any]]
+                  ) -> list[tuple[int, Optional[Any], Optional[Any]]]:
+        """Return (group, added, removed) for each group the move changes,
+        where <added> is the element of <groups> that joins the group and
+        <removed> is the element that leaves it, or None if no element does.
+
+        Preconditions:
+            - This move has not been made to <groups> yet
+        """
+        raise NotImplementedError
+
+    def undo(self, groups: list[list[Any]]) -> None:
+        """Undo this move, which was the last move made to <groups>."""
+        raise NotImplementedError
+
+
+class Swap(Move):
+    """A move that swaps groups[l_1][i_1] and groups[l_2][i_2].
+
+    === Public Attributes ===
+    changed: the indices of the groups that the move changes
+    positions: the positions (l_1, i_1, l_2, i_2) of the swapped elements
+
+    === Representation Invariants ===
+    changed == (positions[0], positions[2])
+    """
+    changed: tuple[int, ...]
+    positions: tuple[int, int, int, int]
+
+    def __init__(self, l_1: int, i_1: int, l_2: int, i_2: int) -> None:
+        """Initialize a move that swaps groups[<l_1>][<i_1>] and
+        groups[<l_2>][<i_2>].
+
+        Preconditions:
+            - l_1 != l_2
+        """
+        self.changed = (l_1, l_2)
+        self.positions = (l_1, i_1, l_2, i_2)
+
+    def apply(self, groups: list[list[Any]]) -> None:
+        """Swap the two elements of <groups>.
+
+        >>> groups = [[1, 2], [3, 4]]
+        >>> Swap(0, 1, 1, 0).apply(groups)
+        >>> groups
+        [[1, 3], [2, 4]]
+        """
+        l_1, i_1, l_2, i_2 = self.positions
+        groups[l_1][i_1], groups[l_2][i_2] = groups[l_2][i_2], groups[l_1][i_1]
+
+    def exchanges(self, groups: list[list[Any]]
+                  ) -> list[tuple[int, Optional[Any], Optional[Any]]]:
+        """Return the element each of the two groups gains and loses."""
+        l_1, i_1, l_2, i_2 = self.positions
+        return [(l_1, groups[l_2][i_2], groups[l_1][i_1]),
+                (l_2, groups[l_1][i_1], groups[l_2][i_2])]
+
+    def undo(self, groups: list[list[Any]]) -> None:
+        """Swap the two elements of <groups> back."""
+        self.apply(groups)
+
+
+class Cycle(Move):
+    """A move that rotates elements between groups: the element at each
+    position moves to the next position, and the element at the last
+    position moves to the first.
+
+    === Public Attributes ===
+    changed: the indices of the groups that the move changes
+    positions: the (group, index) positions of the rotated elements
+
+    === Representation Invariants ===
+    The groups of <positions> are distinct, and are <changed> in order.
+    """
+    changed: tuple[int, ...]
+    positions: list[tuple[int, int]]
+
+    def __init__(self, positions: list[tuple[int, int]]) -> None:
+        """Initialize a move that rotates the elements at <positions>.
+
+        Preconditions:
+            - the groups of <positions> are distinct
+        """
+        self.changed = tuple(group for group, _ in positions)
+        self.positions = positions
+
+    def apply(self, groups: list[list[Any]]) -> None:
+        """Rotate the elements of <groups>.
+
+        >>> groups = [[1], [2], [3]]
+        >>> Cycle([(0, 0), (1, 0), (2, 0)]).apply(groups)
+        >>> groups
+        [[3], [1], [2]]
+        """
+        elements = [groups[l][i] for l, i in self.positions]
+        for j, (l, i) in enumerate(self.positions):
+            groups[l][i] = elements[j - 1]
+
+    def exchanges(self, groups: list[list[Any]]
+                  ) -> list[tuple[int, Optional[Any], Optional[Any]]]:
+        """Return the element each of the groups gains from the position
+        before it and loses to the position after it.
+        """
+        elements = [groups[l][i] for l, i in self.positions]
+        return [(l, elements[j - 1], elements[j])
+                for j, (l, _) in enumerate(self.positions)]
+
+    def undo(self, groups: list[list[Any]]) -> None:
+        """Rotate the elements of <groups> back."""
+        elements = [groups[l][i] for l, i in self.positions]
+        for j, (l, i) in enumerate(self.positions):
+            groups[l][i] = elements[(j + 1) % len(elements)]
+
+
+class Transfer(Move):
+    """A move that takes groups[source][index] out of its group and adds it
+    to the end of groups[target], so the two groups change size.
+
+    === Public Attributes ===
+    changed: the indices of the groups that the move changes
+    source: the group the element is taken from
+    index: the index of the element in its group before the move
+    target: the group the element is added to
+    """
+    changed: tuple[int, ...]
+    source: int
+    index: int
+    target: int
+
+    def __init__(self, source: int, index: int, target: int) -> None:
+        """Initialize a move of groups[<source>][<index>] to groups[<target>].
+
+        Preconditions:
+            - source != target
+        """
+        self.changed = (source, target)
+        self.source = source
+        self.index = index
+        self.target = target
+
+    def apply(self, groups: list[list[Any]]) -> None:
+        """Move the element of <groups> to its target group.
+
+        >>> groups = [[1, 2, 3], [4]]
+        >>> Transfer(0, 1, 1).apply(groups)
+        >>> groups
+        [[1, 3], [4, 2]]
+        """
+        groups[self.target].append(groups[self.source].pop(self.index))
+
+    def exchanges(self, groups: list[list[Any]]
+                  ) -> list[tuple[int, Optional[Any], Optional[Any]]]:
+        """Return the element that leaves the source group and joins the
+        target group.
+        """
+        element = groups[self.source][self.index]
+        return [(self.source, None, element), (self.target, element, None)]
+
+    def undo(self, groups: list[list[Any]]) -> None:
+        """Move the element of <groups> back to where it was."""
+        groups[self.source].insert(self.index, groups[self.target].pop())
+
+
+class MoveKernel:
+    """An abstract class representing a way of choosing a random move to a
+    list of groups from a stream of random numbers.
+    """
+
+    def propose(self, groups: list[list[Any]], scores: list[float],
+                draw: Callable[[], float]) -> Move:
+        """Return a random move to <groups>, whose group scores are <scores>.
+        Each call to <draw> returns the next uniform random number in [0, 1).
+
+        Preconditions:
+            - len(groups) >= 2
+            - each group in <groups> has length >= 1
+            - len(scores) == len(groups)
+        """
+        raise NotImplementedError
+
+
+class SwapKernel(MoveKernel):
+    """A kernel that swaps two random elements in two distinct random
+    groups, like random_swap.
+    """
+
+    def propose(self, groups: list[list[Any]], scores: list[float],
+                draw: Callable[[], float]) -> Move:
+        """Return a swap of two random elements of <groups> that are in
+        different groups.
+        """
+        l_1, l_2 = _distinct_groups(len(groups), 2, draw)
+        return _random_swap(groups, l_1, l_2, draw)
+
+
+class CycleKernel(MoveKernel):
+    """A kernel that rotates three random elements between three distinct
+    random groups, which makes changes that would take two swaps, the first
+    of which may not be accepted on its own.
+
+    Lists of only two groups get a swap instead.
+    """
+
+    def propose(self, groups: list[list[Any]], scores: list[float],
+                draw: Callable[[], float]) -> Move:
+        """Return a rotation of three random elements of <groups> that are in
+        different groups.
+        """
+        if len(groups) < 3:
+            return SwapKernel().propose(groups, scores, draw)
+        return Cycle([(l, int(draw() * len(groups[l])))
+                      for l in _distinct_groups(len(groups), 3, draw)])
+
+
+class TransferKernel(MoveKernel):
+    """A kernel that moves an element from one group to another some of the
+    time, and swaps two elements otherwise.
+
+    Transfers keep the sizes of the groups that a Grouper may make: no group
+    grows larger than the largest group, and at most one group is smaller
+    than it. So the only transfers are from a largest group to a group with
+    one element fewer, which changes which group is the smaller one. When
+    there is no such transfer, a swap is made instead. In particular, when
+    every group has the same size, as when the number of students is a
+    multiple of the group size, no transfer is possible and this kernel
+    only makes swaps, like a SwapKernel.
+
+    === Public Attributes ===
+    rate: the fraction of moves that are transfers
+
+    === Representation Invariants ===
+    0 <= rate <= 1
+    """
+    rate: float
+
+    def __init__(self, rate: float = 0.5) -> None:
+        """Initialize a kernel that makes a fraction <rate> of transfers.
+
+        Preconditions:
+            - 0 <= rate <= 1
+        """
+        self.rate = rate
+
+    def propose(self, groups: list[list[Any]], scores: list[float],
+                draw: Callable[[], float]) -> Move:
+        """Return a move of a random element of a random largest group of
+        <groups> to the group with one element fewer, or a swap.
+
+        Preconditions:
+            - At most one group in <groups> is smaller than the largest one
+        """
+        if draw() < self.rate:
+            capacity = max(len(group) for group in groups)
+            targets = [l for l, group in enumerate(groups)
+                       if len(group) == capacity - 1]
+            if targets:
+                sources = [l for l, group in enumerate(groups)
+                           if len(group) == capacity]
+                source = sources[int(draw() * len(sources))]
+                return Transfer(source, int(draw() * capacity), targets[0])
+        return SwapKernel().propose(groups, scores, draw)
+
+
+class WorstGroupKernel(MoveKernel):
+    """A kernel that swaps an element of the group with the lowest score
+    with an element of a random other group some of the time, and swaps two
+    random elements otherwise.
+
+    === Public Attributes ===
+    bias: the fraction of swaps that involve the group with the lowest score
+
+    === Representation Invariants ===
+    0 <= bias <= 1
+    """
+    bias: float
+
+    def __init__(self, bias: float = 0.5) -> None:
+        """Initialize a kernel where a fraction <bias> of the swaps involve
+        the group with the lowest score.
+
+        Preconditions:
+            - 0 <= bias <= 1
+        """
+        self.bias = bias
+
+    def propose(self, groups: list[list[Any]], scores: list[float],
+                draw: Callable[[], float]) -> Move:
+        """Return a swap between the group with the lowest score in <scores>
+        (the first one, if there is a tie) and a random other group, or
+        between two random groups.
+        """
+        if draw() >= self.bias:
+            return SwapKernel().propose(groups, scores, draw)
+        worst = scores.index(min(scores))
+        other = int(draw() * (len(groups) - 1))
+        if other >= worst:
+            other += 1
+        return _random_swap(groups, worst, other, draw)
+
+
+class MoveProposer:
+    """An abstract class representing the source of the moves and acceptance
+    tests of one run of simulated annealing.
+
+    A proposer is restarted at the beginning of every run, so the same
+    proposer can be used for many runs.
+    """
+
+    def start(self, seed: int) -> None:
+        """Restart this proposer for a run whose first iteration has seed
+        <seed>.
+        """
+        raise NotImplementedError
+
+    def propose(self, groups: list[list[Any]], scores: list[float],
+                seed: int) -> Move:
+        """Return the move of the iteration with seed <seed> to <groups>,
+        whose group scores are <scores>. Iterations are asked for in order.
+
+        Preconditions:
+            - len(groups) >= 2
+            - each group in <groups> has length >= 1
+            - len(scores) == len(groups)
+        """
+        raise NotImplementedError
+
+    def uniform(self, seed: int) -> float:
+        """Return a uniform random number in [0, 1) for deciding whether to
+        accept a move that lowers the score, in the iteration with seed
+        <seed>.
+        """
+        raise NotImplementedError
+
+
+class BatchProposer(MoveProposer):
+    """A proposer that draws the random numbers for every move and acceptance
+    test of a run from one numpy generator, <batch> numbers at a time.
+
+    A run that starts with seed s gives the same moves whatever the seeds of
+    its iterations, so a run depends only on s and the kernel. The moves are
+    not the same as those of random_swap.
+
+    === Private Attributes ===
+    _kernel: the kernel that chooses each move
+    _batch: the number of random numbers drawn from the generator at once
+    _generator: the generator of the current run
+    _numbers: the last batch of random numbers drawn
+    _next: the index in <_numbers> of the next number to use
+
+    === Representation Invariants ===
+    _batch > 0
+    0 <= _next <= len(_numbers)
+    """
+    _kernel: MoveKernel
+    _batch: int
+    _generator: np.random.Generator
+    _numbers: list[float]
+    _next: int
+
+    def __init__(self, kernel: Optional[MoveKernel] = None,
+                 batch: int = 4096) -> None:
+        """Initialize a proposer whose moves are chosen by <kernel>, which is
+        a SwapKernel if <kernel> is None, and that draws <batch> random
+        numbers at a time.
+
+        Preconditions:
+            - batch > 0
+        """
+        if kernel is None:
+            kernel = SwapKernel()
+        self._kernel = kernel
+        self._batch = batch
+        self.start(0)
+
+    def start(self, seed: int) -> None:
+        """Restart this proposer with a new generator seeded with <seed>."""
+        self._generator = np.random.default_rng(seed)
+        self._numbers = []
+        self._next = 0
+
+    def propose(self, groups: list[list[Any]], scores: list[float],
+                seed: int) -> Move:
+        """Return the next move to <groups> chosen by the kernel."""
+        return self._kernel.propose(groups, scores, self._draw)
+
+    def uniform(self, seed: int) -> float:
+        """Return the next random number."""
+        return self._draw()
+
+    def _draw(self) -> float:
+        """Return the next random number, drawing a new batch from the
+        generator if the last one has been used up.
+        """
+        if self._next == len(self._numbers):
+            self._numbers = self._generator.random(self._batch).tolist()
+            self._next = 0
+        self._next += 1
+        return self._numbers[self._next - 1]
+
+
+def _distinct_groups(groups: int, count: int,
+                     draw: Callable[[], float]) -> list[int]:
+    """Return <count> distinct random indices of a list of <groups> groups,
+    using one number from <draw> for each.
+
+    Preconditions:
+        - 1 <= count <= groups
+    """
+    chosen = []
+    for k in range(count):
+        index = int(draw() * (groups - k))
+        for other in sorted(chosen):
+            if index >= other:
+                index += 1
+        chosen.append(index)
+    return chosen
+
+
+def _random_swap(groups: list[list[Any]], l_1: int, l_2: int,
+                 draw: Callable[[], float]) -> Swap:
+    """Return a swap of a random element of groups[<l_1>] and a random
+    element of groups[<l_2>].
+    """
+    return Swap(l_1, int(draw() * len(groups[l_1])),
+                l_2, int(draw() * len(groups[l_2])))
+
+
+if __name__ == '__main__':
+    import python_ta
+
+    python_ta.check_all(config={'extra-imports': ['typing', 'numpy'],
+                                'disable': ['E9992']})
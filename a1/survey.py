@@ -23,10 +23,16 @@ This file contains a class that describes a survey as well as classes that
 describe different types of questions that can be asked on a survey.
 """
 from __future__ import annotations
-from typing import TYPE_CHECKING, Union
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Optional, Union
+
+import numpy as np
+
+from answer_matrix import AnswerMatrix
 from criterion import InvalidAnswerError, HomogeneousCriterion
 
 if TYPE_CHECKING:
+    from answer_matrix import GroupState
     from criterion import Criterion
     from grouper import Grouping
     from course import Student
@@ -77,6 +83,70 @@ class Question:
         """
         raise NotImplementedError
 
+    def get_trusted_similarity(self, answer1: Answer, answer2: Answer) -> float:
+        """Return the same similarity as get_similarity, without checking that
+        <answer1> and <answer2> are valid answers to this question.
+
+        Use this only for answers that are already known to be valid.
+
+        Preconditions:
+            - <answer1> and <answer2> are both valid answers to this question
+        """
+        return self.get_similarity(answer1, answer2)
+
+    def encode_answer(self, answer: Answer) -> Union[int, float]:
+        """Return a number that encodes <answer> so that it can be stored in
+        an AnswerMatrix.
+
+        Two valid answers to this question are encoded as the same number iff
+        they have identical content.
+
+        Preconditions:
+            - <answer> is a valid answer to this question
+        """
+        raise NotImplementedError
+
+    def similarity_matrix(self, codes: np.ndarray,
+                          others: Optional[np.ndarray] = None) -> np.ndarray:
+        """Return an array whose entry [i, j] is the similarity between the
+        answers encoded as <codes>[i] and <others>[j].
+
+        If <others> is None, compare <codes> with itself. If <codes> and
+        <others> have the same leading dimensions, each group of answers
+        along the last dimension is compared separately: entry [..., i, j] is
+        the similarity between <codes>[..., i] and <others>[..., j].
+
+        Preconditions:
+            - Every element of <codes> and <others> was returned by
+              self.encode_answer for a valid answer to this question
+        """
+        raise NotImplementedError
+
+    def mean_similarity(self, codes: np.ndarray) -> float:
+        """Return the average similarity of every pair of distinct answers
+        encoded as <codes>.
+
+        Subclasses may override this method with a faster way of computing
+        the same average.
+
+        Preconditions:
+            - len(codes) > 1
+            - Every element of <codes> was returned by self.encode_answer for a
+              valid answer to this question
+        """
+        upper = np.triu_indices(len(codes), 1)
+        return float(self.similarity_matrix(codes)[upper].mean())
+
+    def answer_counts(self, codes: np.ndarray) -> np.ndarray:
+        """Return an array containing, for each distinct answer encoded in
+        <codes>, the number of times it occurs in <codes>.
+
+        Preconditions:
+            - Every element of <codes> was returned by self.encode_answer for a
+              valid answer to this question
+        """
+        return np.unique(codes, return_counts=True)[1]
+
 
 class MultipleChoiceQuestion(Question):
     """A question whose answers can be one of several options
@@ -136,11 +206,73 @@ class MultipleChoiceQuestion(Question):
                 or not self.validate_answer(answer2):
             raise ValueError
 
+        return self.get_trusted_similarity(answer1, answer2)
+
+    def get_trusted_similarity(self, answer1: Answer, answer2: Answer) -> float:
+        """Return the same similarity as get_similarity, without checking that
+        <answer1> and <answer2> are valid answers to this question.
+
+        Preconditions:
+            - <answer1> and <answer2> are both valid answers to this question.
+        """
         if answer1.content == answer2.content:
             return 1.0
 
         return 0.0
 
+    def encode_answer(self, answer: Answer) -> int:
+        """Return the position of <answer>.content in the answer options for
+        this question.
+
+        Preconditions:
+            - <answer> is a valid answer to this question
+        """
+        return self._options.index(answer.content)
+
+    def similarity_matrix(self, codes: np.ndarray,
+                          others: Optional[np.ndarray] = None) -> np.ndarray:
+        """Return an array whose entry [i, j] is 1.0 iff <codes>[i] and
+        <others>[j] encode the same option and 0.0 otherwise.
+
+        If <others> is None, compare <codes> with itself.
+
+        Preconditions:
+            - Every element of <codes> and <others> was returned by
+              self.encode_answer for a valid answer to this question
+        """
+        if others is None:
+            others = codes
+        return (codes[..., :, None] == others[..., None, :]).astype(float)
+
+    def mean_similarity(self, codes: np.ndarray) -> float:
+        """Return the average similarity of every pair of distinct answers
+        encoded as <codes>, in O(k) time for k answers.
+
+        Two answers are only similar if they are the same option, so the
+        average similarity is the number of pairs of answers that chose the
+        same option over the number of pairs of answers.
+
+        Preconditions:
+            - len(codes) > 1
+            - Every element of <codes> was returned by self.encode_answer for a
+              valid answer to this question
+        """
+        counts = self.answer_counts(codes)
+        k = len(codes)
+        return float((counts * (counts - 1)).sum()) / (k * (k - 1))
+
+    def answer_counts(self, codes: np.ndarray) -> np.ndarray:
+        """Return an array containing, for each option chosen in <codes>, the
+        number of times it was chosen.
+
+        Preconditions:
+            - Every element of <codes> was returned by self.encode_answer for a
+              valid answer to this question
+        """
+        counts = np.bincount(np.asarray(codes, dtype=int),
+                             minlength=len(self._options))
+        return counts[counts > 0]
+
 
 class NumericQuestion(Question):
     """A question whose answer can be an integer between some minimum and
@@ -222,9 +354,63 @@ class NumericQuestion(Question):
                 or not self.validate_answer(answer2):
             raise ValueError
 
+        return self.get_trusted_similarity(answer1, answer2)
+
+    def get_trusted_similarity(self, answer1: Answer, answer2: Answer) -> float:
+        """Return the same similarity as get_similarity, without checking that
+        <answer1> and <answer2> are valid answers to this question.
+
+        Preconditions:
+            - <answer1> and <answer2> are both valid answers to this question
+        """
         return 1.0 - (abs(answer2.content - answer1.content)
                       / abs(self._max - self._min))
 
+    def encode_answer(self, answer: Answer) -> float:
+        """Return the content of <answer> as a float.
+
+        Preconditions:
+            - <answer> is a valid answer to this question
+        """
+        return float(answer.content)
+
+    def similarity_matrix(self, codes: np.ndarray,
+                          others: Optional[np.ndarray] = None) -> np.ndarray:
+        """Return an array whose entry [i, j] is the similarity between the
+        answers <codes>[i] and <others>[j], as defined by get_similarity.
+
+        If <others> is None, compare <codes> with itself.
+
+        Preconditions:
+            - Every element of <codes> and <others> was returned by
+              self.encode_answer for a valid answer to this question
+        """
+        if others is None:
+            others = codes
+        return 1.0 - (np.abs(codes[..., :, None] - others[..., None, :])
+                      / abs(self._max - self._min))
+
+    def mean_similarity(self, codes: np.ndarray) -> float:
+        """Return the average similarity of every pair of distinct answers
+        <codes>, in O(k log k) time for k answers.
+
+        The average similarity is 1.0 minus the average absolute difference
+        of a pair of answers divided by the range of possible answers. Once
+        the answers are sorted, the i-th smallest of k answers (counting from
+        0) is added to the total difference once for each of the i smaller
+        answers and subtracted once for each of the k - 1 - i larger answers.
+
+        Preconditions:
+            - len(codes) > 1
+            - Every element of <codes> was returned by self.encode_answer for a
+              valid answer to this question
+        """
+        values = np.sort(np.asarray(codes, dtype=float))
+        k = len(values)
+        total_difference = float(values @ (2 * np.arange(k) - (k - 1)))
+        mean_difference = total_difference / (k * (k - 1) / 2)
+        return 1.0 - mean_difference / abs(self._max - self._min)
+
 
 class YesNoQuestion(MultipleChoiceQuestion):
     """A question whose answer is either yes (represented by True) or
@@ -259,19 +445,24 @@ class CheckboxQuestion(MultipleChoiceQuestion):
 
     === Private Attributes ===
     _options: the optsions for this CheckboxQuestion
+    _bits: a dictionary mapping each option to the bit that represents it in
+        an encoded answer
 
     === Representation Invariants ===
     text is not the empty string
+    _bits[_options[i]] == 1 << i for every index i of _options
     """
     id: int
     text: str
     _options: list[str]
+    _bits: dict[str, int]
 
     def __init__(self, id_: int, text: str, options: list[str]) -> None:
         """Initialize this question with the text <text> and id <id> and
         possible answers given in <options>.
         """
         MultipleChoiceQuestion.__init__(self, id_, text, options)
+        self._bits = {option: 1 << i for i, option in enumerate(options)}
 
     def validate_answer(self, answer: Answer) -> bool:
         """Return True iff <answer> is a valid answer to this question.
@@ -315,13 +506,71 @@ class CheckboxQuestion(MultipleChoiceQuestion):
                 or not self.validate_answer(answer2):
             raise ValueError
 
-        common = 0
+        return self.get_trusted_similarity(answer1, answer2)
+
+    def get_trusted_similarity(self, answer1: Answer, answer2: Answer) -> float:
+        """Return the same similarity as get_similarity, without checking that
+        <answer1> and <answer2> are valid answers to this question.
+
+        Preconditions:
+            - <answer1> and <answer2> are both valid answers to this question
+        """
+        mask1 = self.encode_answer(answer1)
+        mask2 = self.encode_answer(answer2)
+
+        return (mask1 & mask2).bit_count() / (mask1 | mask2).bit_count()
+
+    def encode_answer(self, answer: Answer) -> int:
+        """Return a bitmask of the options chosen in <answer>, where bit i is
+        set iff the i-th answer option of this question was chosen.
+
+        Preconditions:
+            - <answer> is a valid answer to this question
+        """
+        mask = 0
+        for item in answer.content:
+            mask |= self._bits[item]
+        return mask
+
+    def similarity_matrix(self, codes: np.ndarray,
+                          others: Optional[np.ndarray] = None) -> np.ndarray:
+        """Return an array whose entry [i, j] is the similarity between the
+        answers encoded as <codes>[i] and <others>[j], as defined by
+        get_similarity.
 
-        for item in answer1.content:
-            if item in answer2.content:
-                common += 1
+        If <others> is None, compare <codes> with itself.
 
-        return common / len(set(answer1.content + answer2.content))
+        Preconditions:
+            - Every element of <codes> and <others> was returned by
+              self.encode_answer for a valid answer to this question
+        """
+        if others is None:
+            others = codes
+        common = codes[..., :, None] & others[..., None, :]
+        total = codes[..., :, None] | others[..., None, :]
+        return (_popcount(common, len(self._options))
+                / _popcount(total, len(self._options)))
+
+    def mean_similarity(self, codes: np.ndarray) -> float:
+        """Return the average similarity of every pair of distinct answers
+        encoded as <codes>.
+
+        Preconditions:
+            - len(codes) > 1
+            - Every element of <codes> was returned by self.encode_answer for a
+              valid answer to this question
+        """
+        return Question.mean_similarity(self, codes)
+
+    def answer_counts(self, codes: np.ndarray) -> np.ndarray:
+        """Return an array containing, for each distinct set of options chosen
+        in <codes>, the number of times it was chosen.
+
+        Preconditions:
+            - Every element of <codes> was returned by self.encode_answer for a
+              valid answer to this question
+        """
+        return Question.answer_counts(self, codes)
 
 
 class Answer:
@@ -339,7 +588,24 @@ class Answer:
 
     def is_valid(self, question: Question) -> bool:
         """Return True iff this answer is a valid answer to <question>"""
-        return question.validate_answer(self.content)
+        return question.validate_answer(self)
+
+
+def _popcount(masks: np.ndarray, width: int) -> np.ndarray:
+    """Return an array containing the number of bits that are set in each
+    element of <masks>.
+
+    Preconditions:
+        - Every element of <masks> is a non-negative integer less than
+          2 ** <width>
+    """
+    if masks.dtype != object and hasattr(np, 'bitwise_count'):
+        return np.bitwise_count(masks)
+
+    counts = np.zeros(masks.shape, dtype=int)
+    for bit in range(width):
+        counts += ((masks >> bit) & 1).astype(int)
+    return counts
 
 
 class Survey:
@@ -352,12 +618,26 @@ class Survey:
     _criteria: a dictionary mapping a question's id to its associated criterion
     _weights: a dictionary mapping a question's id to a weight -- an integer
               representing the importance of this criteria.
+    _cache: None if score caching is turned off. Otherwise, a dictionary
+            mapping a frozenset of (student id, student revision) pairs to
+            the score of that group of students, ordered from least to most
+            recently used.
+    _cache_size: the maximum number of scores kept in _cache
+    _cache_hits: the number of scores returned from _cache
+    _cache_misses: the number of scores computed while caching was turned on
+    _revision: the number of times a weight or criterion has been set
+    _question_revisions: a dictionary mapping the id of each question whose
+              weight or criterion has been set to what _revision was right
+              after it was last set
+    _cache_similarities: whether the answer matrices that groupers build for
+              this survey cache the similarities of every pair of students
 
     === Representation Invariants ===
     No two questions on this survey have the same id
     Each key in _questions equals the id attribute of its value
     The dictionaries _questions, _criteria, and _weights all have the same keys
     Each value in _weights is greater than 0
+    _cache is None or len(_cache) <= _cache_size
 
     NOTE: The weights associated with the questions in a survey do NOT have to
           sum up to any particular amount.
@@ -365,6 +645,13 @@ class Survey:
     _questions: dict[int, Question]
     _criteria: dict[int, Criterion]
     _weights: dict[int, int]
+    _cache: Optional[OrderedDict[frozenset[tuple[int, int]], float]]
+    _cache_size: int
+    _cache_hits: int
+    _cache_misses: int
+    _revision: int
+    _question_revisions: dict[int, int]
+    _cache_similarities: bool
 
     def __init__(self, questions: list[Question]) -> None:
         """Initialize a new survey that contains every question in <questions>.
@@ -372,9 +659,16 @@ class Survey:
         This new survey should use a HomogeneousCriterion as a default criterion
         and should use 1 as a default weight.
         """
-        self._questions ={}
+        self._questions = {}
         self._criteria = {}
         self._weights = {}
+        self._cache = None
+        self._cache_size = 0
+        self._cache_hits = 0
+        self._cache_misses = 0
+        self._revision = 0
+        self._question_revisions = {}
+        self._cache_similarities = False
 
         for question in questions:
             self._questions[question.id] = question
@@ -397,43 +691,52 @@ class Survey:
 
         You can choose the precise format of this string.
         """
-        s = ""
-
-        last_question = self._questions[self._questions.keys()[-1]]
+        return "\n".join(str(question) for question in self.get_questions())
 
-        for id in self._questions.popitem()
-            s += self._questions[id] + ", "
+    def get_questions(self) -> list[Question]:
+        """Return a list of all questions in this survey """
+        return list(self._questions.values())
 
-        s += last_question
+    def _get_criterion(self, question: Question) -> Criterion:
+        """Return the criterion associated with <question> in this survey.
 
-        return s
+        Preconditions:
+            - <question>.id occurs in this survey
+        """
+        return self.get_criterion(question)
 
-    def get_questions(self) -> list[Question]:
-        """Return a list of all questions in this survey """
-        listy = []
-        for key in self._questions
-            listy.append(self._questions[key])
+    def _get_weight(self, question: Question) -> int:
+        """Return the weight associated with <question> in this survey.
 
-        return listy
+        Preconditions:
+            - <question>.id occurs in this survey
+        """
+        return self.get_weight(question)
 
-    def _get_criterion(self, question: Question) -> Criterion:
+    def get_criterion(self, question: Question) -> Criterion:
         """Return the criterion associated with <question> in this survey.
 
+        Classes outside this module that score groups for this survey, such
+        as AnswerMatrix, read criteria with this method.
+
         Preconditions:
             - <question>.id occurs in this survey
         """
         return self._criteria[question.id]
 
-    def _get_weight(self, question: Question) -> int:
+    def get_weight(self, question: Question) -> int:
         """Return the weight associated with <question> in this survey.
 
+        Classes outside this module that score groups for this survey, such
+        as AnswerMatrix, read weights with this method.
+
         Preconditions:
             - <question>.id occurs in this survey
         """
         if question.id not in self._questions:
             raise ValueError
 
-        return self._criteria[question.id]
+        return self._weights[question.id]
 
     def set_weight(self, weight: int, question: Question) -> bool:
         """Set the weight associated with <question> to <weight> and
@@ -446,6 +749,8 @@ class Survey:
             return False
 
         self._weights[question.id] = weight
+        self._clear_cache()
+        self._touch(question)
         return True
 
     def set_criterion(self, criterion: Criterion, question: Question) -> bool:
@@ -459,8 +764,89 @@ class Survey:
             return False
 
         self._criteria[question.id] = criterion
+        self._clear_cache()
+        self._touch(question)
         return True
 
+    def _touch(self, question: Question) -> None:
+        """Record that the weight or criterion of <question> has been set."""
+        self._revision += 1
+        self._question_revisions[question.id] = self._revision
+
+    def get_revision(self) -> int:
+        """Return a number that changes every time a weight or criterion in
+        this survey is set.
+        """
+        return self._revision
+
+    def changed_questions(self, revision: int) -> set[int]:
+        """Return the ids of the questions whose weight or criterion has been
+        set since get_revision returned <revision>.
+        """
+        return {question_id
+                for question_id, changed in self._question_revisions.items()
+                if changed > revision}
+
+    def enable_cache(self, max_size: int = 10 ** 5) -> None:
+        """Start remembering the scores returned by score_students, keeping at
+        most <max_size> of the most recently used scores.
+
+        A remembered score is used again for the same group of students, in
+        any order, unless one of their answers, or a weight or criterion in
+        this survey, has changed since it was computed.
+
+        Preconditions:
+            - max_size > 0
+        """
+        self._cache = OrderedDict()
+        self._cache_size = max_size
+        self._cache_hits = 0
+        self._cache_misses = 0
+
+    def disable_cache(self) -> None:
+        """Stop remembering the scores returned by score_students and forget
+        every score remembered so far.
+        """
+        self._cache = None
+
+    def enable_similarity_cache(self) -> None:
+        """Make the answer matrices that groupers build for this survey cache
+        the similarity of every pair of students, as float32, for each
+        question scored with a criterion that only depends on pairwise
+        similarities. Scores computed from these cached similarities are only
+        accurate to float32 precision.
+        """
+        self._cache_similarities = True
+
+    def disable_similarity_cache(self) -> None:
+        """Make the answer matrices that groupers build for this survey
+        compute similarities again every time a group is scored.
+        """
+        self._cache_similarities = False
+
+    def caches_similarities(self) -> bool:
+        """Return whether the answer matrices that groupers build for this
+        survey cache pairwise similarities.
+        """
+        return self._cache_similarities
+
+    def get_cache_stats(self) -> dict[str, int]:
+        """Return a dictionary with the number of score_students calls that
+        used a remembered score ('hits'), the number that had to compute a
+        score ('misses') and the number of scores currently remembered
+        ('size') since enable_cache was last called.
+        """
+        return {'hits': self._cache_hits,
+                'misses': self._cache_misses,
+                'size': 0 if self._cache is None else len(self._cache)}
+
+    def _clear_cache(self) -> None:
+        """Forget every score remembered by score_students, if score caching
+        is turned on.
+        """
+        if self._cache is not None:
+            self._cache.clear()
+
     def score_students(self, students: list[Student]) -> float:
         """Return a quality score for <students> calculated based on their
         answers to the questions in this survey, and the associated criterion
@@ -484,7 +870,152 @@ class Survey:
             survey
             - len(students) > 0
         """
-        # TODO: implement this method!
+        if self._cache is None:
+            return self._score_students(students)
+
+        key = frozenset((student.id, student.get_revision())
+                        for student in students)
+        if key in self._cache:
+            self._cache_hits += 1
+            self._cache.move_to_end(key)
+            return self._cache[key]
+
+        self._cache_misses += 1
+        score = self._score_students(students)
+        self._cache[key] = score
+        if len(self._cache) > self._cache_size:
+            self._cache.popitem(last=False)
+        return score
+
+    def _score_students(self, students: list[Student]) -> float:
+        """Return the score of <students>, as described in score_students,
+        without using remembered scores.
+
+        Preconditions:
+            - All students in <students> have an answer to all questions in this
+            survey
+            - len(students) > 0
+        """
+        if not self._questions:
+            return 0.0
+
+        # Student.has_answer validates each answer only once, so the criteria
+        # can skip validating every pair of answers again.
+        for question in self._questions.values():
+            for student in students:
+                if not student.has_answer(question):
+                    return 0.0
+
+        total = 0.0
+        try:
+            for question in self._questions.values():
+                answers = [student.get_answer(question)
+                           for student in students]
+                criterion = self._get_criterion(question)
+                score = criterion.score_valid_answers(question, answers)
+                total += score * self._get_weight(question)
+        except InvalidAnswerError:
+            return 0.0
+
+        return total / len(self._questions)
+
+    def score_many(self, base_members: list[Student],
+                   candidates: list[Student]) -> np.ndarray:
+        """Return an array whose i-th entry is the score that score_students
+        would give to <base_members> + [<candidates>[i]], up to rounding.
+
+        Every student's answers are encoded once and all the candidate groups
+        are scored together, instead of scoring each candidate group from
+        scratch. The scores keep running sums, so they can differ from those
+        of score_students in their last bits; use best_addition to choose
+        among candidates that may tie.
+
+        Preconditions:
+            - All students in <base_members> and <candidates> have an answer
+              to all questions in this survey
+            - No student in <candidates> is in <base_members>
+        """
+        try:
+            matrix = AnswerMatrix(list(base_members) + list(candidates), self,
+                                  cache_similarities=False)
+        except NotImplementedError:
+            return np.array([self.score_students(list(base_members) + [student])
+                             for student in candidates], dtype=float)
+
+        k = len(base_members)
+        return matrix.score_many(list(range(k)),
+                                 list(range(k, k + len(candidates))))
+
+    def best_addition(self, base_members: list[Student],
+                      candidates: list[Student]) -> Student:
+        """Return the first student in <candidates> among those that give
+        <base_members> and that student the highest score_students.
+
+        The candidates are scored together, as in score_many, and only those
+        whose scores are within rounding error of the highest are scored
+        again one at a time (see AnswerMatrix.best_addition), so ties are
+        broken exactly as by comparing the scores of score_students.
+
+        Preconditions:
+            - len(candidates) > 0
+            - No student in <candidates> is in <base_members>
+        """
+        members = list(base_members)
+        try:
+            matrix = AnswerMatrix(members + list(candidates), self,
+                                  cache_similarities=False)
+        except NotImplementedError:
+            scores = [self.score_students(members + [student])
+                      for student in candidates]
+            return candidates[int(np.argmax(scores))]
+
+        k = len(members)
+        rows = np.arange(k, k + len(candidates))
+        scores = matrix.score_many(list(range(k)), rows.tolist())
+        return candidates[matrix.best_addition(list(range(k)), rows, scores)]
+
+    def score_groups(self, groups: list[list[Student]]) -> np.ndarray:
+        """Return an array whose i-th entry is the score that score_students
+        would give to <groups>[i].
+
+        Each student's answers are encoded once, even if they appear in more
+        than one group.
+
+        Preconditions:
+            - All students in <groups> have an answer to all questions in this
+              survey
+            - Every group in <groups> is non-empty
+        """
+        rows = {}
+        for group in groups:
+            for student in group:
+                rows.setdefault(student.id, (len(rows), student))
+        students = [student for _, student in rows.values()]
+
+        try:
+            matrix = AnswerMatrix(students, self, cache_similarities=False)
+        except NotImplementedError:
+            return np.array([self.score_students(group) for group in groups],
+                            dtype=float)
+
+        return matrix.score_groups([[rows[student.id][0] for student in group]
+                                    for group in groups])
+
+    def group_state(self, students: list[Student],
+                    members: list[Student]) -> GroupState:
+        """Return a GroupState that scores the group of <members> and can be
+        updated as students in <students> join and leave it.
+
+        The rows of the state are positions in <students>: row i is
+        <students>[i].
+
+        Preconditions:
+            - All students in <students> have an answer to all questions in
+              this survey
+            - <members> is non-empty and every student in it is in <students>
+        """
+        matrix = AnswerMatrix(students, self, cache_similarities=False)
+        return matrix.group_state([matrix.row(student) for student in members])
 
     def score_grouping(self, grouping: Grouping) -> float:
         """Return a score for <grouping> calculated based on the answers of
@@ -500,13 +1031,21 @@ class Survey:
             - All students in the groups in <grouping> have an answer to
               all questions in this survey
         """
-        # TODO: implement this method!
+        groups = grouping.get_groups()
+        if not groups:
+            return 0.0
+
+        return sum(self.score_students(group.get_members())
+                   for group in groups) / len(groups)
 
 
 if __name__ == '__main__':
     import python_ta
 
     python_ta.check_all(config={'extra-imports': ['typing',
+                                                  'collections',
+                                                  'numpy',
+                                                  'answer_matrix',
                                                   'criterion',
                                                   'course',
                                                   'grouper'],
@@ -5,6 +5,102 @@
 # You may need to import pytest in order to run your tests.
 # You are free to import hypothesis and use hypothesis for testing.
 # This file will not be graded for style with PythonTA
+import itertools
+import random
+import time
+
+import numpy as np
+import pytest
+
+import cooling
+import course
+import criterion
+import grouper
+import moves
+import survey
+from answer_matrix import AnswerMatrix, GreedyScorer
+
+
+@pytest.fixture
+def questions() -> list[survey.Question]:
+    return [survey.MultipleChoiceQuestion(1, 'why?', ['a', 'b', 'c']),
+            survey.NumericQuestion(2, 'what?', -2, 4),
+            survey.YesNoQuestion(3, 'really?'),
+            survey.CheckboxQuestion(4, 'how?', ['a', 'b', 'c'])]
+
+
+@pytest.fixture
+def answers() -> list[list[survey.Answer]]:
+    return [[survey.Answer(x) for x in ['a', 'b', 'a', 'b', 'c', 'a']],
+            [survey.Answer(x) for x in [0, 4, -1, 1, 3, 0]],
+            [survey.Answer(x) for x in [True, False, True, True, False, True]],
+            [survey.Answer(x) for x in [['a', 'b'], ['a', 'b'], ['a'], ['b'],
+                                        ['c', 'a'], ['b', 'c', 'a']]]]
+
+
+@pytest.fixture
+def students(questions, answers) -> list[course.Student]:
+    names = ['Zoro', 'Aaron', 'Gertrude', 'Yvette', 'Mabel', 'Otto']
+    students = [course.Student(i + 1, name) for i, name in enumerate(names)]
+    for i, student in enumerate(students):
+        for j, question in enumerate(questions):
+            student.set_answer(question, answers[j][i])
+    return students
+
+
+@pytest.fixture
+def course_(students) -> course.Course:
+    c = course.Course('csc148')
+    c.enroll_students(students)
+    return c
+
+
+@pytest.fixture
+def survey_(questions) -> survey.Survey:
+    s = survey.Survey(questions)
+    crits = [criterion.HomogeneousCriterion(),
+             criterion.HeterogeneousCriterion(),
+             criterion.LonelyMemberCriterion(),
+             criterion.HomogeneousCriterion()]
+    for question, crit, weight in zip(questions, crits, [2, 5, 7, 4]):
+        s.set_criterion(crit, question)
+        s.set_weight(weight, question)
+    return s
+
+
+def random_course(seed: int, n: int = 24
+                  ) -> tuple[course.Course, survey.Survey]:
+    """Return a course of <n> students with random answers to three
+    questions, and a survey of those questions with random criteria and
+    weights. Small answer ranges make ties between candidate groups common.
+    """
+    rnd = random.Random(seed)
+    questions_ = [survey.MultipleChoiceQuestion(1, 'why?', ['a', 'b', 'c']),
+                  survey.NumericQuestion(2, 'what?', 0, 5),
+                  survey.CheckboxQuestion(3, 'how?', ['a', 'b', 'c'])]
+    survey_ = survey.Survey(questions_)
+    criteria = [criterion.HomogeneousCriterion,
+                criterion.HeterogeneousCriterion,
+                criterion.LonelyMemberCriterion]
+    for question in questions_:
+        survey_.set_criterion(rnd.choice(criteria)(), question)
+        survey_.set_weight(rnd.randint(1, 5), question)
+    students = [course.Student(i, str(i)) for i in range(n)]
+    for student in students:
+        student.set_answer(questions_[0], survey.Answer(rnd.choice('abc')))
+        student.set_answer(questions_[1], survey.Answer(rnd.randint(0, 5)))
+        student.set_answer(questions_[2], survey.Answer(
+            rnd.sample('abc', rnd.randint(1, 3))))
+    course_ = course.Course('csc148')
+    course_.enroll_students(students)
+    return course_, survey_
+
+
+def all_subgroups(n: int) -> list[list[int]]:
+    return [[i] for i in range(n)] + \
+        [[i, j] for i in range(n) for j in range(i + 1, n)] + \
+        [[i, j, k] for i in range(n) for j in range(i + 1, n)
+         for k in range(j + 1, n)] + [list(range(n))]
 
 ###############################################################################
 # Task 2 Test cases
@@ -59,3 +155,1522 @@
 ###############################################################################
 # TODO: Add your test cases below
 
+
+
+###############################################################################
+# AnswerMatrix test cases
+###############################################################################
+class TestAnswerMatrix:
+    def test_rows_follow_get_students(self, course_) -> None:
+        matrix = AnswerMatrix(course_.get_students(), survey.Survey([]))
+        assert matrix.get_students(range(len(matrix))) == \
+            list(course_.get_students())
+        for row, student in enumerate(course_.get_students()):
+            assert matrix.row(student) == row
+
+    def test_survey_accessors(self, survey_, questions) -> None:
+        assert [survey_.get_weight(q) for q in questions] == [2, 5, 7, 4]
+        assert isinstance(survey_.get_criterion(questions[2]),
+                          criterion.LonelyMemberCriterion)
+        with pytest.raises(ValueError):
+            survey_.get_weight(survey.NumericQuestion(99, 'x', 0, 1))
+
+    def test_score_rows_matches_score_students(self, course_,
+                                               survey_) -> None:
+        matrix = AnswerMatrix(course_.get_students(), survey_)
+        for rows in all_subgroups(len(matrix)):
+            expected = survey_.score_students(matrix.get_students(rows))
+            assert matrix.score_rows(rows) == pytest.approx(expected)
+
+    def test_score_rows_invalid_answer(self, course_, survey_,
+                                       questions) -> None:
+        student = course_.get_students()[0]
+        student.set_answer(questions[0], survey.Answer('z'))
+        matrix = AnswerMatrix(course_.get_students(), survey_)
+        assert matrix.score_rows([0, 1]) == 0.0
+        assert matrix.score_rows([1, 2]) > 0.0
+
+    def test_score_rows_custom_criterion(self, course_, survey_,
+                                         questions) -> None:
+        class FirstAnswerCriterion(criterion.Criterion):
+            def score_answers(self, question, answers):
+                return 1.0 if answers[0].content == 'a' else 0.0
+
+        survey_.set_criterion(FirstAnswerCriterion(), questions[0])
+        matrix = AnswerMatrix(course_.get_students(), survey_)
+        for rows in all_subgroups(len(matrix)):
+            expected = survey_.score_students(matrix.get_students(rows))
+            assert matrix.score_rows(rows) == pytest.approx(expected)
+
+    def test_cached_similarities_match(self, course_, survey_) -> None:
+        plain = AnswerMatrix(course_.get_students(), survey_)
+        cached = AnswerMatrix(course_.get_students(), survey_,
+                              cache_similarities=True)
+        for rows in all_subgroups(len(plain)):
+            assert cached.score_rows(rows) == \
+                pytest.approx(plain.score_rows(rows), abs=1e-6)
+
+    def test_cached_similarities_lazy(self, course_, survey_) -> None:
+        matrix = AnswerMatrix(course_.get_students(), survey_,
+                              cache_similarities=True)
+        matrix.score_rows([0, 1, 2])
+        # The lonely member question (position 2) is never cached
+        assert set(matrix._similarities) == {0, 1, 3}
+        n = len(matrix)
+        for similarities in matrix._similarities.values():
+            assert similarities.dtype == 'float32'
+            assert len(similarities) == n * (n - 1) // 2
+
+    def test_survey_similarity_cache(self, course_, survey_) -> None:
+        assert AnswerMatrix(course_.get_students(), survey_)._similarities \
+            is None
+        survey_.enable_similarity_cache()
+        assert survey_.caches_similarities()
+        assert AnswerMatrix(course_.get_students(), survey_)._similarities \
+            == {}
+        survey_.disable_similarity_cache()
+        assert not survey_.caches_similarities()
+
+    @pytest.mark.parametrize('make_grouper', [
+        lambda: grouper.GreedyGrouper(2),
+        lambda: grouper.SimulatedAnnealingGrouper(3, 200),
+        lambda: grouper.TabuGrouper(2, 30)])
+    def test_grouper_with_similarity_cache(self, course_, survey_,
+                                           make_grouper) -> None:
+        plain = make_grouper().make_grouping(course_, survey_)
+        survey_.enable_similarity_cache()
+        cached = make_grouper().make_grouping(course_, survey_)
+        assert str(cached) == str(plain)
+
+    def test_pair_similarities(self, course_, survey_, questions,
+                               students) -> None:
+        matrix = AnswerMatrix(course_.get_students(), survey_,
+                              cache_similarities=True)
+        q = questions[1]
+        expected = [q.get_similarity(students[i].get_answer(q),
+                                     students[j].get_answer(q))
+                    for i, j in [(1, 3), (1, 4), (3, 4)]]
+        assert list(matrix.pair_similarities(1, [4, 1, 3])) == \
+            pytest.approx(expected)
+
+
+###############################################################################
+# LonelyMemberCriterion test cases
+###############################################################################
+class TestLonelyMemberCriterion:
+    def test_score_answers_all_shared(self, questions) -> None:
+        answers = [survey.Answer(x) for x in ['a', 'b', 'a', 'b', 'b']]
+        crit = criterion.LonelyMemberCriterion()
+        assert crit.score_answers(questions[0], answers) == 1.0
+
+    def test_score_answers_one_unique(self, questions) -> None:
+        answers = [survey.Answer(x) for x in ['a', 'b', 'a', 'c', 'b']]
+        crit = criterion.LonelyMemberCriterion()
+        assert crit.score_answers(questions[0], answers) == 0.0
+
+    def test_score_answers_checkbox_order(self, questions) -> None:
+        answers = [survey.Answer(['a', 'b']), survey.Answer(['b', 'a']),
+                   survey.Answer(['c']), survey.Answer(['c'])]
+        crit = criterion.LonelyMemberCriterion()
+        assert crit.score_answers(questions[3], answers) == 1.0
+        codes = np.array([questions[3].encode_answer(a) for a in answers])
+        assert crit.score_codes(questions[3], codes) == 1.0
+
+    def test_score_answers_invalid(self, questions) -> None:
+        answers = [survey.Answer(['a']), survey.Answer(['a', 'a'])]
+        with pytest.raises(criterion.InvalidAnswerError):
+            criterion.LonelyMemberCriterion().score_answers(questions[3],
+                                                            answers)
+
+
+###############################################################################
+# GroupState test cases
+###############################################################################
+class TestGroupState:
+    def test_score(self, course_, survey_) -> None:
+        matrix = AnswerMatrix(course_.get_students(), survey_)
+        for rows in all_subgroups(len(matrix)):
+            assert matrix.group_state(rows).score() == \
+                pytest.approx(matrix.score_rows(rows))
+
+    def test_score_after(self, course_, survey_) -> None:
+        matrix = AnswerMatrix(course_.get_students(), survey_)
+        state = matrix.group_state([0, 2, 4])
+        assert state.score_after(added=1) == \
+            pytest.approx(matrix.score_rows([0, 2, 4, 1]))
+        assert state.score_after(removed=2) == \
+            pytest.approx(matrix.score_rows([0, 4]))
+        assert state.score_after(added=5, removed=0) == \
+            pytest.approx(matrix.score_rows([2, 4, 5]))
+        assert state.score_change(added=5, removed=0) == \
+            pytest.approx(matrix.score_rows([2, 4, 5])
+                          - matrix.score_rows([0, 2, 4]))
+        assert state.rows == [0, 2, 4]
+
+    def test_add_remove(self, course_, survey_) -> None:
+        matrix = AnswerMatrix(course_.get_students(), survey_)
+        state = matrix.group_state([3])
+        for row in [0, 5, 1]:
+            state.add(row)
+            assert state.score() == pytest.approx(matrix.score_rows(state.rows))
+        for row in [3, 5]:
+            state.remove(row)
+            assert state.score() == pytest.approx(matrix.score_rows(state.rows))
+
+    def test_invalid_answer(self, course_, survey_, questions) -> None:
+        course_.get_students()[1].set_answer(questions[3],
+                                             survey.Answer(['z']))
+        matrix = AnswerMatrix(course_.get_students(), survey_)
+        state = matrix.group_state([0, 1, 2])
+        assert state.score() == 0.0
+        assert state.score_after(added=3, removed=1) == \
+            pytest.approx(matrix.score_rows([0, 2, 3]))
+        state.remove(1)
+        assert state.score() == pytest.approx(matrix.score_rows([0, 2]))
+
+    def test_custom_criterion(self, course_, survey_, questions) -> None:
+        class FirstAnswerCriterion(criterion.Criterion):
+            def score_answers(self, question, answers):
+                return 1.0 if answers[0].content == 'a' else 0.0
+
+        survey_.set_criterion(FirstAnswerCriterion(), questions[0])
+        matrix = AnswerMatrix(course_.get_students(), survey_)
+        state = matrix.group_state([1, 0])
+        assert state.score_after(added=2, removed=1) == \
+            pytest.approx(matrix.score_rows([0, 2]))
+        state.add(3)
+        assert state.score() == pytest.approx(matrix.score_rows([1, 0, 3]))
+
+    def test_survey_group_state(self, students, survey_) -> None:
+        state = survey_.group_state(students, [students[4], students[1]])
+        assert state.rows == [4, 1]
+        assert state.score() == \
+            pytest.approx(survey_.score_students([students[4], students[1]]))
+        state.add(0)
+        assert state.score() == pytest.approx(
+            survey_.score_students([students[4], students[1], students[0]]))
+
+    @pytest.mark.parametrize('kernel', [None, moves.CycleKernel(),
+                                        moves.TransferKernel()])
+    def test_incremental_chain(self, course_, survey_, kernel) -> None:
+        matrix = AnswerMatrix(course_.get_students(), survey_)
+        groups = grouper.slice_list(list(range(6)), 2)
+        proposer = None if kernel is None else moves.BatchProposer(kernel)
+        chain = grouper.AnnealingChain(matrix, groups, proposer, True)
+        for i in range(200):
+            chain.step(matrix, i, 0.2)
+            assert chain.score == pytest.approx(matrix.total_score(groups))
+        chain.restore_best(matrix)
+        assert matrix.total_score(groups) == pytest.approx(chain.best_score)
+
+    def test_incremental_annealing(self, course_, survey_) -> None:
+        annealer = grouper.SimulatedAnnealingGrouper(3, 300, 0.5,
+                                                     incremental=True)
+        grouping = annealer.make_grouping(course_, survey_)
+        assert sorted(s.id for g in grouping.get_groups()
+                      for s in g.get_members()) == list(range(1, 7))
+        assert survey_.score_grouping(grouping) \
+            == pytest.approx(annealer.stats.best_score)
+
+
+###############################################################################
+# Answer validation test cases
+###############################################################################
+class CountingQuestion(survey.MultipleChoiceQuestion):
+    def __init__(self, id_, text, options):
+        super().__init__(id_, text, options)
+        self.validations = 0
+
+    def validate_answer(self, answer):
+        self.validations += 1
+        return super().validate_answer(answer)
+
+
+class TestAnswerValidation:
+    def test_has_answer_validates_once(self) -> None:
+        question = CountingQuestion(1, 'why?', ['a', 'b'])
+        student = course.Student(1, 'Zoro')
+        student.set_answer(question, survey.Answer('a'))
+        assert student.has_answer(question)
+        assert student.has_answer(question)
+        assert question.validations == 1
+
+    def test_set_answer_revalidates(self) -> None:
+        question = CountingQuestion(1, 'why?', ['a', 'b'])
+        student = course.Student(1, 'Zoro')
+        student.set_answer(question, survey.Answer('a'))
+        assert student.has_answer(question)
+        student.set_answer(question, survey.Answer('c'))
+        assert not student.has_answer(question)
+
+    def test_same_id_other_question(self, students) -> None:
+        q1 = survey.MultipleChoiceQuestion(1, 'why?', ['a', 'b'])
+        q1b = survey.MultipleChoiceQuestion(1, 'why not?', ['x', 'y'])
+        for student in students[:2]:
+            student.set_answer(q1, survey.Answer('a'))
+        assert students[0].has_answer(q1)
+        assert not students[0].has_answer(q1b)
+        assert survey.Survey([q1b]).score_students(students[:2]) == 0.0
+        assert students[0].has_answer(q1)
+
+    def test_same_id_narrower_range(self, students) -> None:
+        wide = survey.NumericQuestion(1, 'how many?', 0, 10)
+        narrow = survey.NumericQuestion(1, 'how many?', 0, 2)
+        students[0].set_answer(wide, survey.Answer(9))
+        students[1].set_answer(wide, survey.Answer(0))
+        assert students[0].has_answer(wide)
+        score = survey.Survey([narrow]).score_students(students[:2])
+        assert score == 0.0
+
+    def test_answer_validity(self, course_, survey_, questions) -> None:
+        course_.get_students()[2].set_answer(questions[1], survey.Answer(9))
+        validity = course_.answer_validity(survey_)
+        assert validity.shape == (6, 4)
+        assert not validity[2, 1]
+        assert validity.sum() == 23
+        assert not course_.all_answered(survey_)
+
+    def test_score_students_validates_once(self, students) -> None:
+        question = CountingQuestion(1, 'why?', ['a', 'b'])
+        s = survey.Survey([question])
+        for i, student in enumerate(students):
+            student.set_answer(question, survey.Answer('ab'[i % 2]))
+        s.score_students(students)
+        s.score_students(students)
+        assert question.validations == len(students)
+
+    def test_score_students_invalid(self, students, survey_,
+                                    questions) -> None:
+        students[0].set_answer(questions[0], survey.Answer('z'))
+        assert survey_.score_students(students) == 0.0
+        assert survey_.score_students(students[1:]) > 0.0
+
+
+###############################################################################
+# CheckboxQuestion test cases
+###############################################################################
+class TestCheckboxQuestion:
+    def test_get_similarity(self, questions) -> None:
+        q = questions[3]
+        a1 = survey.Answer(['a', 'b', 'c'])
+        a2 = survey.Answer(['c', 'b'])
+        assert q.get_similarity(a1, a2) == pytest.approx(2 / 3)
+        assert q.get_similarity(a2, a2) == 1.0
+
+    def test_similarity_matrix(self, questions, answers) -> None:
+        q = questions[3]
+        codes = np.array([q.encode_answer(a) for a in answers[3]])
+        matrix = q.similarity_matrix(codes)
+        for i, a1 in enumerate(answers[3]):
+            for j, a2 in enumerate(answers[3]):
+                assert matrix[i, j] == pytest.approx(q.get_similarity(a1, a2))
+
+    def test_similarity_matrix_many_options(self) -> None:
+        options = [str(i) for i in range(70)]
+        q = survey.CheckboxQuestion(1, 'which?', options)
+        answers = [survey.Answer(['0', '69']), survey.Answer(['69']),
+                   survey.Answer(['5', '0', '68'])]
+        codes = np.array([q.encode_answer(a) for a in answers], dtype=object)
+        matrix = q.similarity_matrix(codes)
+        for i, a1 in enumerate(answers):
+            for j, a2 in enumerate(answers):
+                assert matrix[i, j] == pytest.approx(q.get_similarity(a1, a2))
+
+
+###############################################################################
+# NumericQuestion test cases
+###############################################################################
+class TestNumericQuestion:
+    def test_mean_similarity(self, questions, answers) -> None:
+        q = questions[1]
+        codes = np.array([q.encode_answer(a) for a in answers[1]])
+        upper = np.triu_indices(len(codes), 1)
+        expected = q.similarity_matrix(codes)[upper].mean()
+        assert q.mean_similarity(codes) == pytest.approx(expected)
+
+    def test_mean_similarity_large_group(self) -> None:
+        q = survey.NumericQuestion(1, 'how many?', 0, 100)
+        codes = np.random.default_rng(0).integers(0, 101, 200).astype(float)
+        upper = np.triu_indices(len(codes), 1)
+        expected = q.similarity_matrix(codes)[upper].mean()
+        assert q.mean_similarity(codes) == pytest.approx(expected)
+
+    def test_criteria_use_mean_similarity(self, questions, answers) -> None:
+        q = questions[1]
+        pairs = [(a, b) for i, a in enumerate(answers[1])
+                 for b in answers[1][i + 1:]]
+        expected = sum(q.get_similarity(a, b) for a, b in pairs) / len(pairs)
+        hom = criterion.HomogeneousCriterion()
+        het = criterion.HeterogeneousCriterion()
+        assert hom.score_answers(q, answers[1]) == pytest.approx(expected)
+        assert het.score_answers(q, answers[1]) == pytest.approx(1 - expected)
+
+
+###############################################################################
+# MultipleChoiceQuestion test cases
+###############################################################################
+class TestMultipleChoiceQuestion:
+    def test_mean_similarity(self, questions, answers) -> None:
+        for q, group in [(questions[0], answers[0]),
+                         (questions[2], answers[2])]:
+            codes = np.array([q.encode_answer(a) for a in group])
+            upper = np.triu_indices(len(codes), 1)
+            expected = q.similarity_matrix(codes)[upper].mean()
+            assert q.mean_similarity(codes) == pytest.approx(expected)
+
+    def test_answer_counts(self, questions, answers) -> None:
+        q = questions[0]
+        codes = np.array([q.encode_answer(a) for a in answers[0]])
+        assert sorted(q.answer_counts(codes)) == [1, 2, 3]
+
+    def test_checkbox_answer_counts(self, questions) -> None:
+        q = questions[3]
+        group = [survey.Answer(['a', 'b']), survey.Answer(['b', 'a']),
+                 survey.Answer(['c'])]
+        codes = np.array([q.encode_answer(a) for a in group])
+        assert sorted(q.answer_counts(codes)) == [1, 2]
+
+
+###############################################################################
+# Batched scoring test cases
+###############################################################################
+class TestScoreMany:
+    def test_matrix_score_many(self, course_, survey_) -> None:
+        matrix = AnswerMatrix(course_.get_students(), survey_)
+        for members in [[0], [1, 4], [0, 2, 5]]:
+            candidates = [r for r in range(len(matrix)) if r not in members]
+            expected = [matrix.score_rows(members + [r]) for r in candidates]
+            assert list(matrix.score_many(members, candidates)) == \
+                pytest.approx(expected)
+
+    def test_survey_score_many(self, students, survey_) -> None:
+        base, candidates = students[:2], students[2:]
+        expected = [survey_.score_students(base + [s]) for s in candidates]
+        assert list(survey_.score_many(base, candidates)) == \
+            pytest.approx(expected)
+
+    def test_score_many_invalid(self, students, survey_, questions) -> None:
+        students[3].set_answer(questions[2], survey.Answer('maybe'))
+        scores = survey_.score_many(students[:2], students[2:])
+        assert scores[1] == 0.0
+        assert scores[0] == pytest.approx(
+            survey_.score_students(students[:3]))
+        assert list(survey_.score_many(students[2:4], students[:2])) == \
+            [0.0, 0.0]
+
+    def test_score_many_custom_criterion(self, students, survey_,
+                                         questions) -> None:
+        class FirstAnswerCriterion(criterion.Criterion):
+            def score_answers(self, question, answers):
+                return 1.0 if answers[0].content == 'a' else 0.0
+
+        survey_.set_criterion(FirstAnswerCriterion(), questions[0])
+        base, candidates = students[1:3], students[3:] + students[:1]
+        expected = [survey_.score_students(base + [s]) for s in candidates]
+        assert list(survey_.score_many(base, candidates)) == \
+            pytest.approx(expected)
+
+    @pytest.mark.parametrize('seed', range(48))
+    def test_best_addition_with_ties(self, seed) -> None:
+        course_, survey_ = random_course(seed)
+        students = list(course_.get_students())
+        rnd = random.Random(seed)
+        for size in [1, 2, 3]:
+            members = rnd.sample(students, size)
+            others = [s for s in students if s not in members]
+            scores = [survey_.score_students(members + [s]) for s in others]
+            expected = others[scores.index(max(scores))]
+            assert survey_.best_addition(members, others) is expected
+            assert grouper.find_best_addition_to_group(
+                survey_, members, others) is expected
+
+    def test_score_groups(self, students, survey_) -> None:
+        groups = [students[:3], students[2:], [students[5], students[0]]]
+        expected = [survey_.score_students(group) for group in groups]
+        assert list(survey_.score_groups(groups)) == pytest.approx(expected)
+
+    def test_greedy_matches_find_best_addition(self, course_,
+                                               survey_) -> None:
+        remaining = list(course_.get_students())
+        expected = set()
+        while remaining:
+            members = [remaining.pop(0)]
+            while remaining and len(members) < 2:
+                best = grouper.find_best_addition_to_group(survey_, members,
+                                                           remaining)
+                remaining.remove(best)
+                members.append(best)
+            expected.add(frozenset(s.id for s in members))
+        grouping = grouper.GreedyGrouper(2).make_grouping(course_, survey_)
+        assert {frozenset(s.id for s in g.get_members())
+                for g in grouping.get_groups()} == expected
+
+
+###############################################################################
+# Score cache test cases
+###############################################################################
+class TestScoreCache:
+    def test_disabled_by_default(self, survey_, students) -> None:
+        survey_.score_students(students[:3])
+        assert survey_.get_cache_stats() == {'hits': 0, 'misses': 0,
+                                             'size': 0}
+
+    def test_hits_any_order(self, survey_, students) -> None:
+        survey_.enable_cache()
+        score = survey_.score_students(students[:3])
+        assert survey_.score_students(students[2::-1]) == score
+        assert survey_.get_cache_stats() == {'hits': 1, 'misses': 1,
+                                             'size': 1}
+
+    def test_fresh_students_same_ids(self) -> None:
+        question = survey.MultipleChoiceQuestion(1, 'why?', ['a', 'b'])
+        s = survey.Survey([question])
+        s.enable_cache()
+
+        def make_students(answers: str) -> list[course.Student]:
+            result = []
+            for i, answer in enumerate(answers):
+                student = course.Student(i, 'S' + str(i))
+                student.set_answer(question, survey.Answer(answer))
+                result.append(student)
+            return result
+
+        assert s.score_students(make_students('ab')) == 0.0
+        assert s.score_students(make_students('aa')) == 1.0
+        assert s.get_cache_stats()['hits'] == 0
+
+    def test_lru_eviction(self, survey_, students) -> None:
+        survey_.enable_cache(max_size=2)
+        survey_.score_students(students[:2])
+        survey_.score_students(students[2:4])
+        survey_.score_students(students[:2])
+        survey_.score_students(students[4:])
+        assert survey_.get_cache_stats()['size'] == 2
+        survey_.score_students(students[:2])
+        survey_.score_students(students[2:4])
+        assert survey_.get_cache_stats() == {'hits': 2, 'misses': 4,
+                                             'size': 2}
+
+    def test_invalidated_by_set_weight(self, survey_, students,
+                                       questions) -> None:
+        survey_.enable_cache()
+        before = survey_.score_students(students[:3])
+        survey_.set_weight(100, questions[1])
+        after = survey_.score_students(students[:3])
+        assert after != before
+        assert survey_.get_cache_stats()['hits'] == 0
+
+    def test_invalidated_by_set_criterion(self, survey_, students,
+                                          questions) -> None:
+        survey_.enable_cache()
+        before = survey_.score_students(students[:3])
+        survey_.set_criterion(criterion.HomogeneousCriterion(), questions[1])
+        after = survey_.score_students(students[:3])
+        assert after != before
+        assert survey_.get_cache_stats()['hits'] == 0
+
+    def test_invalidated_by_set_answer(self, survey_, students,
+                                       questions) -> None:
+        survey_.enable_cache()
+        survey_.score_students(students[:3])
+        students[0].set_answer(questions[0], survey.Answer('z'))
+        assert survey_.score_students(students[:3]) == 0.0
+        assert survey_.get_cache_stats()['hits'] == 0
+
+
+###############################################################################
+# GreedyScorer test cases
+###############################################################################
+class TestGreedyScorer:
+    def test_scores_match_score_many(self, course_, survey_) -> None:
+        matrix = AnswerMatrix(course_.get_students(), survey_)
+        scorer = GreedyScorer(matrix)
+        members = []
+        for row in [3, 0, 5]:
+            scorer.add(row)
+            members.append(row)
+            candidates = [r for r in range(len(matrix)) if r not in members]
+            assert list(scorer.scores()[candidates]) == pytest.approx(
+                list(matrix.score_many(members, candidates)))
+        scorer.clear()
+        scorer.add(1)
+        assert list(scorer.scores()[[0, 2]]) == pytest.approx(
+            list(matrix.score_many([1], [0, 2])))
+
+    def test_invalid_rows(self, course_, survey_, questions) -> None:
+        course_.get_students()[2].set_answer(questions[3], survey.Answer([]))
+        matrix = AnswerMatrix(course_.get_students(), survey_)
+        scorer = GreedyScorer(matrix)
+        scorer.add(0)
+        assert scorer.scores()[2] == 0.0
+        assert list(scorer.scores()[[1, 3]]) == pytest.approx(
+            list(matrix.score_many([0], [1, 3])))
+        scorer.add(2)
+        assert not scorer.scores().any()
+
+    def test_custom_criterion(self, course_, survey_, questions) -> None:
+        class FirstAnswerCriterion(criterion.Criterion):
+            def score_answers(self, question, answers):
+                return 1.0 if answers[0].content == 'a' else 0.0
+
+        survey_.set_criterion(FirstAnswerCriterion(), questions[0])
+        matrix = AnswerMatrix(course_.get_students(), survey_)
+        scorer = GreedyScorer(matrix)
+        scorer.add(1)
+        scorer.add(4)
+        assert list(scorer.scores()[[0, 2, 3, 5]]) == pytest.approx(
+            list(matrix.score_many([1, 4], [0, 2, 3, 5])))
+
+    def test_greedy_matches_reference(self, course_, survey_) -> None:
+        matrix = AnswerMatrix(course_.get_students(), survey_)
+        for size in [2, 3, 4]:
+            remaining = list(matrix.students)
+            expected = set()
+            while remaining:
+                members = [remaining.pop(0)]
+                while remaining and len(members) < size:
+                    student = grouper.find_best_addition_to_group(
+                        survey_, members, remaining)
+                    remaining.remove(student)
+                    members.append(student)
+                expected.add(frozenset(student.id for student in members))
+            grouping = grouper.GreedyGrouper(size).make_grouping(course_,
+                                                                 survey_)
+            assert {frozenset(s.id for s in g.get_members())
+                    for g in grouping.get_groups()} == expected
+
+    @pytest.mark.parametrize('seed', range(48))
+    def test_greedy_matches_reference_with_ties(self, seed) -> None:
+        course_, survey_ = random_course(seed)
+        for size in [3, 4]:
+            remaining = list(course_.get_students())
+            expected = []
+            while remaining:
+                members = [remaining.pop(0)]
+                while remaining and len(members) < size:
+                    student = grouper.find_best_addition_to_group(
+                        survey_, members, remaining)
+                    remaining.remove(student)
+                    members.append(student)
+                expected.append([student.id for student in members])
+            for lazy in [False, True]:
+                grouping = grouper.GreedyGrouper(size, lazy).make_grouping(
+                    course_, survey_)
+                assert [[s.id for s in g.get_members()]
+                        for g in grouping.get_groups()] == expected
+
+    def test_workers_with_ties(self) -> None:
+        course_, survey_ = random_course(45)
+        serial = grouper.GreedyGrouper(3).make_grouping(course_, survey_)
+        parallel = grouper.GreedyGrouper(3, workers=3).make_grouping(
+            course_, survey_)
+        assert str(parallel) == str(serial)
+
+    def test_set_members(self, course_, survey_) -> None:
+        matrix = AnswerMatrix(course_.get_students(), survey_)
+        scorer = GreedyScorer(matrix)
+        scorer.set_members([2, 0])
+        scorer.set_members([2, 0, 5])
+        expected = GreedyScorer(matrix)
+        for row in [2, 0, 5]:
+            expected.add(row)
+        assert list(scorer.scores()) == list(expected.scores())
+        scorer.set_members([1])
+        expected.clear()
+        expected.add(1)
+        assert list(scorer.scores()) == list(expected.scores())
+
+    def test_workers(self, course_, survey_, questions) -> None:
+        class FirstAnswerCriterion(criterion.Criterion):
+            def score_answers(self, question, answers):
+                return 1.0 if answers[0].content == 'a' else 0.0
+
+        for size in [2, 3, 4]:
+            serial = grouper.GreedyGrouper(size).make_grouping(course_,
+                                                               survey_)
+            parallel = grouper.GreedyGrouper(size, workers=4).make_grouping(
+                course_, survey_)
+            assert str(parallel) == str(serial)
+        survey_.set_criterion(FirstAnswerCriterion(), questions[0])
+        assert str(grouper.GreedyGrouper(3, workers=2).make_grouping(
+            course_, survey_)) \
+            == str(grouper.GreedyGrouper(3).make_grouping(course_, survey_))
+
+
+###############################################################################
+# Lazy GreedyGrouper test cases
+###############################################################################
+class TestLazyGreedy:
+    def test_bounds_and_partial_scores(self, course_, survey_) -> None:
+        matrix = AnswerMatrix(course_.get_students(), survey_)
+        scorer = GreedyScorer(matrix)
+        scorer.add(2)
+        rows = np.array([0, 4])
+        partial = scorer.score_rows(rows)
+        scorer.add(5)
+        assert (scorer.bounds()[[0, 1, 3, 4]]
+                >= scorer.score_rows(np.array([0, 1, 3, 4]))).all()
+        assert list(scorer.score_rows(rows)) \
+            == list(scorer.scores()[rows])
+        assert list(partial) == pytest.approx(
+            list(matrix.score_many([2], [0, 4])))
+
+    def test_matches_exhaustive(self, course_, survey_, questions) -> None:
+        course_.get_students()[4].set_answer(questions[1], survey.Answer(-3))
+        for size in [2, 3, 4]:
+            exhaustive = grouper.GreedyGrouper(size).make_grouping(course_,
+                                                                   survey_)
+            lazy = grouper.GreedyGrouper(size, lazy=True).make_grouping(
+                course_, survey_)
+            assert str(lazy) == str(exhaustive)
+
+    def test_custom_criterion(self, course_, survey_, questions) -> None:
+        class FirstAnswerCriterion(criterion.Criterion):
+            def score_answers(self, question, answers):
+                return 1.0 if answers[0].content == 'a' else 0.0
+
+        survey_.set_criterion(FirstAnswerCriterion(), questions[0])
+        matrix = AnswerMatrix(course_.get_students(), survey_)
+        scorer = GreedyScorer(matrix)
+        scorer.add(0)
+        with pytest.raises(NotImplementedError):
+            scorer.bounds()
+        exhaustive = grouper.GreedyGrouper(3).make_grouping(course_, survey_)
+        lazy = grouper.GreedyGrouper(3, lazy=True).make_grouping(course_,
+                                                                 survey_)
+        assert str(lazy) == str(exhaustive)
+
+
+###############################################################################
+# SimulatedAnnealingGrouper test cases
+###############################################################################
+def reference_annealing(course_: course.Course, survey_: survey.Survey,
+                        group_size: int, iterations: int,
+                        initial_temperature: float) -> list[list[int]]:
+    """Return the ids of the students in each group found by simulated
+    annealing that copies the whole list of groups at every iteration.
+    """
+    from copy import deepcopy
+    groups = grouper.slice_list(list(course_.get_students()), group_size)
+    score = grouper.total_score(survey_, groups)
+    best_groups, best_score = deepcopy(groups), score
+    for i in range(iterations):
+        new_groups = deepcopy(groups)
+        grouper.random_swap(new_groups, seed=i)
+        new_score = grouper.total_score(survey_, new_groups)
+        temperature = initial_temperature * (1 - i / iterations)
+        if grouper.accept(score, new_score, temperature, seed=i):
+            groups, score = new_groups, new_score
+            if score > best_score:
+                best_groups, best_score = deepcopy(groups), score
+    return [[s.id for s in group] for group in best_groups]
+
+
+class TestSimulatedAnnealing:
+    def test_random_swap_positions(self) -> None:
+        lst = [[1, 2], [3], [4, 5, 6]]
+        for seed in range(10):
+            l_1, i_1, l_2, i_2 = grouper.random_swap_positions(lst, seed)
+            expected = [group[:] for group in lst]
+            expected[l_1][i_1], expected[l_2][i_2] = lst[l_2][i_2], \
+                lst[l_1][i_1]
+            grouper.random_swap(lst, seed)
+            assert lst == expected
+
+    @pytest.mark.parametrize('group_size, initial_temperature',
+                             [(2, 1), (3, 0.5), (4, 5)])
+    def test_matches_reference(self, course_, survey_, group_size,
+                               initial_temperature) -> None:
+        expected = reference_annealing(course_, survey_, group_size, 300,
+                                       initial_temperature)
+        grouping = grouper.SimulatedAnnealingGrouper(
+            group_size, 300, initial_temperature).make_grouping(course_,
+                                                                survey_)
+        assert [[s.id for s in group.get_members()]
+                for group in grouping.get_groups()] == expected
+
+
+###############################################################################
+# MultiStartAnnealingGrouper test cases
+###############################################################################
+class TestMultiStartAnnealing:
+    def test_first_chain_is_simulated_annealing(self, course_,
+                                                survey_) -> None:
+        single = grouper.SimulatedAnnealingGrouper(2, 200).make_grouping(
+            course_, survey_)
+        multi = grouper.MultiStartAnnealingGrouper(2, 200, chains=1)
+        assert str(multi.make_grouping(course_, survey_)) == str(single)
+        assert multi.chain_scores == [survey_.score_grouping(single)]
+
+    def test_best_chain(self, course_, survey_) -> None:
+        multi = grouper.MultiStartAnnealingGrouper(3, 100, chains=3)
+        grouping = multi.make_grouping(course_, survey_)
+        assert len(multi.chain_scores) == 3
+        assert survey_.score_grouping(grouping) \
+            == pytest.approx(max(multi.chain_scores))
+
+    def test_same_result_with_workers(self, course_, survey_) -> None:
+        serial = grouper.MultiStartAnnealingGrouper(2, 100, chains=3)
+        parallel = grouper.MultiStartAnnealingGrouper(2, 100, chains=3,
+                                                      workers=2)
+        assert str(parallel.make_grouping(course_, survey_)) \
+            == str(serial.make_grouping(course_, survey_))
+        assert parallel.chain_scores == serial.chain_scores
+
+
+###############################################################################
+# ParallelTemperingGrouper test cases
+###############################################################################
+class TestParallelTempering:
+    def test_single_replica(self, course_, survey_) -> None:
+        matrix = AnswerMatrix(course_.get_students(), survey_)
+        chain = grouper.AnnealingChain(matrix,
+                                       grouper.slice_list(list(range(6)), 2))
+        for i in range(100):
+            chain.step(matrix, i, 0.5)
+        expected = [matrix.get_students(group) for group in chain.best_groups()]
+        tempering = grouper.ParallelTemperingGrouper(2, 100, (0.5,), 7)
+        grouping = tempering.make_grouping(course_, survey_)
+        assert [g.get_members() for g in grouping.get_groups()] == expected
+
+    def test_all_students_grouped(self, course_, survey_) -> None:
+        tempering = grouper.ParallelTemperingGrouper(4, 60, (0.2, 0.05), 10)
+        grouping = tempering.make_grouping(course_, survey_)
+        assert sorted(s.id for g in grouping.get_groups()
+                      for s in g.get_members()) == list(range(1, 7))
+        assert [len(g) for g in grouping.get_groups()] == [4, 2]
+
+    def test_same_result_with_workers(self, course_, survey_) -> None:
+        serial = grouper.ParallelTemperingGrouper(2, 80, (0.3, 0.1, 0.02), 20)
+        parallel = grouper.ParallelTemperingGrouper(2, 80, (0.3, 0.1, 0.02),
+                                                    20, workers=2)
+        assert str(parallel.make_grouping(course_, survey_)) \
+            == str(serial.make_grouping(course_, survey_))
+
+
+###############################################################################
+# Cooling schedule and early stopping test cases
+###############################################################################
+def run_chain(matrix: AnswerMatrix, group_size: int,
+              temperatures: list[float]) -> list[list[int]]:
+    """Return the best groups found by an AnnealingChain that runs one
+    iteration at each temperature in <temperatures>.
+    """
+    chain = grouper.AnnealingChain(
+        matrix, grouper.slice_list(list(range(len(matrix))), group_size))
+    for i, temperature in enumerate(temperatures):
+        chain.step(matrix, i, temperature)
+    return chain.best_groups()
+
+
+class TestCooling:
+    def test_linear(self) -> None:
+        schedule = cooling.LinearCooling()
+        schedule.start(2.0, 4)
+        assert [schedule.temperature(i) for i in range(4)] \
+            == [2.0, 1.5, 1.0, 0.5]
+
+    def test_geometric(self) -> None:
+        schedule = cooling.GeometricCooling(0.5)
+        schedule.start(4.0, 10)
+        assert [schedule.temperature(i) for i in range(3)] == [4.0, 2.0, 1.0]
+
+    def test_reheating(self) -> None:
+        schedule = cooling.ReheatingCooling(2, 0.5)
+        schedule.start(4.0, 4)
+        assert [schedule.temperature(i) for i in range(4)] \
+            == [4.0, 2.0, 2.0, 1.0]
+
+    def test_adaptive(self) -> None:
+        schedule = cooling.AdaptiveCooling(0.5, 2, 0.5)
+        schedule.start(1.0, 8)
+        schedule.record(True)
+        assert schedule.temperature(1) == 1.0
+        schedule.record(True)
+        assert schedule.temperature(2) == 0.5
+        schedule.record(False)
+        schedule.record(False)
+        assert schedule.temperature(4) == 1.0
+
+    def test_adaptive_from_zero(self) -> None:
+        schedule = cooling.AdaptiveCooling(0.5, 2, 0.5)
+        schedule.start(0.0, 8)
+        assert schedule.temperature(0) == cooling._MIN_TEMPERATURE
+        schedule.record(True)
+        schedule.record(True)
+        assert schedule.temperature(2) == cooling._MIN_TEMPERATURE
+        schedule.record(False)
+        schedule.record(False)
+        assert schedule.temperature(4) \
+            == 2 * cooling._MIN_TEMPERATURE
+
+    def test_grouper_schedule(self, course_, survey_) -> None:
+        matrix = AnswerMatrix(course_.get_students(), survey_)
+        expected = run_chain(matrix, 2, [0.5 * 0.9 ** i for i in range(50)])
+        annealer = grouper.SimulatedAnnealingGrouper(
+            2, 50, 0.5, schedule=cooling.GeometricCooling(0.9))
+        grouping = annealer.make_grouping(course_, survey_)
+        assert [g.get_members() for g in grouping.get_groups()] \
+            == [matrix.get_students(group) for group in expected]
+
+
+class TestEarlyStop:
+    def test_patience(self) -> None:
+        rule = cooling.EarlyStop(patience=2)
+        assert not rule.should_stop(True, True)
+        assert not rule.should_stop(True, False)
+        assert rule.should_stop(False, False)
+        rule.start()
+        assert not rule.should_stop(False, False)
+
+    def test_acceptance(self) -> None:
+        rule = cooling.EarlyStop(min_acceptance=0.5, window=2)
+        assert not rule.should_stop(True, False)
+        assert not rule.should_stop(False, False)
+        assert not rule.should_stop(False, False)
+        assert rule.should_stop(False, False)
+
+    def test_grouper_stops(self, course_, survey_) -> None:
+        matrix = AnswerMatrix(course_.get_students(), survey_)
+        stopped = grouper.SimulatedAnnealingGrouper(
+            3, 1000, 0.0, early_stop=cooling.EarlyStop(patience=20))
+        grouping = stopped.make_grouping(course_, survey_)
+        chain = grouper.AnnealingChain(
+            matrix, grouper.slice_list(list(range(6)), 3))
+        last_improvement = 0
+        for i in range(1000):
+            best = chain.best_score
+            chain.step(matrix, i, 0.0)
+            if chain.best_score > best:
+                last_improvement = i + 1
+            if i + 1 - last_improvement >= 20:
+                break
+        assert i < 999
+        assert [g.get_members() for g in grouping.get_groups()] \
+            == [matrix.get_students(group) for group in chain.best_groups()]
+
+
+###############################################################################
+# Swap refinement test cases
+###############################################################################
+def swapped_scores(matrix: AnswerMatrix, first: list[int],
+                   others: list[list[int]]) -> tuple[np.ndarray, np.ndarray]:
+    """Return the arrays of AnswerMatrix.score_swaps, computed by scoring
+    every swapped group with score_rows.
+    """
+    shape = (len(others), len(first), len(others[0]))
+    new_1, new_2 = np.zeros(shape), np.zeros(shape)
+    for p, second in enumerate(others):
+        for i, row_1 in enumerate(first):
+            for j, row_2 in enumerate(second):
+                new_1[p, i, j] = matrix.score_rows(
+                    first[:i] + [row_2] + first[i + 1:])
+                new_2[p, i, j] = matrix.score_rows(
+                    second[:j] + [row_1] + second[j + 1:])
+    return new_1, new_2
+
+
+class TestSwapRefinement:
+    def test_score_swaps(self, course_, survey_) -> None:
+        matrix = AnswerMatrix(course_.get_students(), survey_)
+        for first, others in [([0, 1], [[2, 3], [4, 5]]),
+                              ([0, 1, 2], [[3, 4]]),
+                              ([5], [[0, 1, 2, 3, 4]])]:
+            new_1, new_2 = matrix.score_swaps(first, others)
+            expected_1, expected_2 = swapped_scores(matrix, first, others)
+            assert new_1 == pytest.approx(expected_1)
+            assert new_2 == pytest.approx(expected_2)
+
+    def test_score_swaps_invalid(self, course_, survey_, questions) -> None:
+        course_.get_students()[2].set_answer(questions[1], survey.Answer(9))
+        matrix = AnswerMatrix(course_.get_students(), survey_)
+        new_1, new_2 = matrix.score_swaps([0, 2, 4], [[1, 3, 5]])
+        expected_1, expected_2 = swapped_scores(matrix, [0, 2, 4],
+                                                [[1, 3, 5]])
+        assert new_1 == pytest.approx(expected_1)
+        assert new_2 == pytest.approx(expected_2)
+
+    def test_score_swaps_custom_criterion(self, course_, survey_,
+                                          questions) -> None:
+        class FirstAnswerCriterion(criterion.Criterion):
+            def score_answers(self, question, answers):
+                return 1.0 if answers[0].content == 'a' else 0.0
+
+        survey_.set_criterion(FirstAnswerCriterion(), questions[0])
+        matrix = AnswerMatrix(course_.get_students(), survey_)
+        new_1, new_2 = matrix.score_swaps([1, 4], [[0, 2], [3, 5]])
+        expected_1, expected_2 = swapped_scores(matrix, [1, 4],
+                                                [[0, 2], [3, 5]])
+        assert new_1 == pytest.approx(expected_1)
+        assert new_2 == pytest.approx(expected_2)
+
+    def test_refine_improves(self, course_, survey_) -> None:
+        for size in [2, 3, 4]:
+            grouping = grouper.AlphaGrouper(size).make_grouping(course_,
+                                                                survey_)
+            refined = grouper.refine_grouping(grouping, survey_)
+            assert survey_.score_grouping(refined) \
+                >= survey_.score_grouping(grouping)
+            assert [len(g) for g in refined.get_groups()] \
+                == [len(g) for g in grouping.get_groups()]
+            assert sorted(s.id for g in refined.get_groups()
+                          for s in g.get_members()) == list(range(1, 7))
+
+    def test_refine_is_local_optimum(self, course_, survey_) -> None:
+        matrix = AnswerMatrix(course_.get_students(), survey_)
+        refiner = grouper.SwapRefiner(matrix, [[0, 1], [2, 3], [4, 5]])
+        refiner.refine()
+        for first in range(3):
+            others = [second for second in range(3) if second != first]
+            assert refiner.best_swap(first, others)[1] is None
+
+    def test_max_swaps(self, course_, survey_) -> None:
+        matrix = AnswerMatrix(course_.get_students(), survey_)
+        refiner = grouper.SwapRefiner(matrix, [[0, 1], [2, 3], [4, 5]])
+        assert refiner.refine(0) == 0
+        assert refiner.groups == [[0, 1], [2, 3], [4, 5]]
+
+    def test_refine_records_passes(self, course_, survey_) -> None:
+        matrix = AnswerMatrix(course_.get_students(), survey_)
+        refiner = grouper.SwapRefiner(matrix, [[0, 1], [2, 3], [4, 5]])
+        scores = []
+        stats = grouper.SearchStats(
+            progress=lambda stats_: scores.append(stats_.best_score))
+        refiner.refine(stats=stats)
+        assert stats.iterations == len(scores) > 0
+        assert scores[-1] == pytest.approx(refiner.score())
+
+    def test_refine_past_deadline(self, course_, survey_) -> None:
+        matrix = AnswerMatrix(course_.get_students(), survey_)
+        refiner = grouper.SwapRefiner(matrix, [[0, 1], [2, 3], [4, 5]])
+        stats = grouper.SearchStats(deadline=0.0)
+        assert refiner.refine(stats=stats) == 0
+        assert stats.timed_out and stats.iterations == 0
+
+    def test_local_search_grouper(self, course_, survey_) -> None:
+        base = grouper.AlphaGrouper(3)
+        local = grouper.LocalSearchGrouper(base)
+        expected = grouper.refine_grouping(base.make_grouping(course_,
+                                                              survey_),
+                                           survey_)
+        assert str(local.make_grouping(course_, survey_)) == str(expected)
+
+
+###############################################################################
+# TabuGrouper test cases
+###############################################################################
+class TestTabuGrouper:
+    def test_first_move_is_best_swap(self, course_, survey_) -> None:
+        matrix = AnswerMatrix(course_.get_students(), survey_)
+        start = grouper.slice_list(list(range(6)), 2)
+        best = None
+        for l_1 in range(3):
+            for l_2 in range(l_1 + 1, 3):
+                for i_1 in range(2):
+                    for i_2 in range(2):
+                        groups = [group[:] for group in start]
+                        groups[l_1][i_1], groups[l_2][i_2] = \
+                            groups[l_2][i_2], groups[l_1][i_1]
+                        score = matrix.total_score(groups)
+                        if best is None or score > best[0]:
+                            best = (score, groups)
+        tabu = grouper.TabuGrouper(2, 1, 3, 0)
+        grouping = tabu.make_grouping(course_, survey_)
+        if best[0] > matrix.total_score(start):
+            expected = best[1]
+        else:
+            expected = start
+        assert [g.get_members() for g in grouping.get_groups()] \
+            == [matrix.get_students(group) for group in expected]
+
+    def test_never_worse_than_start(self, course_, survey_) -> None:
+        for size in [2, 3, 4]:
+            start = grouper.AlphaGrouper(size).make_grouping(course_, survey_)
+            grouping = grouper.TabuGrouper(size, 30, 2, 2).make_grouping(
+                course_, survey_)
+            assert survey_.score_grouping(grouping) \
+                >= survey_.score_grouping(start) - 1e-9
+            assert sorted(s.id for g in grouping.get_groups()
+                          for s in g.get_members()) == list(range(1, 7))
+            assert [len(g) for g in grouping.get_groups()] \
+                == [len(g) for g in start.get_groups()]
+
+    def test_seed(self, course_, survey_) -> None:
+        groupings = [str(grouper.TabuGrouper(2, 30, seed=seed).make_grouping(
+            course_, survey_)) for seed in [3, 3]]
+        assert groupings[0] == groupings[1]
+
+    def test_all_tabu(self, course_, survey_) -> None:
+        grouping = grouper.TabuGrouper(3, 20, 2, 6).make_grouping(course_,
+                                                                  survey_)
+        assert len(grouping) == 2
+
+
+###############################################################################
+# GeneticGrouper test cases
+###############################################################################
+class TestGeneticGrouper:
+    def test_score_group_array(self, course_, survey_) -> None:
+        matrix = AnswerMatrix(course_.get_students(), survey_)
+        for size in [1, 2, 3]:
+            groups = np.array([g for g in all_subgroups(6) if len(g) == size])
+            assert list(matrix.score_group_array(groups)) == pytest.approx(
+                [matrix.score_rows(list(g)) for g in groups])
+
+    def test_score_group_array_custom(self, course_, survey_,
+                                      questions) -> None:
+        class FirstAnswerCriterion(criterion.Criterion):
+            def score_answers(self, question, answers):
+                return 1.0 if answers[0].content == 'a' else 0.0
+
+        survey_.set_criterion(FirstAnswerCriterion(), questions[0])
+        course_.get_students()[4].set_answer(questions[1], survey.Answer(9))
+        matrix = AnswerMatrix(course_.get_students(), survey_)
+        groups = np.array([[0, 1], [2, 4], [5, 3]])
+        assert list(matrix.score_group_array(groups)) == pytest.approx(
+            [matrix.score_rows(list(g)) for g in groups])
+
+    def test_score_orders(self, course_, survey_) -> None:
+        matrix = AnswerMatrix(course_.get_students(), survey_)
+        orders = np.array([[0, 1, 2, 3, 4, 5], [5, 3, 1, 0, 2, 4],
+                           [2, 5, 4, 1, 3, 0]])
+        for size in [2, 4, 5]:
+            assert list(matrix.score_orders(orders, size)) == pytest.approx(
+                [matrix.total_score(grouper.slice_list(list(o), size))
+                 for o in orders])
+
+    def test_no_generations(self, course_, survey_) -> None:
+        grouping = grouper.GeneticGrouper(2, 10, 0).make_grouping(course_,
+                                                                  survey_)
+        matrix = AnswerMatrix(course_.get_students(), survey_)
+        assert survey_.score_grouping(grouping) >= matrix.total_score(
+            grouper.slice_list(list(range(6)), 2)) - 1e-9
+
+    def test_all_students_grouped(self, course_, survey_) -> None:
+        for size in [2, 4]:
+            grouping = grouper.GeneticGrouper(size, 8, 10).make_grouping(
+                course_, survey_)
+            assert sorted(s.id for g in grouping.get_groups()
+                          for s in g.get_members()) == list(range(1, 7))
+            assert [len(g) for g in grouping.get_groups()] \
+                == [len(g) for g in grouper.slice_list(list(range(6)), size)]
+
+    def test_same_result_with_workers(self, course_, survey_) -> None:
+        serial = grouper.GeneticGrouper(3, 6, 5)
+        parallel = grouper.GeneticGrouper(3, 6, 5, workers=2)
+        assert str(parallel.make_grouping(course_, survey_)) \
+            == str(serial.make_grouping(course_, survey_))
+
+
+###############################################################################
+# BranchAndBoundGrouper test cases
+###############################################################################
+def all_partitions(rows: list[int], sizes: list[int]) -> list[list[list[int]]]:
+    """Return every way of splitting <rows> into groups whose sizes are
+    <sizes>, in any order.
+    """
+    if not rows:
+        return [[]]
+    result = []
+    first, rest = rows[0], rows[1:]
+    for size in set(sizes):
+        remaining = sizes[:]
+        remaining.remove(size)
+        for others in itertools.combinations(rest, size - 1):
+            pool = [row for row in rest if row not in others]
+            for partition in all_partitions(pool, remaining):
+                result.append([[first, *others]] + partition)
+    return result
+
+
+class TestBranchAndBound:
+    def test_member_bounds(self, course_, survey_) -> None:
+        matrix = AnswerMatrix(course_.get_students(), survey_)
+        rows = np.arange(6)
+        for sizes in [[2], [3], [4, 2], [5, 1]]:
+            bounds = matrix.member_bounds(rows, sizes)
+            for group in all_subgroups(6):
+                if len(group) in sizes:
+                    assert matrix.score_rows(group) \
+                        <= bounds[group].sum() + 1e-9
+
+    def test_default_member_bounds(self, questions) -> None:
+        class FirstAnswerCriterion(criterion.Criterion):
+            def score_answers(self, question, answers):
+                return 1.0 if answers[0].content == 'a' else 0.0
+
+        bounds = FirstAnswerCriterion().member_bounds(
+            questions[0], np.array([0, 1, 2]), [3, 2])
+        assert list(bounds) == [0.5, 0.5, 0.5]
+
+    def test_optimal(self, course_, survey_) -> None:
+        matrix = AnswerMatrix(course_.get_students(), survey_)
+        for size in [2, 3, 4]:
+            sizes = [len(g) for g in grouper.slice_list(list(range(6)), size)]
+            best = max(matrix.total_score(partition)
+                       for partition in all_partitions(list(range(6)), sizes))
+            exact = grouper.BranchAndBoundGrouper(size)
+            grouping = exact.make_grouping(course_, survey_)
+            assert survey_.score_grouping(grouping) == pytest.approx(best)
+            assert exact.gap == 0.0
+            assert sorted(len(g) for g in grouping.get_groups()) \
+                == sorted(sizes)
+
+    def test_time_limit(self, course_, survey_) -> None:
+        exact = grouper.BranchAndBoundGrouper(2, 0.0)
+        grouping = exact.make_grouping(course_, survey_)
+        matrix = AnswerMatrix(course_.get_students(), survey_)
+        best = max(matrix.total_score(partition)
+                   for partition in all_partitions(list(range(6)), [2] * 3))
+        assert survey_.score_grouping(grouping) + exact.gap >= best - 1e-9
+        assert sorted(s.id for g in grouping.get_groups()
+                      for s in g.get_members()) == list(range(1, 7))
+
+
+###############################################################################
+# Online placement test cases
+###############################################################################
+class TestPlaceStudents:
+    def test_joins_best_group(self, students, survey_) -> None:
+        grouping = grouper.Grouping()
+        grouping.add_group(grouper.Group(students[:2]))
+        grouping.add_group(grouper.Group(students[2:4]))
+        grouping.add_group(grouper.Group(students[4:5]))
+        placed = grouper.place_students(grouping, [students[5]], survey_, 3)
+        gains = [survey_.score_students(g.get_members() + [students[5]])
+                 - survey_.score_students(g.get_members())
+                 for g in grouping.get_groups()]
+        best = gains.index(max(gains))
+        assert [len(g) for g in placed.get_groups()] \
+            == [len(g) + (i == best)
+                for i, g in enumerate(grouping.get_groups())]
+        assert students[5] in placed.get_groups()[best]
+
+    def test_full_groups(self, students, survey_) -> None:
+        grouping = grouper.Grouping()
+        grouping.add_group(grouper.Group(students[:2]))
+        grouping.add_group(grouper.Group(students[2:4]))
+        placed = grouper.place_students(grouping, students[4:], survey_, 2)
+        assert sorted(len(g) for g in placed.get_groups()) == [2, 2, 2]
+        assert sorted(s.id for g in placed.get_groups()
+                      for s in g.get_members()) == list(range(1, 7))
+
+    def test_no_repair(self, students, survey_) -> None:
+        grouping = grouper.Grouping()
+        grouping.add_group(grouper.Group(students[:3]))
+        placed = grouper.place_students(grouping, [students[3]], survey_, 3,
+                                        max_swaps=0)
+        assert [g.get_members() for g in placed.get_groups()] \
+            == [students[:3], [students[3]]]
+
+    def test_repair_improves(self, students, survey_) -> None:
+        grouping = grouper.Grouping()
+        grouping.add_group(grouper.Group(students[:2]))
+        grouping.add_group(grouper.Group(students[2:4]))
+        unrepaired = grouper.place_students(grouping, [students[4]], survey_,
+                                            2, max_swaps=0)
+        repaired = grouper.place_students(grouping, [students[4]], survey_, 2)
+        assert survey_.score_grouping(repaired) \
+            >= survey_.score_grouping(unrepaired)
+
+
+###############################################################################
+# Incremental regrouping test cases
+###############################################################################
+class TestIncrementalRegrouping:
+    def test_student_changed_questions(self, students, questions) -> None:
+        student = students[0]
+        revision = student.get_revision()
+        assert student.changed_questions(revision) == set()
+        student.set_answer(questions[1], survey.Answer(2))
+        middle = student.get_revision()
+        student.set_answer(questions[3], survey.Answer(['c']))
+        assert student.changed_questions(revision) == {2, 4}
+        assert student.changed_questions(middle) == {4}
+
+    def test_survey_changed_questions(self, survey_, questions) -> None:
+        revision = survey_.get_revision()
+        survey_.set_weight(3, questions[2])
+        assert survey_.changed_questions(revision) == {3}
+        survey_.set_criterion(criterion.HeterogeneousCriterion(),
+                              questions[0])
+        assert survey_.changed_questions(revision) == {1, 3}
+        assert survey_.get_revision() == revision + 2
+
+    def test_matrix_refresh(self, students, survey_, questions) -> None:
+        matrix = AnswerMatrix(students, survey_)
+        students[1].set_answer(questions[1], survey.Answer(-2.5))
+        students[4].set_answer(questions[0], survey.Answer('z'))
+        assert matrix.refresh() == {1: {1}, 4: {0}}
+        assert matrix.refresh() == {}
+        fresh = AnswerMatrix(students, survey_)
+        for group in all_subgroups(6):
+            assert matrix.score_rows(group) == fresh.score_rows(group)
+
+    def test_matrix_score_columns(self, students, survey_, questions) -> None:
+        students[2].set_answer(questions[1], survey.Answer(-9))
+        matrix = AnswerMatrix(students, survey_)
+        every = range(len(matrix.questions))
+        for group in all_subgroups(6):
+            scores = matrix.score_columns(group, every)
+            assert matrix.weigh_columns(group, scores) \
+                == matrix.score_rows(group)
+
+    def test_reoptimize_changed_questions(self, students, survey_,
+                                          questions) -> None:
+        grouping = grouper.Grouping()
+        for i in range(0, 6, 2):
+            grouping.add_group(grouper.Group(students[i:i + 2]))
+        regrouper = grouper.IncrementalRegrouper(grouping, survey_)
+        survey_.set_weight(4, questions[1])
+        regrouper.reoptimize()
+        students[1].set_answer(questions[0], survey.Answer('b'))
+        survey_.set_criterion(criterion.LonelyMemberCriterion(), questions[2])
+        regrouper.reoptimize()
+        score = survey_.score_grouping(regrouper.get_grouping())
+        assert regrouper.score == pytest.approx(score)
+
+    def test_reoptimize(self, students, survey_, questions) -> None:
+        grouping = grouper.Grouping()
+        for i in range(0, 6, 2):
+            grouping.add_group(grouper.Group(students[i:i + 2]))
+        regrouper = grouper.IncrementalRegrouper(grouping, survey_)
+        before = survey_.score_grouping(grouping)
+        assert regrouper.score == pytest.approx(before)
+        students[0].set_answer(questions[0], survey.Answer('c'))
+        students[3].set_answer(questions[1], survey.Answer(3))
+        change = regrouper.reoptimize()
+        after = survey_.score_grouping(regrouper.get_grouping())
+        assert regrouper.score == pytest.approx(after)
+        assert change == pytest.approx(after - before)
+        assert regrouper.reoptimize() == 0.0
+
+    def test_reoptimize_budget(self, students, survey_, questions) -> None:
+        grouping = grouper.Grouping()
+        for i in range(0, 6, 2):
+            grouping.add_group(grouper.Group(students[i:i + 2]))
+        regrouper = grouper.IncrementalRegrouper(grouping, survey_)
+        before = survey_.score_grouping(grouping)
+        survey_.set_weight(9, questions[2])
+        change = regrouper.reoptimize(max_swaps=0)
+        groups = regrouper.get_grouping().get_groups()
+        assert [g.get_members() for g in groups] \
+            == [g.get_members() for g in grouping.get_groups()]
+        assert change == pytest.approx(survey_.score_grouping(grouping)
+                                       - before)
+
+
+###############################################################################
+# Move proposal test cases
+###############################################################################
+def draws(numbers: list[float]):
+    """Return a function that returns the numbers in <numbers> in order."""
+    numbers = iter(numbers)
+    return lambda: next(numbers)
+
+
+class TestMoveProposal:
+    @pytest.mark.parametrize('move', [moves.Swap(0, 1, 2, 0),
+                                      moves.Cycle([(2, 1), (0, 0), (1, 2)]),
+                                      moves.Transfer(0, 0, 1)])
+    def test_undo(self, move) -> None:
+        groups = [[1, 2], [3, 4, 5], [6, 7]]
+        move.apply(groups)
+        assert groups != [[1, 2], [3, 4, 5], [6, 7]]
+        move.undo(groups)
+        assert groups == [[1, 2], [3, 4, 5], [6, 7]]
+
+    def test_reference_proposer(self) -> None:
+        import random
+        proposer = grouper.ReferenceProposer()
+        groups = [[1, 2], [3], [4, 5, 6]]
+        for seed in range(10):
+            move = proposer.propose(groups, [0.0] * 3, seed)
+            assert move.positions \
+                == grouper.random_swap_positions(groups, seed)
+            assert proposer.uniform(seed) == random.Random(seed).random()
+
+    def test_batch_proposer_repeatable(self) -> None:
+        groups = [[1, 2], [3], [4, 5, 6]]
+        first = moves.BatchProposer(batch=1)
+        second = moves.BatchProposer(batch=7)
+        first.start(3)
+        second.start(3)
+        for i in range(20):
+            assert first.propose(groups, [0.0] * 3, i).positions \
+                == second.propose(groups, [0.0] * 3, 100 - i).positions
+            assert first.uniform(i) == second.uniform(i)
+
+    def test_cycle_kernel(self) -> None:
+        kernel = moves.CycleKernel()
+        move = kernel.propose([[1, 2], [3], [4, 5, 6]], [0.0] * 3,
+                              draws([0.9, 0.9, 0.0, 0.5, 0.0, 0.9]))
+        assert move.positions == [(2, 1), (1, 0), (0, 1)]
+        move = kernel.propose([[1, 2], [3]], [0.0] * 2,
+                              draws([0.0, 0.0, 0.9, 0.0]))
+        assert move.positions == (0, 1, 1, 0)
+
+    def test_transfer_kernel_sizes(self) -> None:
+        kernel = moves.TransferKernel(rate=0.8)
+        proposer = moves.BatchProposer(kernel)
+        groups = [[0, 1, 2], [3, 4, 5], [6, 7, 8], [9, 10]]
+        shorts = set()
+        for i in range(200):
+            proposer.propose(groups, [0.0] * 4, i).apply(groups)
+            assert all(len(group) <= 3 for group in groups)
+            short = [l for l, group in enumerate(groups) if len(group) < 3]
+            assert len(short) == 1 and len(groups[short[0]]) == 2
+            shorts.update(short)
+        assert shorts == {0, 1, 2, 3}
+        assert sorted(sum(groups, [])) == list(range(11))
+
+    def test_transfer_kernel_full_groups(self) -> None:
+        kernel = moves.TransferKernel(rate=1)
+        move = kernel.propose([[1, 2], [3, 4]], [0.0] * 2,
+                              draws([0.0, 0.0, 0.0, 0.9, 0.9]))
+        assert isinstance(move, moves.Swap)
+        move = kernel.propose([[1, 2, 3], [4, 5, 6], [7]], [0.0] * 3,
+                              draws([0.0, 0.9, 0.0, 0.9, 0.9]))
+        assert isinstance(move, moves.Swap)
+
+    def test_transfer_kernel_equal_groups(self) -> None:
+        proposer = moves.BatchProposer(moves.TransferKernel(rate=1))
+        groups = [[0, 1], [2, 3], [4, 5]]
+        for i in range(50):
+            move = proposer.propose(groups, [0.0] * 3, i)
+            assert isinstance(move, moves.Swap)
+            move.apply(groups)
+        assert [len(group) for group in groups] == [2, 2, 2]
+
+    def test_worst_group_kernel(self) -> None:
+        kernel = moves.WorstGroupKernel(bias=1)
+        proposer = moves.BatchProposer(kernel)
+        groups = [[1, 2], [3, 4], [5, 6]]
+        for i in range(20):
+            assert 1 in proposer.propose(groups, [0.5, 0.1, 0.3], i).changed
+
+    @pytest.mark.parametrize('kernel', [moves.SwapKernel(),
+                                        moves.CycleKernel(),
+                                        moves.WorstGroupKernel(),
+                                        moves.TransferKernel()])
+    def test_annealing_with_kernel(self, course_, survey_, kernel) -> None:
+        matrix = AnswerMatrix(course_.get_students(), survey_)
+        groups = grouper.slice_list(list(range(6)), 2)
+        proposer = moves.BatchProposer(kernel)
+        proposer.start(0)
+        chain = grouper.AnnealingChain(matrix, groups, proposer)
+        for i in range(200):
+            chain.step(matrix, i, 0.2)
+            assert chain.score == pytest.approx(matrix.total_score(groups))
+        best = chain.best_groups()
+        chain.restore_best(matrix)
+        assert groups == best
+        assert matrix.total_score(groups) == pytest.approx(chain.best_score)
+        assert sorted(sum(groups, [])) == list(range(6))
+
+    def test_grouper_with_batch_proposer(self, course_, survey_) -> None:
+        annealer = grouper.SimulatedAnnealingGrouper(
+            4, 300, proposer=moves.BatchProposer(moves.CycleKernel()))
+        grouping = annealer.make_grouping(course_, survey_)
+        assert str(grouping) == str(annealer.make_grouping(course_, survey_))
+        assert sorted(s.id for g in grouping.get_groups()
+                      for s in g.get_members()) == list(range(1, 7))
+        assert [len(g) for g in grouping.get_groups()] == [4, 2]
+
+    @pytest.mark.parametrize('incremental', [False, True])
+    def test_grouper_with_transfers(self, course_, survey_,
+                                    incremental) -> None:
+        course_.enroll_students([course.Student(7, 'Ivy')])
+        annealer = grouper.SimulatedAnnealingGrouper(
+            4, 300, proposer=moves.BatchProposer(moves.TransferKernel(0.8)),
+            incremental=incremental)
+        grouping = annealer.make_grouping(course_, survey_)
+        assert sorted(s.id for g in grouping.get_groups()
+                      for s in g.get_members()) == list(range(1, 8))
+        assert sorted(len(g) for g in grouping.get_groups()) == [3, 4]
+
+
+###############################################################################
+# Deadline and progress test cases
+###############################################################################
+SEARCH_GROUPERS = [
+    lambda: grouper.GreedyGrouper(2),
+    lambda: grouper.SimulatedAnnealingGrouper(2, 200),
+    lambda: grouper.MultiStartAnnealingGrouper(2, 100, chains=2),
+    lambda: grouper.ParallelTemperingGrouper(2, 100, (0.3, 0.1), 20),
+    lambda: grouper.TabuGrouper(2, 30),
+    lambda: grouper.LocalSearchGrouper(grouper.AlphaGrouper(2)),
+    lambda: grouper.GeneticGrouper(2, 10, 20),
+    lambda: grouper.BranchAndBoundGrouper(2)
+]
+
+
+class TestDeadline:
+    @pytest.mark.parametrize('make_grouper', SEARCH_GROUPERS)
+    def test_progress(self, course_, survey_, make_grouper) -> None:
+        searcher = make_grouper()
+        seen = []
+        grouping = searcher.make_grouping(
+            course_, survey_,
+            progress=lambda stats: seen.append((stats.iterations,
+                                                stats.best_score)))
+        assert seen
+        assert [iterations for iterations, _ in seen] \
+            == sorted({iterations for iterations, _ in seen})
+        scores = [score for _, score in seen if score is not None]
+        assert scores == sorted(scores)
+        stats = searcher.stats
+        assert not stats.timed_out
+        assert stats.iterations == seen[-1][0]
+        assert stats.best_score == pytest.approx(
+            survey_.score_grouping(grouping))
+        assert stats.elapsed > 0
+
+    @pytest.mark.parametrize('make_grouper', SEARCH_GROUPERS)
+    def test_past_deadline(self, course_, survey_, make_grouper) -> None:
+        searcher = make_grouper()
+        grouping = searcher.make_grouping(course_, survey_, deadline=0.0)
+        assert searcher.stats.timed_out
+        assert sorted(s.id for g in grouping.get_groups()
+                      for s in g.get_members()) == list(range(1, 7))
+        assert [len(g) for g in grouping.get_groups()] == [2, 2, 2]
+        assert searcher.stats.best_score == pytest.approx(
+            survey_.score_grouping(grouping))
+
+    def test_greedy_past_deadline(self, course_, survey_) -> None:
+        greedy = grouper.GreedyGrouper(4)
+        grouping = greedy.make_grouping(course_, survey_, deadline=0.0)
+        assert [[s.id for s in g.get_members()]
+                for g in grouping.get_groups()] == [[1, 2, 3, 4], [5, 6]]
+        assert greedy.stats.iterations == 0
+
+    def test_stops_at_deadline(self, course_, survey_) -> None:
+        def stop_after_50(stats: grouper.SearchStats) -> None:
+            if stats.iterations == 50:
+                stats.deadline = 0.0
+
+        annealer = grouper.SimulatedAnnealingGrouper(2, 300)
+        grouping = annealer.make_grouping(course_, survey_,
+                                          progress=stop_after_50)
+        assert annealer.stats.iterations == 50
+        assert annealer.stats.timed_out
+        assert survey_.score_grouping(grouping) \
+            == pytest.approx(annealer.stats.best_score)
+
+    def test_no_deadline_unchanged(self, course_, survey_) -> None:
+        annealer = grouper.SimulatedAnnealingGrouper(3, 300, 0.5)
+        grouping = annealer.make_grouping(course_, survey_,
+                                          deadline=time.monotonic() + 3600)
+        assert [[s.id for s in group.get_members()]
+                for group in grouping.get_groups()] \
+            == reference_annealing(course_, survey_, 3, 300, 0.5)
+        assert annealer.stats.iterations == 300
+
+    def test_multi_start_workers(self, course_, survey_) -> None:
+        multi = grouper.MultiStartAnnealingGrouper(2, 100, chains=3,
+                                                   workers=2)
+        calls = []
+        multi.make_grouping(course_, survey_, progress=calls.append)
+        assert multi.stats.iterations == 300
+        assert len(calls) == 3
+        assert multi.stats.best_score == pytest.approx(max(multi.chain_scores))